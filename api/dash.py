@@ -9,9 +9,13 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from serverless_wsgi import handle_request
 from app_dash_advanced import app
+from src.response_layer import register_response_layer
 
-# Dash expõe um servidor Flask em app.server (WSGI)
+# Dash expõe um servidor Flask em app.server (WSGI). A camada de respostas
+# (compressão, cache de recursos e 304) é registrada uma única vez por servidor;
+# respostas com Content-Encoding são devolvidas em base64 pelo serverless-wsgi.
 flask_app = app.server
+register_response_layer(flask_app)
 app.config.suppress_callback_exceptions = True
 
 def handler(request):
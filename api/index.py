@@ -4,24 +4,53 @@ API endpoint para o dataGPT v2.6 no Vercel
 import os
 import sys
 import json
-from typing import Dict, Any
+import base64
+import logging
+from typing import Dict, Any, Optional, Tuple
 import pandas as pd
 from io import StringIO
 
 # Adicionar o diretório pai ao path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Módulos sem dependências pesadas na importação: clientes OpenAI/Supabase e
+# plotly.express são carregados no primeiro uso (ver src/lazy_imports.py)
 from src.data_loader import data_loader
 from src.chart_generator import chart_generator
 from src.openai_client import openai_client
 from src.validators import DataValidator, SecurityValidator
 from src.supabase_client import supabase_client
+from src.serialization import dumps_with_raw, figure_to_raw_json
+from src.warm_cache import MISS, hash_request_body, warm_cache
+from src.dataset_handles import dataset_handles, select_data
+from src.data_transport import BINARY_FORMATS, CONTENT_TYPES, encode_dataframe, negotiate_format
+from src.chart_scheduler import SharedAggregates, chart_scheduler
+from src.chunked_storage import chunked_store, prepare_dataset
 from config import Config
 
+def get_header(request, name: str) -> Optional[str]:
+    """Lê um cabeçalho da requisição sem diferenciar maiúsculas e minúsculas"""
+    for key, value in (getattr(request, 'headers', None) or {}).items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
 def handler(request):
     """
     Handler principal para requisições HTTP no Vercel
+    
+    O container é congelado após a resposta, sem executar o atexit: a fila de
+    gravação só é esperada (até Config.SUPABASE_FLUSH_TIMEOUT) quando alguma
+    linha está perto do prazo ou a fila está funda; as demais, incluindo os logs
+    de uso, ficam para a próxima invocação e se perdem se o container for descartado.
     """
+    try:
+        return handle_request(request)
+    finally:
+        supabase_client.write_queue.flush_if_due()
+
+def handle_request(request):
+    """Processa a requisição HTTP"""
     try:
         # Configurar CORS
         headers = {
@@ -31,52 +60,59 @@ def handler(request):
             'Content-Type': 'application/json'
         }
     
-    # Lidar com preflight requests
-    if request.method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': headers,
-            'body': json.dumps({'message': 'OK'})
-        }
+        # Lidar com preflight requests
+        if request.method == 'OPTIONS':
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'body': json.dumps({'message': 'OK'})
+            }
     
-    # Processar requisições POST
-    if request.method == 'POST':
-        try:
-            body = json.loads(request.body)
-            action = body.get('action')
+        # Processar requisições POST
+        if request.method == 'POST':
+            try:
+                body = json.loads(request.body)
+                action = body.get('action')
             
-            if action == 'load_data':
-                return handle_load_data(body, headers)
-            elif action == 'generate_chart':
-                return handle_generate_chart(body, headers)
-            elif action == 'analyze_data':
-                return handle_analyze_data(body, headers)
-            else:
+                # Gráficos e análises são reaproveitados pelo hash do corpo da requisição
+                request_key = hash_request_body(request.body)
+                if action == 'load_data':
+                    return handle_load_data(body, headers, accept=get_header(request, 'Accept'),
+                                            cache_control=get_header(request, 'Cache-Control'))
+                elif action == 'generate_chart':
+                    return handle_generate_chart(body, headers, request_key)
+                elif action == 'generate_charts':
+                    return handle_generate_charts(body, headers, request_key)
+                elif action == 'analyze_data':
+                    return handle_analyze_data(body, headers, request_key)
+                else:
+                    return {
+                        'statusCode': 400,
+                        'headers': headers,
+                        'body': json.dumps({'error': 'Ação não reconhecida'})
+                    }
+            except json.JSONDecodeError:
                 return {
                     'statusCode': 400,
                     'headers': headers,
-                    'body': json.dumps({'error': 'Ação não reconhecida'})
+                    'body': json.dumps({'error': 'JSON inválido'})
                 }
-        except json.JSONDecodeError:
-            return {
-                'statusCode': 400,
-                'headers': headers,
-                'body': json.dumps({'error': 'JSON inválido'})
-            }
     
-    # Resposta padrão para GET
-    return {
-        'statusCode': 200,
-        'headers': headers,
-        'body': json.dumps({
-            'message': 'dataGPT v2.6 API',
-            'version': '2.6',
-            'status': 'active',
-            'endpoints': [
-                'POST /api - load_data, generate_chart, analyze_data'
-            ]
-        })
-    }
+        # Resposta padrão para GET
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps({
+                'message': 'dataGPT v2.6 API',
+                'version': '2.6',
+                'status': 'active',
+                'endpoints': [
+                    'POST /api - load_data, generate_chart, generate_charts, analyze_data'
+                ],
+                # Profundidade e contadores da fila de gravação no Supabase
+                'write_queue': supabase_client.write_queue.stats()
+            })
+        }
     
     except Exception as e:
         return {
@@ -85,8 +121,15 @@ def handler(request):
             'body': json.dumps({'error': f'Erro interno: {str(e)}'})
         }
 
-def handle_load_data(body: Dict[str, Any], headers: Dict[str, str]):
-    """Processa carregamento de dados"""
+def handle_load_data(body: Dict[str, Any], headers: Dict[str, str], accept: Optional[str] = None,
+                     cache_control: Optional[str] = None):
+    """
+    Processa carregamento de dados
+    
+    Com 'refresh' no corpo (ou Cache-Control: no-cache) a planilha é lida de
+    novo mesmo que o dataset esteja no cache quente; a nova leitura substitui
+    a do cache.
+    """
     try:
         url = body.get('url')
         if not url:
@@ -96,47 +139,105 @@ def handle_load_data(body: Dict[str, Any], headers: Dict[str, str]):
                 'body': json.dumps({'error': 'URL não fornecida'})
             }
         
-        # Carregar dados
-        success, data, error = data_loader.load_data_from_url(url)
-        
+        # Formato dos dados: records/split (JSON), arrow ou parquet, com compressão opcional
+        success, negotiated, error = negotiate_format(body.get('format'), accept, body.get('compression'))
         if not success:
             return {
-                'statusCode': 400,
+                'statusCode': 406,
                 'headers': headers,
                 'body': json.dumps({'error': error})
             }
+        data_format, compression = negotiated
+        
+        # Carregar dados (ou reaproveitar o dataset de uma invocação anterior)
+        refresh = bool(body.get('refresh')) or 'no-cache' in (cache_control or '').lower()
+        data, outcome = (None, MISS) if refresh else warm_cache.lookup(warm_cache.make_key('dataset', url))
+        if data is None:
+            success, data, error = data_loader.load_data_from_url(url)
+            
+            if not success:
+                return {
+                    'statusCode': 400,
+                    'headers': {**headers, **warm_cache.headers(outcome)},
+                    'body': json.dumps({'error': error})
+                }
+        headers = {**headers, **warm_cache.headers(outcome)}
         
-        # Converter para JSON serializable
-        data_json = data.to_dict(orient='records')
+        # Registrar o dataset no servidor: as próximas ações usam apenas o identificador
+        handle = dataset_handles.register(url, data)
         
-        # Salvar no Supabase
-        if supabase_client.is_connected():
-            # Salvar fonte de dados
+        # Dados só são enviados quando pedidos (include_data ou um formato explícito)
+        include_data = bool(body.get('include_data')) or bool(body.get('format')) or data_format != 'records'
+        save_to_db = outcome == MISS and supabase_client.is_connected()
+        
+        # Salvar no Supabase (um dataset vindo do cache já foi salvo ao ser carregado).
+        # A fonte é sempre atualizada (passa a ser a mais recente); os dados vão em blocos
+        # deduplicados por conteúdo e uma carga sem mudanças da mesma fonte não grava importação
+        if save_to_db:
             source_success, source_id, source_error = supabase_client.save_data_source(
                 name=f"Google Sheets - {url.split('/')[-1]}",
                 url=url,
                 source_type="google_sheets",
                 description="Dados carregados do Google Sheets"
             )
-            
-            if source_success:
-                # Salvar dados importados
-                supabase_client.save_imported_data(
-                    data_source_id=source_id,
-                    data=data_json,
-                    columns=data.columns.tolist(),
-                    row_count=len(data_json),
-                    file_size_bytes=len(json.dumps(data_json).encode('utf-8'))
-                )
+            prepared_success, prepared, prepared_error = prepare_dataset(data)
+            if not prepared_success:
+                logging.warning(f"Dados importados não gravados: {prepared_error}")
+            elif source_success and chunked_store.find(prepared[0], source_id) is None:
+                # Salvar dados importados (apenas os blocos ainda não armazenados)
+                # Tamanho medido nos blocos já codificados (sem serializar o dataset de novo)
+                chunked_store.save(source_id, data, prepared)
+        
+        if not include_data:
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'body': json.dumps({
+                    'success': True,
+                    **handle,
+                    'columns': data.columns.tolist(),
+                    'saved_to_db': supabase_client.is_connected()
+                })
+            }
+        
+        # Filtros e projeção também valem para o download dos dados
+        success, selected, error = select_data(data, body.get('filters'), body.get('columns'),
+                                               dataset_handles.dataset_key(handle['dataset_id']))
+        if success:
+            success, payload, error = encode_dataframe(selected, data_format, compression)
+        if not success:
+            return {
+                'statusCode': 400,
+                'headers': headers,
+                'body': json.dumps({'error': error})
+            }
+        
+        # Binários (e JSON comprimido) vão no corpo em base64; metadados nos cabeçalhos
+        if isinstance(payload, bytes):
+            binary_headers = {
+                **headers,
+                'Content-Type': CONTENT_TYPES[data_format],
+                'X-Dataset-Id': handle['dataset_id'],
+                'X-Dataset-Shape': f"{selected.shape[0]},{selected.shape[1]}",
+            }
+            if compression and data_format not in BINARY_FORMATS:
+                binary_headers['Content-Encoding'] = compression
+            return {
+                'statusCode': 200,
+                'headers': binary_headers,
+                'body': base64.b64encode(payload).decode('ascii'),
+                'isBase64Encoded': True
+            }
         
         return {
             'statusCode': 200,
             'headers': headers,
-            'body': json.dumps({
+            'body': dumps_with_raw({
                 'success': True,
-                'data': data_json,
+                **handle,
+                'format': data_format,
+                'data': payload,
                 'columns': data.columns.tolist(),
-                'shape': data.shape,
                 'saved_to_db': supabase_client.is_connected()
             })
         }
@@ -148,95 +249,251 @@ def handle_load_data(body: Dict[str, Any], headers: Dict[str, str]):
             'body': json.dumps({'error': f'Erro ao carregar dados: {str(e)}'})
         }
 
-def handle_generate_chart(body: Dict[str, Any], headers: Dict[str, str]):
+def dataset_version(body: Dict[str, Any]) -> Optional[str]:
+    """Versão (hash do conteúdo) do dataset referenciado pela requisição (None no modo com dados enviados)"""
+    dataset_id = body.get('dataset_id')
+    if not dataset_id:
+        return None
+    dataset_key = dataset_handles.dataset_key(dataset_id)
+    if dataset_key is None:
+        # Processo que ainda não viu o dataset: o conteúdo é conhecido ao resolvê-lo
+        # (a recarga fica no cache quente e é reaproveitada pela ação)
+        success, _, _ = dataset_handles.resolve(dataset_id, data_loader.load_data_from_url,
+                                                url=body.get('url'))
+        dataset_key = dataset_handles.dataset_key(dataset_id) if success else None
+    return dataset_key
+
+def get_request_data(body: Dict[str, Any]) -> Tuple[bool, Optional[pd.DataFrame], Optional[str], int]:
+    """
+    Dados de uma ação: pelo identificador do dataset ou enviados em 'data' (modo antigo)
+    
+    Filtros ('filters': coluna -> valores) e projeção ('columns') são aplicados
+    no servidor nos dois modos.
+    
+    Returns:
+        Tuple: (success, data, error_message, status_code)
+    """
+    dataset_id = body.get('dataset_id')
+    dataset_key = None
+    if dataset_id:
+        success, data, error = dataset_handles.resolve(dataset_id, data_loader.load_data_from_url,
+                                                       url=body.get('url'))
+        if not success:
+            return False, None, error, 404
+        dataset_key = dataset_handles.dataset_key(dataset_id)
+    elif body.get('data'):
+        data = pd.DataFrame(body['data'])
+    else:
+        return False, None, 'Dados não fornecidos', 400
+    
+    success, data, error = select_data(data, body.get('filters'), body.get('columns'), dataset_key)
+    return success, data, error, 200 if success else 400
+
+def render_chart(data: pd.DataFrame, chart_config: Dict[str, Any], body: Dict[str, Any],
+                 aggregates: Optional[SharedAggregates] = None) -> Tuple[bool, Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Gera um gráfico e o prepara para a resposta
+    
+    Args:
+        data: Dados já filtrados da requisição
+        chart_config: Configuração do gráfico (x_axis_col, y_axis_col, chart_type...)
+        body: Corpo da requisição (identificador do dataset e filtros)
+        aggregates: Agregados compartilhados entre os gráficos de um lote
+    
+    Returns:
+        Tuple: (success, campos do gráfico na resposta, error_message)
+    """
+    # Datasets registrados compartilham os caches de histogramas e correlações
+    if body.get('dataset_id') and 'dataset_key' not in chart_config:
+        chart_config = {**chart_config, 'dataset_key': dataset_version(body),
+                        'filter_state': body.get('filters')}
+    
+    # Validar configurações
+    x_col = chart_config.get('x_axis_col')
+    y_col = chart_config.get('y_axis_col')
+    chart_type = chart_config.get('chart_type', 'Linha')
+    
+    is_valid, error = DataValidator.validate_chart_columns(data, x_col, y_col)
+    if not is_valid:
+        return False, None, error
+    
+    # Gerar gráfico
+    success, fig, error = chart_generator.generate_chart(
+        data, x_col, y_col, chart_type, chart_config, aggregates
+    )
+    if not success:
+        return False, None, error
+    
+    # Para gráficos Plotly, serializar a figura uma única vez e embutir o JSON
+    if not isinstance(fig, bytes):
+        return True, {'chart_type': 'plotly', 'chart_data': figure_to_raw_json(fig)}, None
+    # Para gráficos Matplotlib, retornar informações básicas
+    return True, {'chart_type': 'matplotlib', 'message': 'Gráfico gerado com sucesso'}, None
+
+def handle_generate_chart(body: Dict[str, Any], headers: Dict[str, str], request_key: Optional[str] = None):
     """Processa geração de gráficos"""
     try:
-        data_json = body.get('data')
+        # Mesma requisição (e mesma versão do dataset) em uma invocação anterior:
+        # devolve o corpo já serializado
+        if request_key:
+            cache_key = warm_cache.make_key('figure', [request_key, dataset_version(body)])
+            cached_body, outcome = warm_cache.lookup(cache_key)
+            if cached_body is not None:
+                return {
+                    'statusCode': 200,
+                    'headers': {**headers, **warm_cache.headers(outcome)},
+                    'body': cached_body
+                }
+            headers = {**headers, **warm_cache.headers(outcome)}
+        
         chart_config = body.get('chart_config', {})
         
-        if not data_json:
+        success, data, error, status_code = get_request_data(body)
+        if not success:
             return {
-                'statusCode': 400,
+                'statusCode': status_code,
                 'headers': headers,
-                'body': json.dumps({'error': 'Dados não fornecidos'})
+                'body': json.dumps({'error': error})
             }
         
-        # Converter JSON para DataFrame
-        data = pd.DataFrame(data_json)
-        
-        # Validar configurações
-        x_col = chart_config.get('x_axis_col')
-        y_col = chart_config.get('y_axis_col')
-        chart_type = chart_config.get('chart_type', 'Linha')
-        
-        is_valid, error = DataValidator.validate_chart_columns(data, x_col, y_col)
-        if not is_valid:
+        success, chart, error = render_chart(data, chart_config, body)
+        if not success:
             return {
                 'statusCode': 400,
                 'headers': headers,
                 'body': json.dumps({'error': error})
             }
+        response_body = dumps_with_raw({'success': True, **chart})
         
-        # Gerar gráfico
-        success, fig, error = chart_generator.generate_chart(
-            data, x_col, y_col, chart_type, chart_config
-        )
+        if request_key:
+            warm_cache.store(cache_key, response_body)
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': response_body
+        }
         
-        if not success:
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': headers,
+            'body': json.dumps({'error': f'Erro ao gerar gráfico: {str(e)}'})
+        }
+
+def handle_generate_charts(body: Dict[str, Any], headers: Dict[str, str], request_key: Optional[str] = None):
+    """Processa a geração de vários gráficos sobre o mesmo dataset em uma requisição"""
+    try:
+        charts = body.get('charts')
+        if not isinstance(charts, list) or not charts or not all(isinstance(c, dict) for c in charts):
             return {
                 'statusCode': 400,
                 'headers': headers,
-                'body': json.dumps({'error': error})
+                'body': json.dumps({'error': "'charts' deve ser uma lista de configurações de gráfico"})
+            }
+        if len(charts) > Config.BATCH_CHARTS_MAX:
+            return {
+                'statusCode': 400,
+                'headers': headers,
+                'body': json.dumps({'error': f"Máximo de {Config.BATCH_CHARTS_MAX} gráficos por requisição"})
             }
         
-        # Para gráficos Plotly, converter para JSON
-        if chart_type in ['Linha', 'Barra', 'Dispersão', 'Áreas']:
-            chart_json = fig.to_json()
+        if request_key:
+            cache_key = warm_cache.make_key('figures', [request_key, dataset_version(body)])
+            cached_body, outcome = warm_cache.lookup(cache_key)
+            if cached_body is not None:
+                return {
+                    'statusCode': 200,
+                    'headers': {**headers, **warm_cache.headers(outcome)},
+                    'body': cached_body
+                }
+            headers = {**headers, **warm_cache.headers(outcome)}
+        
+        # Dataset obtido, filtrado e projetado uma única vez para todos os gráficos
+        success, data, error, status_code = get_request_data(body)
+        if not success:
             return {
-                'statusCode': 200,
+                'statusCode': status_code,
                 'headers': headers,
-                'body': json.dumps({
-                    'success': True,
-                    'chart_type': 'plotly',
-                    'chart_data': json.loads(chart_json)
-                })
+                'body': json.dumps({'error': error})
             }
-        else:
-            # Para gráficos Matplotlib, retornar informações básicas
+        
+        # Gráficos gerados em paralelo, com os agregados em comum calculados uma vez
+        aggregates = SharedAggregates()
+        chart_ids = [str(chart_config.get('id', index)) for index, chart_config in enumerate(charts)]
+        if len(set(chart_ids)) != len(chart_ids):
             return {
-                'statusCode': 200,
+                'statusCode': 400,
                 'headers': headers,
-                'body': json.dumps({
-                    'success': True,
-                    'chart_type': 'matplotlib',
-                    'message': 'Gráfico gerado com sucesso'
-                })
+                'body': json.dumps({'error': "Identificadores 'id' dos gráficos devem ser únicos"})
             }
+        results = chart_scheduler.run({
+            chart_id: (lambda chart_config=chart_config: render_chart(data, chart_config, body, aggregates))
+            for chart_id, chart_config in zip(chart_ids, charts)
+        })
+        
+        # Erros são reportados por gráfico, sem derrubar os demais
+        chart_results = []
+        for chart_id in chart_ids:
+            success, result, error = results[chart_id]
+            if success:
+                success, result, error = result
+            chart_results.append({'id': chart_id, 'success': True, **result} if success
+                                 else {'id': chart_id, 'success': False, 'error': error})
+        failed = sum(1 for chart in chart_results if not chart['success'])
+        
+        response_body = dumps_with_raw({
+            'success': failed < len(chart_results),
+            'charts': chart_results,
+            'failed': failed
+        })
+        # Lotes com erros (ex.: tempo esgotado) não ficam em cache
+        if request_key and not failed:
+            warm_cache.store(cache_key, response_body)
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': response_body
+        }
         
     except Exception as e:
         return {
             'statusCode': 500,
             'headers': headers,
-            'body': json.dumps({'error': f'Erro ao gerar gráfico: {str(e)}'})
+            'body': json.dumps({'error': f'Erro ao gerar gráficos: {str(e)}'})
         }
 
-def handle_analyze_data(body: Dict[str, Any], headers: Dict[str, str]):
+def handle_analyze_data(body: Dict[str, Any], headers: Dict[str, str], request_key: Optional[str] = None):
     """Processa análise com IA"""
     try:
-        data_json = body.get('data')
+        # Mesmo prompt sobre os mesmos dados em uma invocação anterior
+        if request_key:
+            cache_key = warm_cache.make_key('analysis', [request_key, dataset_version(body)])
+            cached_result, outcome = warm_cache.lookup(cache_key)
+            if cached_result is not None:
+                return {
+                    'statusCode': 200,
+                    'headers': {**headers, **warm_cache.headers(outcome)},
+                    'body': json.dumps({
+                        'success': True,
+                        'analysis': cached_result['analysis'],
+                        'model': 'gpt-3.5-turbo',
+                        'processing_time_ms': cached_result['processing_time_ms'],
+                        'saved_to_db': supabase_client.is_connected()
+                    })
+                }
+            headers = {**headers, **warm_cache.headers(outcome)}
+        
         chart_config = body.get('chart_config', {})
         prompt = body.get('prompt', 'Analisar os dados fornecidos')
         
-        if not data_json:
+        success, data, error, status_code = get_request_data(body)
+        if not success:
             return {
-                'statusCode': 400,
+                'statusCode': status_code,
                 'headers': headers,
-                'body': json.dumps({'error': 'Dados não fornecidos'})
+                'body': json.dumps({'error': error})
             }
         
-        # Converter JSON para DataFrame
-        data = pd.DataFrame(data_json)
-        
         # Sanitizar prompt
         prompt = SecurityValidator.sanitize_input(prompt, max_length=1000)
         
@@ -261,12 +518,14 @@ def handle_analyze_data(body: Dict[str, Any], headers: Dict[str, str]):
                 'body': json.dumps({'error': error})
             }
         
+        if request_key:
+            warm_cache.store(cache_key, {'analysis': analysis, 'processing_time_ms': processing_time})
+        
         # Salvar análise no Supabase
         if supabase_client.is_connected():
-            # Buscar fonte de dados mais recente
-            sources_success, sources, sources_error = supabase_client.get_data_sources()
-            if sources_success and sources:
-                latest_source = sources[0]  # Mais recente
+            # Buscar fonte de dados mais recente (uma linha, com cache)
+            source_success, latest_source, source_error = supabase_client.get_latest_data_source()
+            if source_success and latest_source:
                 supabase_client.save_analysis(
                     data_source_id=latest_source['id'],
                     analysis_type='ai_analysis',
@@ -0,0 +1,119 @@
+"""
+API de streaming de datasets (WSGI) para o Vercel
+
+Envia o dataset em NDJSON ou em record batches Arrow IPC à medida que é
+serializado, em blocos de ``Config.STREAM_CHUNK_ROWS`` linhas: a memória fica
+limitada a um bloco, o primeiro byte sai logo após o primeiro bloco e o
+tamanho enviado é contado durante a própria geração (registrado no log e nos
+logs de uso do Supabase).
+
+Corpo da requisição (POST): ``url`` ou ``dataset_id`` (de ``load_data``),
+``format`` ('ndjson' ou 'arrow', também via ``Accept``), ``compression``,
+``filters``, ``columns`` e ``chunk_rows`` (até ``Config.STREAM_MAX_CHUNK_ROWS``).
+"""
+import sys
+import json
+import time
+import logging
+from pathlib import Path
+
+# Adicionar o diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from flask import Flask, Response, request
+from src.data_loader import data_loader
+from src.dataset_handles import dataset_handles, make_dataset_id, select_data
+from src.data_transport import (CONTENT_TYPES, STREAM_FORMATS, negotiate_format, parse_chunk_rows,
+                                stream_dataframe)
+from src.supabase_client import supabase_client
+
+app = Flask(__name__)
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization, Accept',
+    'Access-Control-Expose-Headers': 'X-Dataset-Id, X-Dataset-Shape',
+}
+
+
+def error_response(message: str, status_code: int) -> Response:
+    """Resposta de erro em JSON"""
+    return Response(json.dumps({'error': message}), status=status_code,
+                    mimetype='application/json', headers=CORS_HEADERS)
+
+
+def log_stream(stream, dataset_id: str, started_at: float, request_size: int):
+    """Repassa os blocos e, ao final, registra o tamanho medido durante o envio"""
+    completed = False
+    try:
+        for chunk in stream:
+            yield chunk
+        completed = True
+    finally:
+        elapsed_ms = int((time.time() - started_at) * 1000)
+        logging.info(f"Streaming de {dataset_id}: {stream.bytes_written} bytes em {elapsed_ms} ms"
+                     f"{'' if completed else ' (interrompido)'}")
+        if supabase_client.is_connected():
+            supabase_client.log_api_usage(
+                session_id=dataset_id, endpoint='/api/stream', method='POST',
+                status_code=200 if completed else 499, response_time_ms=elapsed_ms,
+                request_size_bytes=request_size, response_size_bytes=stream.bytes_written
+            )
+        # O container é congelado após a resposta (sem atexit): só espera a gravação de linhas perto do prazo
+        supabase_client.write_queue.flush_if_due()
+
+
+@app.route('/', methods=['POST', 'OPTIONS'])
+@app.route('/api/stream', methods=['POST', 'OPTIONS'])
+def stream_dataset():
+    """Envia um dataset em streaming (NDJSON ou Arrow IPC)"""
+    if request.method == 'OPTIONS':
+        return Response(status=204, headers=CORS_HEADERS)
+
+    started_at = time.time()
+    body = request.get_json(silent=True) or {}
+    url = body.get('url')
+    dataset_id = body.get('dataset_id') or (make_dataset_id(url) if url else None)
+    if not dataset_id:
+        return error_response('URL ou dataset_id não fornecido', 400)
+
+    # Sem formato explícito o streaming usa NDJSON
+    requested = body.get('format')
+    success, negotiated, error = negotiate_format(requested, request.headers.get('Accept'),
+                                                  body.get('compression'))
+    if not success:
+        return error_response(error, 406)
+    data_format, compression = negotiated
+    if data_format == 'records' and not requested:
+        data_format = 'ndjson'
+    if data_format not in STREAM_FORMATS:
+        return error_response(f"Formato '{data_format}' não disponível em streaming. "
+                              f"Use: {', '.join(STREAM_FORMATS)}", 406)
+
+    # Validado antes de carregar o dataset: um erro no meio do envio truncaria a resposta
+    success, chunk_rows, error = parse_chunk_rows(body.get('chunk_rows'))
+    if not success:
+        return error_response(error, 400)
+
+    success, data, error = dataset_handles.resolve(dataset_id, data_loader.load_data_from_url, url=url)
+    if not success:
+        return error_response(error, 404)
+
+    success, data, error = select_data(data, body.get('filters'), body.get('columns'),
+                                       dataset_handles.dataset_key(dataset_id))
+    if success:
+        success, stream, error = stream_dataframe(data, data_format, compression, chunk_rows)
+    if not success:
+        return error_response(error, 400)
+
+    headers = {
+        **CORS_HEADERS,
+        'X-Dataset-Id': dataset_id,
+        'X-Dataset-Shape': f"{data.shape[0]},{data.shape[1]}",
+        'Cache-Control': 'no-store',
+    }
+    if compression == 'gzip':
+        headers['Content-Encoding'] = 'gzip'
+    return Response(log_stream(stream, dataset_id, started_at, request.content_length or 0),
+                    mimetype=CONTENT_TYPES[data_format], headers=headers)
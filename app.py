@@ -1,15 +1,14 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import plotly.io as pio
-import matplotlib.pyplot as plt
-import seaborn as sns
-import io
 from PIL import Image
 import requests
 from dotenv import load_dotenv
 import os
 from utils import get_csv_export_url, load_data
+from src.chart_generator import chart_generator
+from src.cache_keys import dataset_version
+from src.table_backend import st_paginated_dataframe
 from typing import Dict, Any, Tuple
 
 # Configuração da página
@@ -379,6 +378,11 @@ def format_response(template, analysis):
         </div>
         """
 
+@st.cache_data
+def get_dataset_version(url):
+    """Versão do conteúdo carregado por load_data, calculada uma vez por carga"""
+    return dataset_version(load_data(url))
+
 def app():
     st.set_page_config(page_title="dataGPT v2.6", page_icon="images/favicon.ico", layout="wide", initial_sidebar_state="expanded")
 
@@ -413,6 +417,8 @@ def app():
     if google_drive_link:
         try:
             data = load_data(google_drive_link)
+            # Chave dos caches de tabela e gráficos: muda quando o conteúdo muda
+            dataset_key = f"{google_drive_link}@{get_dataset_version(google_drive_link)}"
             
             # Calcular e renderizar métricas
             metrics = calculate_metrics(data)
@@ -420,7 +426,8 @@ def app():
             
             st.markdown('<div class="section">', unsafe_allow_html=True)
             st.markdown('<h2 class="section-title">📋 Dados Carregados</h2>', unsafe_allow_html=True)
-            st.dataframe(data, use_container_width=True)
+            st_paginated_dataframe(data, key="dados-carregados", dataset_key=dataset_key,
+                                   use_container_width=True)
             st.markdown('</div>', unsafe_allow_html=True)
 
             st.sidebar.markdown("## 🔍 Filtros Avançados")
@@ -431,7 +438,9 @@ def app():
                 unique_values = data[column].unique().tolist()
                 with st.sidebar.expander(f'Filtros para {column}', expanded=False):
                     selected_values = st.multiselect(f'Selecione valores para {column}', unique_values, default=unique_values)
-                    filters[column] = selected_values
+                    # Apenas seleções diferentes do padrão (todos os valores) filtram e entram na chave de cache
+                    if len(selected_values) != len(unique_values):
+                        filters[column] = selected_values
 
             for column, selected_values in filters.items():
                 data = data[data[column].isin(selected_values)]
@@ -468,53 +477,42 @@ def app():
                     if show_totals:
                         fig.update_traces(texttemplate='%{y}', textposition='top center')
                     st.plotly_chart(fig, use_container_width=True)
-                elif chart_type == 'Histograma':
-                    fig, ax = plt.subplots()
-                    ax.hist(data[y_axis_col], bins=30, color=color)
-                    ax.set_title(title)
-                    ax.set_xlabel(x_axis_label)
-                    ax.set_ylabel(y_axis_label)
-                    if show_totals:
-                        totals = data[y_axis_col].value_counts()
-                        for i, v in enumerate(totals):
-                            ax.text(i, v + 0.5, str(v), ha='center')
-                    st.pyplot(fig)
-                elif chart_type == 'Boxplot':
-                    fig, ax = plt.subplots()
-                    sns.boxplot(x=data[x_axis_col], y=data[y_axis_col], ax=ax, color=color)
-                    ax.set_title(title)
-                    ax.set_xlabel(x_axis_label)
-                    ax.set_ylabel(y_axis_label)
-                    st.pyplot(fig)
-                elif chart_type == 'Heatmap':
-                    fig, ax = plt.subplots()
-                    sns.heatmap(data.corr(), annot=True, cmap='coolwarm', ax=ax)
-                    ax.set_title(title)
-                    st.pyplot(fig)
                 elif chart_type == 'Áreas':
                     fig = px.area(data, x=x_axis_col, y=y_axis_col, title=title, labels={x_axis_col: x_axis_label, y_axis_col: y_axis_label}, color_discrete_sequence=[color])
                     if show_totals:
                         fig.update_traces(texttemplate='%{y}', textposition='top center')
                     st.plotly_chart(fig, use_container_width=True)
-                elif chart_type == 'Violino':
-                    fig, ax = plt.subplots()
-                    sns.violinplot(x=data[x_axis_col], y=data[y_axis_col], ax=ax, color=color)
-                    ax.set_title(title)
-                    ax.set_xlabel(x_axis_label)
-                    ax.set_ylabel(y_axis_label)
-                    st.pyplot(fig)
+                else:
+                    # Histograma, Boxplot, Heatmap e Violino são renderizados fora do processo
+                    success, image_bytes, error = chart_generator.generate_chart(
+                        data, x_axis_col, y_axis_col, chart_type,
+                        {
+                            "title": title,
+                            "x_axis_label": x_axis_label,
+                            "y_axis_label": y_axis_label,
+                            "color": color,
+                            "show_totals": show_totals,
+                            # Histogramas são reaproveitados enquanto dados e filtros não mudam
+                            "dataset_key": dataset_key,
+                            "filter_state": filters
+                        }
+                    )
+                    if success:
+                        st.image(image_bytes, use_container_width=True)
+                    else:
+                        st.error(f"Erro ao gerar gráfico: {error}")
 
                 if chart_type in ['Linha', 'Barra', 'Dispersão', 'Áreas']:
-                    buffer = io.StringIO()
-                    pio.write_html(fig, buffer)
-                    html_bytes = buffer.getvalue().encode()
-
-                    st.download_button(
-                        label="📥 Baixar Gráfico como HTML",
-                        data=html_bytes,
-                        file_name='grafico.html',
-                        mime='text/html'
-                    )
+                    html_success, html_bytes, html_error = chart_generator.save_chart_as_html(fig)
+                    if html_success:
+                        st.download_button(
+                            label="📥 Baixar Gráfico como HTML",
+                            data=html_bytes,
+                            file_name='grafico.html',
+                            mime='text/html'
+                        )
+                    else:
+                        st.error(f"Erro ao preparar download: {html_error}")
 
                 csv = data.to_csv(index=False)
                 st.download_button(
@@ -3,7 +3,7 @@ Lucrax.ai - Dashboard Profissional com Dash by Plotly
 Migração completa do Streamlit para Dash mantendo todas as funcionalidades
 """
 import dash
-from dash import dcc, html, Input, Output, State, callback_context, dash_table
+from dash import dcc, html, Input, Output, State, callback_context, no_update
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -23,6 +23,13 @@ from src.chart_generator import chart_generator
 from src.api_client import api_client
 from src.openai_client import openai_client
 from src.validators import DataValidator, SecurityValidator
+from src.plotly_theme import apply_theme, figure_data_patch, figure_store_id, themed_graph, register_theme_callback
+from src.session_store import register_session_id_callback, session_store
+from src.filter_engine import filter_engine
+from src.dash_filters import filter_control_id, is_superseded, register_filter_callbacks
+from src.background_jobs import background_callback
+from src.table_backend import register_table_callbacks, server_side_table
+from src.response_layer import register_response_layer
 from config import Config
 
 # Carregar variáveis de ambiente
@@ -34,6 +41,8 @@ app.title = "Lucrax.ai - Dashboard Profissional"
 
 # Configurações do servidor
 server = app.server
+# Compressão das respostas, cache de recursos com fingerprint e 304 para o layout
+register_response_layer(server)
 
 # CSS personalizado para o dashboard
 app.index_string = '''
@@ -358,23 +367,53 @@ app.index_string = '''
 </html>
 '''
 
+def get_session_data(session_id: Optional[str]) -> Optional[pd.DataFrame]:
+    """Retorna o dataset da sessão (sem filtros), recarregando-o se tiver sido descartado"""
+    state = session_store.get_session(session_id)
+    if state is None:
+        return None
+    return session_store.get_dataset(state['dataset_key'], loader=data_loader.load_data_from_url)
+
 class DashboardManager:
-    """Gerenciador principal do dashboard"""
+    """Gerenciador principal do dashboard, reconstruído a cada requisição a partir da sessão"""
     
-    def __init__(self):
+    def __init__(self, session_id: Optional[str] = None):
+        self.session_id = session_id
+        self.dataset_key = None
         self.data = None
+        self.filters = {}
         self.filtered_data = None
         self.metrics = {}
         self.chart_config = {}
         
+    @classmethod
+    def from_session(cls, session_id: Optional[str]) -> 'DashboardManager':
+        """Restaura dataset, filtros e métricas da sessão"""
+        manager = cls(session_id)
+        data = get_session_data(session_id)
+        if data is not None:
+            state = session_store.get_session(session_id)
+            manager.data = data
+            # Chave do conteúdo (URL e versão) para os caches de filtros
+            manager.dataset_key = session_store.cache_key(state['dataset_key'], data)
+            manager.apply_filters(state['filters'], persist=False)
+        return manager
+        
     def load_data(self, url: str) -> Tuple[bool, Optional[str]]:
-        """Carrega dados do Google Sheets"""
+        """Carrega dados do Google Sheets e os associa à sessão"""
         try:
-            success, data, error = data_loader.load_and_display_data(url)
+            success, data, error = data_loader.load_data_from_url(url)
             if success:
                 self.data = data
+                self.dataset_key = None
+                self.filters = {}
                 self.filtered_data = data
-                self.calculate_metrics()
+                if self.session_id:
+                    session_store.put_dataset(url, data)
+                    self.dataset_key = session_store.cache_key(url)
+                    # Nova revisão: cálculos ainda pendentes do dataset anterior são descartados
+                    session_store.set_dataset(self.session_id, url)
+                # Métricas, gráficos e tabela são calculados pelos próprios callbacks
                 return True, None
             else:
                 return False, error
@@ -382,11 +421,17 @@ class DashboardManager:
             return False, str(e)
     
     def calculate_metrics(self):
-        """Calcula métricas principais"""
+        """Calcula métricas principais (em cache por sessão e estado de filtros)"""
         if self.filtered_data is None or self.filtered_data.empty:
             self.metrics = {}
             return
         
+        if self.session_id:
+            cached = session_store.get_aggregate(self.session_id, 'metrics', filters=self.filters)
+            if cached is not None:
+                self.metrics = cached
+                return
+        
         # Encontrar coluna numérica principal
         numeric_cols = self.filtered_data.select_dtypes(include=[np.number]).columns
         
@@ -404,19 +449,20 @@ class DashboardManager:
             }
         else:
             self.metrics = {"count": len(self.filtered_data)}
+        
+        if self.session_id:
+            session_store.set_aggregate(self.session_id, 'metrics', self.metrics, filters=self.filters)
     
-    def apply_filters(self, filters: Dict[str, Any]):
-        """Aplica filtros aos dados"""
+    def apply_filters(self, filters: Dict[str, Any], persist: bool = True):
+        """Aplica filtros aos dados (máscaras por coluna reaproveitadas pelo motor de filtros)"""
         if self.data is None:
             return
         
-        self.filtered_data = self.data.copy()
+        if persist and self.session_id:
+            session_store.update_filters(self.session_id, filters)
         
-        for column, values in filters.items():
-            if values and len(values) > 0:
-                self.filtered_data = self.filtered_data[
-                    self.filtered_data[column].isin(values)
-                ]
+        self.filters = filters
+        self.filtered_data = filter_engine.apply(self.data, filters, dataset_key=self.dataset_key)
         
         self.calculate_metrics()
     
@@ -475,31 +521,8 @@ class DashboardManager:
                     color_discrete_sequence=['#3b82f6']
                 )
             
-            # Personalizar layout
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white', size=12),
-                title_font=dict(size=16, color='white'),
-                margin=dict(l=60, r=60, t=80, b=60),
-                height=400,
-                xaxis=dict(
-                    gridcolor='#374151',
-                    linecolor='#6b7280',
-                    tickfont_color='#9ca3af',
-                    title_font_color='#ffffff'
-                ),
-                yaxis=dict(
-                    gridcolor='#374151',
-                    linecolor='#6b7280',
-                    tickfont_color='#9ca3af',
-                    title_font_color='#ffffff'
-                ),
-                legend=dict(
-                    bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='white')
-                )
-            )
+            # Tema compartilhado, aplicado no cliente
+            apply_theme(fig, client_side=True, height=400)
             
             return fig
             
@@ -507,12 +530,19 @@ class DashboardManager:
             print(f"Erro ao criar gráfico: {e}")
             return go.Figure()
 
-# Instância global do gerenciador
-dashboard_manager = DashboardManager()
 
 # Layout principal do dashboard
 def create_layout():
     return html.Div([
+        # Identificador da sessão (gerado no navegador); o estado fica no armazenamento de sessões do servidor
+        dcc.Store(id="session-id"),
+        # Versão do dataset carregado e estado dos filtros: disparam os callbacks de cada seção
+        dcc.Store(id="dataset-version"),
+        # Conteúdo do dataset ('<url>@<versão do conteúdo>'): chave do cache das análises com IA
+        dcc.Store(id="dataset-content"),
+        dcc.Store(id="filter-selection"),
+        dcc.Store(id="filter-state"),
+        
         # Top Bar
         html.Div([
             html.H1("Lucrax.ai Dashboard", className="main-title"),
@@ -532,6 +562,9 @@ def create_layout():
                     className="dash-input"
                 ),
                 html.Button("Carregar Dados", id="load-data-btn", className="dash-button"),
+                html.Button("Cancelar", id="cancel-load-btn", className="dash-button", style={"display": "none"}),
+                html.Div(id="load-progress"),
+                html.Div(id="load-status"),
                 
                 html.H3("🔍 Filtros", style={"marginTop": "2rem"}),
                 html.Div(id="filters-container"),
@@ -548,6 +581,8 @@ def create_layout():
                            "borderRadius": "8px", "padding": "0.75rem"}
                 ),
                 html.Button("Analisar com IA", id="analyze-btn", className="dash-button"),
+                html.Button("Cancelar", id="cancel-analysis-btn", className="dash-button", style={"display": "none"}),
+                html.Div(id="analysis-progress"),
                 
             ], className="sidebar", style={"width": "300px", "float": "left"}),
             
@@ -556,11 +591,11 @@ def create_layout():
                 # Métricas
                 html.Div(id="metrics-container"),
                 
-                # Gráficos
-                html.Div(id="charts-container"),
+                # Gráficos (preenchidos pelo callback do gráfico após o carregamento)
+                html.Div(create_charts_html(), id="charts-container", style={"display": "none"}),
                 
                 # Tabela de dados
-                html.Div(id="data-table-container"),
+                html.Div(create_data_table_html(), id="data-table-container", style={"display": "none"}),
                 
                 # Análise IA
                 html.Div(id="ai-analysis-container"),
@@ -571,59 +606,133 @@ def create_layout():
         
     ])
 
-# Callbacks do Dash
-@app.callback(
-    [Output("filters-container", "children"),
-     Output("chart-config-container", "children"),
-     Output("metrics-container", "children"),
-     Output("charts-container", "children"),
-     Output("data-table-container", "children"),
-     Output("ai-analysis-container", "children")],
-    [Input("load-data-btn", "n_clicks"),
-     Input("analyze-btn", "n_clicks")],
-    [State("google-sheets-url", "value"),
-     State("analysis-prompt", "value")]
+# Tema dos gráficos aplicado no cliente a partir de assets/lucrax_theme.js
+register_theme_callback(app)
+
+# Filtros por coluna: seleção com espera no navegador, aplicada ao estado da sessão
+register_filter_callbacks(app, get_session_data)
+
+# Callbacks do Dash: um por seção, disparados pela versão do dataset e pelo estado dos filtros
+@background_callback(
+    app,
+    Output("dataset-version", "data"),
+    Output("dataset-content", "data"),
+    Output("load-status", "children"),
+    Input("load-data-btn", "n_clicks"),
+    State("google-sheets-url", "value"),
+    State("session-id", "data"),
+    progress=Output("load-progress", "children"),
+    running=[(Output("load-data-btn", "disabled"), True, False),
+             (Output("cancel-load-btn", "style"), {"display": "block"}, {"display": "none"})],
+    cancel=[Input("cancel-load-btn", "n_clicks")]
 )
-def update_dashboard(load_clicks, analyze_clicks, url, prompt):
-    """Atualiza o dashboard baseado nas interações"""
-    ctx = callback_context
+def load_dataset(set_progress, load_clicks, url, session_id):
+    """Carrega o dataset na sessão (em segundo plano) e publica a nova versão"""
+    if not url:
+        return no_update, no_update, no_update
     
-    if not ctx.triggered:
-        return "", "", "", "", "", ""
+    set_progress("Carregando dados da planilha...")
+    dashboard_manager = DashboardManager(session_id)
+    success, error = dashboard_manager.load_data(url)
+    if not success:
+        return no_update, no_update, html.Div(f"Erro ao carregar dados: {error}", 
+                                              style={"color": "#ef4444", "padding": "1rem"})
     
-    trigger_id = ctx.triggered[0]["prop_id"].split(".")[0]
+    # A versão muda a cada carga (recria as seções); o conteúdo só quando a planilha muda
+    return {"dataset_key": url, "version": load_clicks}, dashboard_manager.dataset_key, ""
+
+@app.callback(
+    Output("filters-container", "children"),
+    Input("dataset-version", "data"),
+    State("session-id", "data"),
+    prevent_initial_call=True
+)
+def update_filters_panel(dataset_version, session_id):
+    """Recria os filtros dinâmicos quando um dataset é carregado"""
+    return create_filters_html(get_session_data(session_id))
+
+@app.callback(
+    Output("chart-config-container", "children"),
+    Input("dataset-version", "data"),
+    State("session-id", "data"),
+    prevent_initial_call=True
+)
+def update_chart_config(dataset_version, session_id):
+    """Recria a configuração de gráfico quando um dataset é carregado"""
+    return create_chart_config_html(get_session_data(session_id))
+
+@app.callback(
+    Output("metrics-container", "children"),
+    Input("dataset-version", "data"),
+    Input("filter-state", "data"),
+    State("session-id", "data"),
+    prevent_initial_call=True
+)
+def update_metrics(dataset_version, filter_state, session_id):
+    """Atualiza os cards de métricas"""
+    if callback_context.triggered_id == "filter-state" and is_superseded(session_id, filter_state):
+        return no_update
+    return create_metrics_html(DashboardManager.from_session(session_id).metrics)
+
+@app.callback(
+    Output(figure_store_id("main"), "data"),
+    Output("charts-container", "style"),
+    Input("dataset-version", "data"),
+    Input("filter-state", "data"),
+    State("session-id", "data"),
+    prevent_initial_call=True
+)
+def update_main_chart(dataset_version, filter_state, session_id):
+    """
+    Atualiza o gráfico principal
     
-    if trigger_id == "load-data-btn" and url:
-        # Carregar dados
-        success, error = dashboard_manager.load_data(url)
-        
-        if not success:
-            return "", "", "", "", "", html.Div(f"Erro ao carregar dados: {error}", 
-                                               style={"color": "#ef4444", "padding": "1rem"})
-        
-        # Criar filtros dinâmicos
-        filters_html = create_filters_html(dashboard_manager.data)
-        
-        # Criar configuração de gráfico
-        chart_config_html = create_chart_config_html(dashboard_manager.data)
-        
-        # Criar métricas
-        metrics_html = create_metrics_html(dashboard_manager.metrics)
-        
-        # Criar gráficos
-        charts_html = create_charts_html(dashboard_manager.data)
-        
-        # Criar tabela
-        table_html = create_data_table_html(dashboard_manager.data)
-        
-        return filters_html, chart_config_html, metrics_html, charts_html, table_html, ""
+    Um novo dataset envia a figura completa; mudanças de filtro enviam
+    apenas os traces (atualização parcial) e são abandonadas se uma seleção
+    mais recente chegar antes do fim do cálculo.
+    """
+    filter_change = callback_context.triggered_id == "filter-state"
+    # Seleções substituídas enquanto aguardavam na fila são descartadas
+    if filter_change and is_superseded(session_id, filter_state):
+        return no_update, no_update
+    
+    dashboard_manager = DashboardManager.from_session(session_id)
+    fig = create_main_chart(dashboard_manager)
+    if fig is None:
+        return None, {"display": "none"}
     
-    elif trigger_id == "analyze-btn" and prompt and dashboard_manager.data is not None:
-        # Análise com IA
-        analysis_html = perform_ai_analysis(prompt, dashboard_manager.data)
-        return "", "", "", "", "", analysis_html
+    if filter_change:
+        if is_superseded(session_id, filter_state):
+            return no_update, no_update
+        return figure_data_patch(fig), no_update
+    return fig.to_plotly_json(), {}
+
+# Tabela de dados: apenas a página visível é enviada, ordenada e filtrada no servidor
+register_table_callbacks(app, "data-table", "data-table-container", get_session_data)
+
+@background_callback(
+    app,
+    Output("ai-analysis-container", "children"),
+    Input("analyze-btn", "n_clicks"),
+    State("analysis-prompt", "value"),
+    State("session-id", "data"),
+    State("dataset-content", "data"),
+    State("filter-state", "data"),
+    progress=Output("analysis-progress", "children"),
+    running=[(Output("analyze-btn", "disabled"), True, False),
+             (Output("cancel-analysis-btn", "style"), {"display": "block"}, {"display": "none"})],
+    cancel=[Input("cancel-analysis-btn", "n_clicks")],
+    # Resultado reaproveitado por prompt, conteúdo do dataset e filtros (cliques e sessão fora da chave)
+    cache_results=True,
+    cache_args_to_ignore=[0, 2]
+)
+def update_ai_analysis(set_progress, analyze_clicks, prompt, session_id, dataset_content, filter_state):
+    """Executa a análise com IA (em segundo plano) sem alterar as demais seções"""
+    data = get_session_data(session_id)
+    if not prompt or data is None:
+        return no_update
     
-    return "", "", "", "", "", ""
+    set_progress("Analisando dados...")
+    return perform_ai_analysis(prompt, data)
 
 def create_filters_html(data):
     """Cria HTML para filtros dinâmicos"""
@@ -637,7 +746,7 @@ def create_filters_html(data):
             html.Div([
                 html.Label(f"Filtrar por {column}", className="filter-title"),
                 dcc.Dropdown(
-                    id=f"filter-{column}",
+                    id=filter_control_id(column),
                     options=[{"label": str(val), "value": val} for val in unique_values],
                     value=unique_values,
                     multi=True,
@@ -719,39 +828,37 @@ def create_metrics_html(metrics):
     return html.Div(metric_cards, style={"display": "grid", "gridTemplateColumns": "repeat(5, 1fr)", 
                                         "gap": "1rem", "marginBottom": "2rem"})
 
-def create_charts_html(data):
-    """Cria HTML para gráficos"""
+def create_main_chart(dashboard_manager: DashboardManager) -> Optional[go.Figure]:
+    """Cria o gráfico principal (None se os dados não tiverem colunas numéricas suficientes)"""
+    data = dashboard_manager.data
     if data is None or data.empty:
-        return ""
+        return None
     
-    # Gráfico principal
     numeric_cols = data.select_dtypes(include=[np.number]).columns
     if len(numeric_cols) >= 2:
         x_col = data.columns[0]
         y_col = numeric_cols[0]
-        
-        fig = dashboard_manager.create_chart("Bar", x_col, y_col)
-        
-        return html.Div([
-            html.Div([
-                html.Div("Gráfico Principal", className="chart-title"),
-                dcc.Graph(figure=fig, style={"height": "400px"})
-            ], className="chart-container")
-        ])
+        return dashboard_manager.create_chart("Bar", x_col, y_col)
     
-    return ""
+    return None
 
-def create_data_table_html(data):
-    """Cria HTML para tabela de dados"""
-    if data is None or data.empty:
-        return ""
-    
+def create_charts_html():
+    """Cria o contêiner do gráfico principal; a figura é preenchida pelo callback"""
+    return html.Div([
+        html.Div([
+            html.Div("Gráfico Principal", className="chart-title"),
+            themed_graph("main", style={"height": "400px"})
+        ], className="chart-container")
+    ])
+
+def create_data_table_html():
+    """Cria HTML para tabela de dados (páginas servidas por register_table_callbacks)"""
     return html.Div([
         html.Div([
             html.Div("Dados em Tabela", className="chart-title"),
-            dash_table.DataTable(
-                data=data.head(20).to_dict('records'),
-                columns=[{"name": i, "id": i} for i in data.columns],
+            server_side_table(
+                "data-table",
+                page_size=20,
                 style_cell={
                     'backgroundColor': '#1e293b',
                     'color': '#ffffff',
@@ -768,7 +875,6 @@ def create_data_table_html(data):
                 style_data={
                     'border': '1px solid #475569'
                 },
-                page_size=10,
                 style_table={'overflowX': 'auto'}
             )
         ], className="chart-container")
@@ -792,8 +898,9 @@ def perform_ai_analysis(prompt, data):
     except Exception as e:
         return html.Div(f"Erro na análise: {str(e)}", style={"color": "#ef4444"})
 
-# Definir layout
+# Definir layout (estático, revalidado com ETag); cada página cria sua sessão no navegador
 app.layout = create_layout()
+register_session_id_callback(app)
 
 # Executar aplicação
 if __name__ == "__main__":
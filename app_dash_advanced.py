@@ -3,7 +3,7 @@ Lucrax.ai - Dashboard Avançado com Dash by Plotly
 Versão completa com todas as funcionalidades e interatividade
 """
 import dash
-from dash import dcc, html, Input, Output, State, callback_context, dash_table, clientside_callback
+from dash import dcc, html, Input, Output, State, callback_context, clientside_callback, no_update
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -23,6 +23,15 @@ from src.chart_generator import chart_generator
 from src.api_client import api_client
 from src.openai_client import openai_client
 from src.validators import DataValidator, SecurityValidator
+from src.plotly_theme import apply_theme, figure_data_patch, figure_store_id, themed_graph, register_theme_callback
+from src.session_store import register_session_id_callback, session_store
+from src.filter_engine import filter_engine
+from src.dash_filters import filter_control_id, is_superseded, register_filter_callbacks
+from src.background_jobs import background_callback
+from src.table_backend import register_table_callbacks, server_side_table
+from src.response_layer import register_response_layer
+from src.chart_scheduler import SharedAggregates, chart_scheduler
+from src.cache_keys import make_filter_key
 from config import Config
 
 # Carregar variáveis de ambiente
@@ -34,6 +43,8 @@ app.title = "Lucrax.ai - Dashboard Profissional"
 
 # Configurações do servidor
 server = app.server
+# Compressão das respostas, cache de recursos com fingerprint e 304 para o layout
+register_response_layer(server)
 
 # Configurar encoding UTF-8
 import sys
@@ -437,41 +448,88 @@ app.index_string = '''
 </html>
 '''
 
+def load_clean_dataset(url: str) -> Tuple[bool, Optional[pd.DataFrame], Optional[str]]:
+    """Carrega dados do Google Sheets com encoding normalizado (também usado para recarregar sessões)"""
+    try:
+        success, data, error = data_loader.load_data_from_url(url)
+        if not success:
+            return False, None, error
+        
+        # Garantir que os dados estão com encoding correto
+        for col in data.columns:
+            if data[col].dtype == 'object':
+                data[col] = data[col].astype(str).str.encode('utf-8', errors='ignore').str.decode('utf-8')
+        
+        return True, data, None
+    except Exception as e:
+        return False, None, str(e)
+
+def get_session_data(session_id: Optional[str]) -> Optional[pd.DataFrame]:
+    """Retorna o dataset da sessão (sem filtros), recarregando-o se tiver sido descartado"""
+    state = session_store.get_session(session_id)
+    if state is None:
+        return None
+    return session_store.get_dataset(state['dataset_key'], loader=load_clean_dataset)
+
 class AdvancedDashboardManager:
-    """Gerenciador avançado do dashboard"""
+    """Gerenciador avançado do dashboard, reconstruído a cada requisição a partir da sessão"""
     
-    def __init__(self):
+    def __init__(self, session_id: Optional[str] = None):
+        self.session_id = session_id
+        self.dataset_key = None
         self.data = None
+        self.filters = {}
         self.filtered_data = None
         self.metrics = {}
         self.chart_config = {}
         self.analysis_result = ""
+        # Agregados compartilhados pelos gráficos do estado de filtros atual
+        self.aggregates = SharedAggregates()
+        
+    @classmethod
+    def from_session(cls, session_id: Optional[str]) -> 'AdvancedDashboardManager':
+        """Restaura dataset, filtros e métricas da sessão"""
+        manager = cls(session_id)
+        data = get_session_data(session_id)
+        if data is not None:
+            state = session_store.get_session(session_id)
+            manager.data = data
+            # Chave do conteúdo (URL e versão) para os caches de filtros
+            manager.dataset_key = session_store.cache_key(state['dataset_key'], data)
+            manager.apply_filters(state['filters'], persist=False)
+        return manager
         
     def load_data(self, url: str) -> Tuple[bool, Optional[str]]:
-        """Carrega dados do Google Sheets"""
-        try:
-            success, data, error = data_loader.load_data_from_url(url)
-            if success:
-                # Garantir que os dados estão com encoding correto
-                for col in data.columns:
-                    if data[col].dtype == 'object':
-                        data[col] = data[col].astype(str).str.encode('utf-8', errors='ignore').str.decode('utf-8')
-                
-                self.data = data
-                self.filtered_data = data
-                self.calculate_metrics()
-                return True, None
-            else:
-                return False, error
-        except Exception as e:
-            return False, str(e)
+        """Carrega dados do Google Sheets e os associa à sessão"""
+        success, data, error = load_clean_dataset(url)
+        if not success:
+            return False, error
+        
+        self.data = data
+        self.dataset_key = None
+        self.filters = {}
+        self.filtered_data = data
+        self.aggregates = SharedAggregates()
+        if self.session_id:
+            session_store.put_dataset(url, data)
+            self.dataset_key = session_store.cache_key(url)
+            # Nova revisão: cálculos ainda pendentes do dataset anterior são descartados
+            session_store.set_dataset(self.session_id, url)
+        # Métricas, gráficos e tabela são calculados pelos próprios callbacks
+        return True, None
     
     def calculate_metrics(self):
-        """Calcula métricas principais"""
+        """Calcula métricas principais (em cache por sessão e estado de filtros)"""
         if self.filtered_data is None or self.filtered_data.empty:
             self.metrics = {}
             return
         
+        if self.session_id:
+            cached = session_store.get_aggregate(self.session_id, 'metrics', filters=self.filters)
+            if cached is not None:
+                self.metrics = cached
+                return
+        
         # Encontrar coluna numérica principal
         numeric_cols = self.filtered_data.select_dtypes(include=[np.number]).columns
         
@@ -518,22 +576,37 @@ class AdvancedDashboardManager:
             }
         else:
             self.metrics = {"current_count": len(self.filtered_data)}
+        
+        if self.session_id:
+            session_store.set_aggregate(self.session_id, 'metrics', self.metrics, filters=self.filters)
     
-    def apply_filters(self, filters: Dict[str, Any]):
-        """Aplica filtros aos dados"""
+    def apply_filters(self, filters: Dict[str, Any], persist: bool = True):
+        """Aplica filtros aos dados (máscaras por coluna reaproveitadas pelo motor de filtros)"""
         if self.data is None:
             return
         
-        self.filtered_data = self.data.copy()
+        if persist and self.session_id:
+            session_store.update_filters(self.session_id, filters)
         
-        for column, values in filters.items():
-            if values and len(values) > 0:
-                self.filtered_data = self.filtered_data[
-                    self.filtered_data[column].isin(values)
-                ]
+        self.filters = filters
+        self.filtered_data = filter_engine.apply(self.data, filters, dataset_key=self.dataset_key)
+        self.aggregates = SharedAggregates()
         
         self.calculate_metrics()
     
+    def column_types(self) -> Dict[str, pd.Index]:
+        """Colunas categóricas, numéricas e de data dos dados filtrados (calculadas uma vez)"""
+        return self.aggregates.get('column_types', lambda: {
+            'categorical': self.filtered_data.select_dtypes(include=['object', 'category']).columns,
+            'numeric': self.filtered_data.select_dtypes(include=[np.number]).columns,
+            'datetime': self.filtered_data.select_dtypes(include=['datetime64']).columns,
+        })
+    
+    def grouped_sum(self, by: str, value_col: str) -> pd.DataFrame:
+        """Soma de value_col por categoria, compartilhada entre os gráficos"""
+        return self.aggregates.get(('sum', by, value_col),
+                                   lambda: self.filtered_data.groupby(by)[value_col].sum().reset_index())
+    
     def create_sales_trend_chart(self) -> go.Figure:
         """Cria gráfico de tendência de vendas baseado nos dados reais"""
         if self.filtered_data is None or self.filtered_data.empty:
@@ -541,8 +614,8 @@ class AdvancedDashboardManager:
         
         try:
             # Tentar encontrar coluna de data
-            date_cols = self.filtered_data.select_dtypes(include=['datetime64']).columns
-            numeric_cols = self.filtered_data.select_dtypes(include=[np.number]).columns
+            date_cols = self.column_types()['datetime']
+            numeric_cols = self.column_types()['numeric']
             
             if len(date_cols) > 0 and len(numeric_cols) > 0:
                 # Usar dados reais com agrupamento por data
@@ -590,28 +663,13 @@ class AdvancedDashboardManager:
             print(f"Erro ao criar gráfico de tendência: {e}")
             return go.Figure()
         
-        fig.update_layout(
+        apply_theme(
+            fig,
+            client_side=True,
             title="Tendência de Vendas em 2017",
             xaxis_title="Mês",
             yaxis_title="Vendas (R$)",
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='white', size=12),
-            title_font=dict(size=16, color='white'),
-            margin=dict(l=60, r=60, t=80, b=60),
-            height=400,
-            xaxis=dict(
-                gridcolor='#374151',
-                linecolor='#6b7280',
-                tickfont_color='#9ca3af',
-                title_font_color='#ffffff'
-            ),
-            yaxis=dict(
-                gridcolor='#374151',
-                linecolor='#6b7280',
-                tickfont_color='#9ca3af',
-                title_font_color='#ffffff'
-            )
+            height=400
         )
         
         return fig
@@ -622,8 +680,8 @@ class AdvancedDashboardManager:
             return go.Figure()
         
         # Encontrar coluna categórica e numérica
-        categorical_cols = self.filtered_data.select_dtypes(include=['object', 'category']).columns
-        numeric_cols = self.filtered_data.select_dtypes(include=[np.number]).columns
+        categorical_cols = self.column_types()['categorical']
+        numeric_cols = self.column_types()['numeric']
         
         if len(categorical_cols) > 0 and len(numeric_cols) > 0:
             # Usar dados reais
@@ -631,7 +689,7 @@ class AdvancedDashboardManager:
             value_col = numeric_cols[0]
             
             # Agrupar por categoria
-            category_data = self.filtered_data.groupby(cat_col)[value_col].sum().reset_index()
+            category_data = self.grouped_sum(cat_col, value_col)
             category_data = category_data.sort_values(value_col, ascending=False).head(10)  # Top 10
             
             categories = category_data[cat_col].tolist()
@@ -651,13 +709,10 @@ class AdvancedDashboardManager:
             hovertemplate='<b>%{label}</b><br>Valor: R$ %{value:,.0f}<br>Percentual: %{percent}<extra></extra>'
         )])
         
-        fig.update_layout(
+        apply_theme(
+            fig,
+            client_side=True,
             title="Vendas por Categoria em 2017",
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='white', size=12),
-            title_font=dict(size=16, color='white'),
-            margin=dict(l=60, r=60, t=80, b=60),
             height=400,
             showlegend=True,
             legend=dict(
@@ -665,9 +720,7 @@ class AdvancedDashboardManager:
                 yanchor="middle",
                 y=0.5,
                 xanchor="left",
-                x=1.01,
-                bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white')
+                x=1.01
             )
         )
         
@@ -679,8 +732,8 @@ class AdvancedDashboardManager:
             return go.Figure()
         
         # Encontrar coluna categórica e numérica
-        categorical_cols = self.filtered_data.select_dtypes(include=['object', 'category']).columns
-        numeric_cols = self.filtered_data.select_dtypes(include=[np.number]).columns
+        categorical_cols = self.column_types()['categorical']
+        numeric_cols = self.column_types()['numeric']
         
         if len(categorical_cols) > 0 and len(numeric_cols) > 0:
             # Usar dados reais
@@ -688,7 +741,7 @@ class AdvancedDashboardManager:
             value_col = numeric_cols[0]
             
             # Agrupar por subcategoria
-            subcategory_data = self.filtered_data.groupby(cat_col)[value_col].sum().reset_index()
+            subcategory_data = self.grouped_sum(cat_col, value_col)
             subcategory_data = subcategory_data.sort_values(value_col, ascending=True).head(10)  # Top 10
             
             subcategories = subcategory_data[cat_col].tolist()
@@ -704,28 +757,14 @@ class AdvancedDashboardManager:
             hovertemplate='<b>%{y}</b><br>Vendas: R$ %{x:,.0f}<extra></extra>'
         )])
         
-        fig.update_layout(
+        apply_theme(
+            fig,
+            client_side=True,
             title="Vendas por Subcategoria em 2017",
             xaxis_title="Vendas (R$)",
             yaxis_title="Subcategoria",
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='white', size=12),
-            title_font=dict(size=16, color='white'),
-            margin=dict(l=100, r=60, t=80, b=60),
-            height=400,
-            xaxis=dict(
-                gridcolor='#374151',
-                linecolor='#6b7280',
-                tickfont_color='#9ca3af',
-                title_font_color='#ffffff'
-            ),
-            yaxis=dict(
-                gridcolor='#374151',
-                linecolor='#6b7280',
-                tickfont_color='#9ca3af',
-                title_font_color='#ffffff'
-            )
+            margin=dict(l=100),
+            height=400
         )
         
         return fig
@@ -736,8 +775,8 @@ class AdvancedDashboardManager:
             return go.Figure()
         
         # Encontrar coluna categórica e numérica
-        categorical_cols = self.filtered_data.select_dtypes(include=['object', 'category']).columns
-        numeric_cols = self.filtered_data.select_dtypes(include=[np.number]).columns
+        categorical_cols = self.column_types()['categorical']
+        numeric_cols = self.column_types()['numeric']
         
         if len(categorical_cols) > 1 and len(numeric_cols) > 0:
             # Usar segunda coluna categórica (assumindo que é estado/região)
@@ -745,7 +784,7 @@ class AdvancedDashboardManager:
             value_col = numeric_cols[0]
             
             # Agrupar por estado/região
-            state_data = self.filtered_data.groupby(cat_col)[value_col].sum().reset_index()
+            state_data = self.grouped_sum(cat_col, value_col)
             state_data = state_data.sort_values(value_col, ascending=True).head(10)  # Top 10
             
             states = state_data[cat_col].tolist()
@@ -761,28 +800,14 @@ class AdvancedDashboardManager:
             hovertemplate='<b>%{y}</b><br>Vendas: R$ %{x:,.0f}<extra></extra>'
         )])
         
-        fig.update_layout(
+        apply_theme(
+            fig,
+            client_side=True,
             title="Vendas por Estado em 2017",
             xaxis_title="Vendas (R$)",
             yaxis_title="Estado",
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='white', size=12),
-            title_font=dict(size=16, color='white'),
-            margin=dict(l=80, r=60, t=80, b=60),
-            height=400,
-            xaxis=dict(
-                gridcolor='#374151',
-                linecolor='#6b7280',
-                tickfont_color='#9ca3af',
-                title_font_color='#ffffff'
-            ),
-            yaxis=dict(
-                gridcolor='#374151',
-                linecolor='#6b7280',
-                tickfont_color='#9ca3af',
-                title_font_color='#ffffff'
-            )
+            margin=dict(l=80),
+            height=400
         )
         
         return fig
@@ -793,8 +818,8 @@ class AdvancedDashboardManager:
             return go.Figure()
         
         # Encontrar colunas categóricas e numéricas
-        categorical_cols = self.filtered_data.select_dtypes(include=['object', 'category']).columns
-        numeric_cols = self.filtered_data.select_dtypes(include=[np.number]).columns
+        categorical_cols = self.column_types()['categorical']
+        numeric_cols = self.column_types()['numeric']
         
         if len(categorical_cols) >= 2 and len(numeric_cols) >= 2:
             # Usar dados reais
@@ -838,68 +863,42 @@ class AdvancedDashboardManager:
             hovertemplate='<b>%{text}</b><br>X: %{x:.1f}<br>Y: %{y:.1f}<br>Tamanho: %{marker.size}<extra></extra>'
         )])
         
-        fig.update_layout(
+        apply_theme(
+            fig,
+            client_side=True,
             title="Vendas por Cidade e Estado em 2017",
             xaxis_title="Dimensão X",
             yaxis_title="Dimensão Y",
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='white', size=12),
-            title_font=dict(size=16, color='white'),
-            margin=dict(l=60, r=60, t=80, b=60),
-            height=500,
-            xaxis=dict(
-                gridcolor='#374151',
-                linecolor='#6b7280',
-                tickfont_color='#9ca3af',
-                title_font_color='#ffffff'
-            ),
-            yaxis=dict(
-                gridcolor='#374151',
-                linecolor='#6b7280',
-                tickfont_color='#9ca3af',
-                title_font_color='#ffffff'
-            )
+            height=500
         )
         
         return fig
     
-    def create_recent_orders_table(self) -> pd.DataFrame:
-        """Cria tabela de pedidos recentes baseada nos dados reais"""
-        if self.filtered_data is None or self.filtered_data.empty:
-            return pd.DataFrame()
-        
-        # Usar dados reais
-        recent_orders = self.filtered_data.copy()
-        
-        # Tentar encontrar coluna de data para ordenar
-        date_cols = recent_orders.select_dtypes(include=['datetime64']).columns
-        if len(date_cols) > 0:
-            # Ordenar por data (mais recentes primeiro)
-            recent_orders = recent_orders.sort_values(date_cols[0], ascending=False)
-        else:
-            # Ordenar por índice (últimos registros)
-            recent_orders = recent_orders.tail(10)
-        
-        # Pegar apenas as primeiras 10 linhas
-        recent_orders = recent_orders.head(10)
-        
-        # Renomear colunas para português se necessário
-        if len(recent_orders.columns) >= 3:
-            recent_orders.columns = ['Data do Pedido', 'ID do Cliente', 'Nome do Cliente'] + list(recent_orders.columns[3:])
-        elif len(recent_orders.columns) >= 2:
-            recent_orders.columns = ['Data do Pedido', 'ID do Cliente'] + list(recent_orders.columns[2:])
-        else:
-            recent_orders.columns = ['Dados'] + list(recent_orders.columns[1:])
-        
-        return recent_orders
 
-# Instância global do gerenciador
-dashboard_manager = AdvancedDashboardManager()
+
+def describe_orders_table(data: pd.DataFrame) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """Colunas da tabela de pedidos (rótulos em português) e ordenação inicial (mais recentes primeiro)"""
+    labels = ['Data do Pedido', 'ID do Cliente', 'Nome do Cliente']
+    columns = [{"name": labels[i] if i < len(labels) else str(col), "id": str(col)}
+               for i, col in enumerate(data.columns)]
+    
+    date_cols = data.select_dtypes(include=['datetime64']).columns
+    sort_by = [{"column_id": str(date_cols[0]), "direction": "desc"}] if len(date_cols) > 0 else []
+    return columns, sort_by
+
 
 # Layout principal do dashboard
 def create_layout():
     return html.Div([
+        # Identificador da sessão (gerado no navegador); o estado fica no armazenamento de sessões do servidor
+        dcc.Store(id="session-id"),
+        # Versão do dataset carregado e estado dos filtros: disparam os callbacks de cada seção
+        dcc.Store(id="dataset-version"),
+        # Conteúdo do dataset ('<url>@<versão do conteúdo>'): chave do cache das análises com IA
+        dcc.Store(id="dataset-content"),
+        dcc.Store(id="filter-selection"),
+        dcc.Store(id="filter-state"),
+        
         # Top Bar
         html.Div([
             html.H1("Sales Scorecard", className="main-title"),
@@ -946,6 +945,9 @@ def create_layout():
                     className="dash-input"
                 ),
                 html.Button("Carregar Dados", id="load-data-btn", className="dash-button"),
+                html.Button("Cancelar", id="cancel-load-btn", className="dash-button", style={"display": "none"}),
+                html.Div(id="load-progress"),
+                html.Div(id="load-status"),
                 
                 html.H3("🔍 Filtros Avançados"),
                 html.Div(id="filters-container"),
@@ -962,6 +964,8 @@ def create_layout():
                            "borderRadius": "8px", "padding": "0.75rem"}
                 ),
                 html.Button("Analisar com IA", id="analyze-btn", className="dash-button"),
+                html.Button("Cancelar", id="cancel-analysis-btn", className="dash-button", style={"display": "none"}),
+                html.Div(id="analysis-progress"),
                 
             ], className="sidebar"),
             
@@ -970,11 +974,11 @@ def create_layout():
                 # Métricas
                 html.Div(id="metrics-container"),
                 
-                # Grid de gráficos
-                html.Div(id="charts-container"),
+                # Grid de gráficos (preenchido gráfico a gráfico após o carregamento)
+                html.Div(create_charts_html(), id="charts-container", style={"display": "none"}),
                 
                 # Tabela de dados
-                html.Div(id="data-table-container"),
+                html.Div(create_data_table_html(), id="data-table-container", style={"display": "none"}),
                 
                 # Análise IA
                 html.Div(id="ai-analysis-container"),
@@ -985,59 +989,170 @@ def create_layout():
         
     ])
 
-# Callbacks do Dash
-@app.callback(
-    [Output("filters-container", "children"),
-     Output("chart-config-container", "children"),
-     Output("metrics-container", "children"),
-     Output("charts-container", "children"),
-     Output("data-table-container", "children"),
-     Output("ai-analysis-container", "children")],
-    [Input("load-data-btn", "n_clicks"),
-     Input("analyze-btn", "n_clicks")],
-    [State("google-sheets-url", "value"),
-     State("analysis-prompt", "value")]
+# Tema dos gráficos aplicado no cliente a partir de assets/lucrax_theme.js
+register_theme_callback(app)
+
+# Filtros por coluna: seleção com espera no navegador, aplicada ao estado da sessão
+register_filter_callbacks(app, get_session_data)
+
+# Callbacks do Dash: um por seção, disparados pela versão do dataset e pelo estado dos filtros
+@background_callback(
+    app,
+    Output("dataset-version", "data"),
+    Output("dataset-content", "data"),
+    Output("load-status", "children"),
+    Input("load-data-btn", "n_clicks"),
+    State("google-sheets-url", "value"),
+    State("session-id", "data"),
+    progress=Output("load-progress", "children"),
+    running=[(Output("load-data-btn", "disabled"), True, False),
+             (Output("cancel-load-btn", "style"), {"display": "block"}, {"display": "none"})],
+    cancel=[Input("cancel-load-btn", "n_clicks")]
 )
-def update_dashboard(load_clicks, analyze_clicks, url, prompt):
-    """Atualiza o dashboard baseado nas interações"""
-    ctx = callback_context
+def load_dataset(set_progress, load_clicks, url, session_id):
+    """Carrega o dataset na sessão (em segundo plano) e publica a nova versão"""
+    if not url:
+        return no_update, no_update, no_update
     
-    if not ctx.triggered:
-        return "", "", "", "", "", ""
+    set_progress("Carregando dados da planilha...")
+    dashboard_manager = AdvancedDashboardManager(session_id)
+    success, error = dashboard_manager.load_data(url)
+    if not success:
+        return no_update, no_update, html.Div(f"Erro ao carregar dados: {error}", 
+                                              style={"color": "#ef4444", "padding": "1rem"})
     
-    trigger_id = ctx.triggered[0]["prop_id"].split(".")[0]
+    # A versão muda a cada carga (recria as seções); o conteúdo só quando a planilha muda
+    return {"dataset_key": url, "version": load_clicks}, dashboard_manager.dataset_key, ""
+
+@app.callback(
+    Output("filters-container", "children"),
+    Input("dataset-version", "data"),
+    State("session-id", "data"),
+    prevent_initial_call=True
+)
+def update_filters_panel(dataset_version, session_id):
+    """Recria os filtros dinâmicos quando um dataset é carregado"""
+    return create_filters_html(get_session_data(session_id))
+
+@app.callback(
+    Output("chart-config-container", "children"),
+    Input("dataset-version", "data"),
+    State("session-id", "data"),
+    prevent_initial_call=True
+)
+def update_chart_config(dataset_version, session_id):
+    """Recria a configuração de gráfico quando um dataset é carregado"""
+    return create_chart_config_html(get_session_data(session_id))
+
+@app.callback(
+    Output("metrics-container", "children"),
+    Input("dataset-version", "data"),
+    Input("filter-state", "data"),
+    State("session-id", "data"),
+    prevent_initial_call=True
+)
+def update_metrics(dataset_version, filter_state, session_id):
+    """Atualiza os cards de métricas"""
+    if callback_context.triggered_id == "filter-state" and is_superseded(session_id, filter_state):
+        return no_update
+    return create_metrics_html(AdvancedDashboardManager.from_session(session_id).metrics)
+
+@app.callback(
+    Output("charts-container", "style"),
+    Input("dataset-version", "data"),
+    prevent_initial_call=True
+)
+def show_charts(dataset_version):
+    """Exibe o grid de gráficos após o primeiro carregamento"""
+    return {}
+
+def build_all_charts(session_id: Optional[str]) -> Dict[str, Any]:
+    """Construtores de todos os gráficos do grid, sobre um único estado da sessão"""
+    dashboard_manager = AdvancedDashboardManager.from_session(session_id)
+    return {
+        name: getattr(dashboard_manager, builder)
+        for row in CHART_ROWS for name, _, builder, _ in row
+    }
+
+def create_unavailable_chart(message: str) -> go.Figure:
+    """Figura exibida no lugar de um gráfico que falhou ou excedeu o tempo limite"""
+    fig = go.Figure()
+    fig.add_annotation(text=f"Gráfico indisponível<br><sub>{message}</sub>",
+                       showarrow=False, xref="paper", yref="paper", x=0.5, y=0.5)
+    fig.update_xaxes(visible=False)
+    fig.update_yaxes(visible=False)
+    return apply_theme(fig, client_side=True)
+
+def register_chart_callback(name: str) -> None:
+    """
+    Registra o callback que preenche um gráfico do grid
     
-    if trigger_id == "load-data-btn" and url:
-        # Carregar dados
-        success, error = dashboard_manager.load_data(url)
-        
-        if not success:
-            return "", "", "", "", "", html.Div(f"Erro ao carregar dados: {error}", 
-                                               style={"color": "#ef4444", "padding": "1rem"})
-        
-        # Criar filtros dinâmicos
-        filters_html = create_filters_html(dashboard_manager.data)
-        
-        # Criar configuração de gráfico
-        chart_config_html = create_chart_config_html(dashboard_manager.data)
-        
-        # Criar métricas
-        metrics_html = create_metrics_html(dashboard_manager.metrics)
-        
-        # Criar gráficos
-        charts_html = create_charts_html()
+    Um novo dataset envia a figura completa; mudanças de filtro enviam
+    apenas os traces (atualização parcial) e são abandonadas se uma seleção
+    mais recente chegar antes do fim do cálculo. Os gráficos de um mesmo
+    estado são construídos juntos, em paralelo, pelo chart_scheduler; um
+    gráfico que falhe ou passe do tempo limite vira um aviso no próprio card.
+    
+    Args:
+        name: Identificador do gráfico (ver CHART_ROWS)
+    """
+    @app.callback(
+        Output(figure_store_id(name), "data"),
+        Input("dataset-version", "data"),
+        Input("filter-state", "data"),
+        State("session-id", "data"),
+        prevent_initial_call=True
+    )
+    def update_chart(dataset_version, filter_state, session_id):
+        filter_change = callback_context.triggered_id == "filter-state"
+        # Seleções substituídas enquanto aguardavam na fila são descartadas
+        if filter_change and is_superseded(session_id, filter_state):
+            return no_update
         
-        # Criar tabela
-        table_html = create_data_table_html()
+        state = session_store.get_session(session_id)
+        data = get_session_data(session_id)
+        if state is None or data is None:
+            return no_update
         
-        return filters_html, chart_config_html, metrics_html, charts_html, table_html, ""
-    
-    elif trigger_id == "analyze-btn" and prompt and dashboard_manager.data is not None:
-        # Análise com IA
-        analysis_html = perform_ai_analysis(prompt, dashboard_manager.data)
-        return "", "", "", "", "", analysis_html
+        # Chave pelo conteúdo: os backends em disco e compartilhado devolvem um novo DataFrame a cada leitura
+        build_key = (session_store.cache_key(state['dataset_key'], data), make_filter_key(state['filters']))
+        success, fig, error = chart_scheduler.get_chart(
+            build_key, name, lambda: build_all_charts(session_id)
+        )
+        if not success:
+            return create_unavailable_chart(error).to_plotly_json()
+        if filter_change:
+            return no_update if is_superseded(session_id, filter_state) else figure_data_patch(fig)
+        return fig.to_plotly_json()
+
+# Tabela de pedidos: apenas a página visível é enviada, ordenada e filtrada no servidor
+register_table_callbacks(app, "orders-table", "data-table-container", get_session_data,
+                         describe=describe_orders_table)
+
+@background_callback(
+    app,
+    Output("ai-analysis-container", "children"),
+    Input("analyze-btn", "n_clicks"),
+    State("analysis-prompt", "value"),
+    State("session-id", "data"),
+    State("dataset-content", "data"),
+    State("filter-state", "data"),
+    progress=Output("analysis-progress", "children"),
+    running=[(Output("analyze-btn", "disabled"), True, False),
+             (Output("cancel-analysis-btn", "style"), {"display": "block"}, {"display": "none"})],
+    cancel=[Input("cancel-analysis-btn", "n_clicks")],
+    # Resultado reaproveitado por prompt, conteúdo do dataset e filtros (cliques e sessão fora da chave)
+    cache_results=True,
+    cache_args_to_ignore=[0, 2]
+)
+def update_ai_analysis(set_progress, analyze_clicks, prompt, session_id, dataset_content, filter_state):
+    """Executa a análise com IA (em segundo plano) sem alterar as demais seções"""
+    data = get_session_data(session_id)
+    if not prompt or data is None:
+        return no_update
     
-    return "", "", "", "", "", ""
+    set_progress("Analisando dados...")
+    return perform_ai_analysis(prompt, data)
 
 def create_filters_html(data):
     """Cria HTML para filtros dinâmicos"""
@@ -1051,7 +1166,7 @@ def create_filters_html(data):
             html.Div([
                 html.Label(f"Filtrar por {column}", className="filter-title"),
                 dcc.Dropdown(
-                    id=f"filter-{column}",
+                    id=filter_control_id(column),
                     options=[{"label": str(val), "value": val} for val in unique_values],
                     value=unique_values,
                     multi=True,
@@ -1135,57 +1250,41 @@ def create_metrics_html(metrics):
     return html.Div(metric_cards, style={"display": "grid", "gridTemplateColumns": "repeat(3, 1fr)", 
                                         "gap": "1rem", "marginBottom": "2rem"})
 
+# Gráficos do grid: (identificador, título, método do AdvancedDashboardManager, altura)
+CHART_ROWS = [
+    [("subcategory", "Vendas por Subcategoria em 2017", "create_subcategory_chart", "400px"),
+     ("category", "Vendas por Categoria em 2017", "create_category_chart", "400px")],
+    [("sales-trend", "Tendência de Vendas em 2017", "create_sales_trend_chart", "400px")],
+    [("state", "Vendas por Estado em 2017", "create_state_chart", "400px"),
+     ("bubble", "Vendas por Cidade e Estado em 2017", "create_bubble_chart", "500px")],
+]
+
 def create_charts_html():
-    """Cria HTML para grid de gráficos"""
-    return html.Div([
-        # Primeira linha - Gráfico de subcategoria e categoria
-        html.Div([
-            html.Div([
-                html.Div("Vendas por Subcategoria em 2017", className="chart-title"),
-                dcc.Graph(figure=dashboard_manager.create_subcategory_chart(), style={"height": "400px"})
-            ], className="chart-container"),
-            
-            html.Div([
-                html.Div("Vendas por Categoria em 2017", className="chart-title"),
-                dcc.Graph(figure=dashboard_manager.create_category_chart(), style={"height": "400px"})
-            ], className="chart-container")
-        ], className="charts-grid"),
-        
-        # Segunda linha - Tendência de vendas
-        html.Div([
+    """Cria o grid de gráficos; as figuras são preenchidas pelos callbacks de cada gráfico"""
+    rows = []
+    for row in CHART_ROWS:
+        container_class = "chart-container" if len(row) > 1 else "chart-container chart-full-width"
+        rows.append(html.Div([
             html.Div([
-                html.Div("Tendência de Vendas em 2017", className="chart-title"),
-                dcc.Graph(figure=dashboard_manager.create_sales_trend_chart(), style={"height": "400px"})
-            ], className="chart-container chart-full-width")
-        ], className="charts-grid"),
-        
-        # Terceira linha - Estado e Bubble chart
-        html.Div([
-            html.Div([
-                html.Div("Vendas por Estado em 2017", className="chart-title"),
-                dcc.Graph(figure=dashboard_manager.create_state_chart(), style={"height": "400px"})
-            ], className="chart-container"),
-            
-            html.Div([
-                html.Div("Vendas por Cidade e Estado em 2017", className="chart-title"),
-                dcc.Graph(figure=dashboard_manager.create_bubble_chart(), style={"height": "500px"})
-            ], className="chart-container")
-        ], className="charts-grid")
-    ])
+                html.Div(title, className="chart-title"),
+                themed_graph(name, style={"height": height})
+            ], className=container_class)
+            for name, title, _, height in row
+        ], className="charts-grid"))
+    return html.Div(rows)
+
+for _row in CHART_ROWS:
+    for _name, _, _, _ in _row:
+        register_chart_callback(_name)
 
 def create_data_table_html():
-    """Cria HTML para tabela de pedidos recentes"""
-    recent_orders = dashboard_manager.create_recent_orders_table()
-    
-    if recent_orders.empty:
-        return ""
-    
+    """Cria HTML para tabela de pedidos (páginas servidas por register_table_callbacks)"""
     return html.Div([
         html.Div([
             html.Div("Pedidos Recentes", className="chart-title"),
-            dash_table.DataTable(
-                data=recent_orders.to_dict('records'),
-                columns=[{"name": i, "id": i} for i in recent_orders.columns],
+            server_side_table(
+                "orders-table",
+                page_size=10,
                 style_cell={
                     'backgroundColor': '#1e293b',
                     'color': '#ffffff',
@@ -1202,7 +1301,6 @@ def create_data_table_html():
                 style_data={
                     'border': '1px solid #475569'
                 },
-                page_size=10,
                 style_table={'overflowX': 'auto'}
             )
         ], className="chart-container")
@@ -1225,8 +1323,9 @@ def perform_ai_analysis(prompt, data):
     except Exception as e:
         return html.Div(f"Erro na análise: {str(e)}", style={"color": "#ef4444"})
 
-# Definir layout
+# Definir layout (estático, revalidado com ETag); cada página cria sua sessão no navegador
 app.layout = create_layout()
+register_session_id_callback(app)
 
 # Executar aplicação
 if __name__ == "__main__":
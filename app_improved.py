@@ -14,6 +14,9 @@ import time
 from config import Config
 from src.data_loader import data_loader
 from src.chart_generator import chart_generator
+from src.cache_keys import dataset_version
+from src.export_service import export_service
+from src.table_backend import st_paginated_dataframe
 from src.api_client import api_client, api_cache
 from src.openai_client import openai_client
 from src.validators import DataValidator, SecurityValidator
@@ -23,6 +26,8 @@ class DataGPTApp:
     
     def __init__(self):
         self.config = Config()
+        self.filter_state = {}
+        self.dataset_key = None
         self.setup_page_config()
         self.setup_sidebar_styles()
     
@@ -101,10 +106,13 @@ class DataGPTApp:
                 
                 # Limpar dados
                 data = data_loader.clean_data(data)
+                # Os dados são recarregados a cada execução: a chave dos caches acompanha o conteúdo
+                self.dataset_key = f"{google_drive_link}@{dataset_version(data)}"
                 
                 st.success(f"✅ Dados carregados com sucesso! ({len(data)} linhas, {len(data.columns)} colunas)")
                 st.write("**Dados Carregados:**")
-                st.dataframe(data, use_container_width=True)
+                st_paginated_dataframe(data, key="dados-carregados", dataset_key=self.dataset_key,
+                                       use_container_width=True)
                 
                 return True, data, None
                 
@@ -127,7 +135,12 @@ class DataGPTApp:
                     default=unique_values,
                     key=f"filter_{column}"
                 )
-                filters[column] = selected_values
+                # Apenas seleções diferentes do padrão (todos os valores) filtram
+                if len(selected_values) != len(unique_values):
+                    filters[column] = selected_values
+        
+        # Estado dos filtros usado como chave dos caches de gráficos
+        self.filter_state = filters
         
         # Aplicar filtros
         filtered_data = data.copy()
@@ -227,7 +240,8 @@ class DataGPTApp:
             if chart_config["chart_type"] in ['Linha', 'Barra', 'Dispersão', 'Áreas']:
                 st.plotly_chart(fig, use_container_width=True)
             else:
-                st.pyplot(fig)
+                # Gráficos Matplotlib chegam renderizados como bytes da imagem
+                st.image(fig, use_container_width=True)
             
             return True, fig, None
             
@@ -253,6 +267,35 @@ class DataGPTApp:
                     )
                 else:
                     st.error(f"Erro ao preparar download: {error}")
+            else:
+                # Gráficos Matplotlib: exportação como imagem estática
+                image_format = st.selectbox(
+                    "Formato da imagem",
+                    options=['png', 'svg', 'pdf'],
+                    help="Formato do arquivo do gráfico"
+                )
+                if image_format == 'png':
+                    success, image_bytes, error = True, fig, None
+                else:
+                    success, image_bytes, error = export_service.export_chart(
+                        data,
+                        chart_config["x_axis_col"],
+                        chart_config["y_axis_col"],
+                        chart_config["chart_type"],
+                        chart_config,
+                        image_format=image_format
+                    )
+                if success:
+                    mime_types = {'png': 'image/png', 'svg': 'image/svg+xml', 'pdf': 'application/pdf'}
+                    st.download_button(
+                        label=f"📊 Baixar Gráfico como {image_format.upper()}",
+                        data=image_bytes,
+                        file_name=f'grafico.{image_format}',
+                        mime=mime_types[image_format],
+                        help="Baixa o gráfico como imagem estática"
+                    )
+                else:
+                    st.error(f"Erro ao preparar download: {error}")
         
         with col2:
             # Download dos dados como CSV
@@ -374,6 +417,8 @@ class DataGPTApp:
             
             # Configurar gráfico
             chart_config = self.render_chart_config(filtered_data)
+            chart_config["dataset_key"] = self.dataset_key
+            chart_config["filter_state"] = self.filter_state
             
             # Gerar e exibir gráfico
             if chart_config["x_axis_col"] and chart_config["y_axis_col"]:
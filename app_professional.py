@@ -18,6 +18,7 @@ from src.chart_generator import chart_generator
 from src.api_client import api_client, api_cache
 from src.openai_client import openai_client
 from src.validators import DataValidator, SecurityValidator
+from src.plotly_theme import apply_theme
 
 class ProfessionalDashboard:
     """Dashboard profissional do Lucrax.ai"""
@@ -891,32 +892,14 @@ class ProfessionalDashboard:
                 marker_line_color='#1e40af'
             )
         
-        # Personalizar layout harmonizado
-        fig.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='white'),
-            title_font=dict(size=14, color='white'),
-            margin=dict(l=60, r=60, t=60, b=60),
+        # Tema compartilhado com ajustes para a grade harmonizada
+        apply_theme(
+            fig,
+            title_font_size=14,
+            margin=dict(t=60),
             height=400,  # Altura fixa para harmonização
-            xaxis=dict(
-                gridcolor='#374151',
-                linecolor='#6b7280',
-                tickfont_color='#9ca3af',
-                tickfont_size=11,
-                title_font_size=12
-            ),
-            yaxis=dict(
-                gridcolor='#374151',
-                linecolor='#6b7280',
-                tickfont_color='#9ca3af',
-                tickfont_size=11,
-                title_font_size=12
-            ),
-            legend=dict(
-                bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white')
-            ),
+            xaxis=dict(tickfont_size=11, title_font_size=12),
+            yaxis=dict(tickfont_size=11, title_font_size=12),
             showlegend=False
         )
         
@@ -1062,12 +1045,7 @@ class ProfessionalDashboard:
                 title='Vendas por Região',
                 color_discrete_sequence=['#3b82f6']
             )
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white'),
-                title_font=dict(size=18, color='white')
-            )
+            apply_theme(fig, title_font_size=18)
             st.plotly_chart(fig, use_container_width=True)
 
 # Executar o dashboard
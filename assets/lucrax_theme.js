@@ -0,0 +1,13 @@
+// Gerado por src/plotly_theme.py (theme_asset_source). Não editar manualmente.
+window.LUCRAX_PLOTLY_TEMPLATE = {"layout": {"font": {"color": "white", "size": 12}, "legend": {"bgcolor": "rgba(0,0,0,0)", "font": {"color": "white"}}, "margin": {"b": 60, "l": 60, "r": 60, "t": 80}, "paper_bgcolor": "rgba(0,0,0,0)", "plot_bgcolor": "rgba(0,0,0,0)", "title": {"font": {"color": "white", "size": 16}}, "xaxis": {"gridcolor": "#374151", "linecolor": "#6b7280", "tickfont": {"color": "#9ca3af"}, "title": {"font": {"color": "#ffffff"}}}, "yaxis": {"gridcolor": "#374151", "linecolor": "#6b7280", "tickfont": {"color": "#9ca3af"}, "title": {"font": {"color": "#ffffff"}}}}};
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    lucrax_theme: {
+        apply: function(figure) {
+            if (!figure) {
+                return window.dash_clientside.no_update;
+            }
+            var layout = Object.assign({}, figure.layout, {template: window.LUCRAX_PLOTLY_TEMPLATE});
+            return Object.assign({}, figure, {layout: layout});
+        }
+    }
+});
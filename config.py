@@ -44,6 +44,84 @@ class Config:
         'Boxplot', 'Heatmap', 'Áreas', 'Violino'
     ]
     
+    # Configurações de renderização Matplotlib ('process' ou 'thread')
+    RENDER_BACKEND: str = os.getenv("RENDER_BACKEND", "process")
+    RENDER_MAX_WORKERS: int = int(os.getenv("RENDER_MAX_WORKERS", "2"))
+    RENDER_MAX_TASKS_PER_CHILD: int = int(os.getenv("RENDER_MAX_TASKS_PER_CHILD", "200"))
+    RENDER_TIMEOUT_SECONDS: float = float(os.getenv("RENDER_TIMEOUT_SECONDS", "60"))
+    
+    # Exportação HTML: plotly.js via 'cdn', arquivo 'local' compartilhado ou 'inline' (uma vez por arquivo)
+    HTML_EXPORT_ASSET_MODE: str = os.getenv("HTML_EXPORT_ASSET_MODE", "cdn")
+    HTML_EXPORT_PLOTLYJS_URL: str = os.getenv("HTML_EXPORT_PLOTLYJS_URL", "plotly.min.js")
+    
+    # Exportação de imagens em lote (PNG/SVG/PDF)
+    EXPORT_MAX_WORKERS: int = int(os.getenv("EXPORT_MAX_WORKERS", "4"))
+    EXPORT_CACHE_MAX_MB: int = int(os.getenv("EXPORT_CACHE_MAX_MB", "64"))
+    
+    # Armazenamento de sessões dos dashboards Dash ('memory', 'disk' ou 'shared'; tarefas em
+    # segundo plano exigem 'disk' ou 'shared')
+    SESSION_STORE_BACKEND: str = os.getenv("SESSION_STORE_BACKEND", "disk")
+    SESSION_STORE_MAX_MB: int = int(os.getenv("SESSION_STORE_MAX_MB", "512"))
+    SESSION_STORE_DISK_PATH: str = os.getenv("SESSION_STORE_DISK_PATH", "/tmp/lucrax_session_store")
+    # Orçamento próprio do estado das sessões (datasets não descartam sessões)
+    SESSION_STATE_MAX_MB: int = int(os.getenv("SESSION_STATE_MAX_MB", "64"))
+    # Validade (segundos sem uso) do estado das sessões gravado pelo backend 'shared'
+    SESSION_STATE_TTL: int = int(os.getenv("SESSION_STATE_TTL", "86400"))
+    
+    # Registro de datasets em memória compartilhada entre workers (snapshots Arrow)
+    DATASET_REGISTRY_PATH: str = os.getenv("DATASET_REGISTRY_PATH", "/dev/shm/lucrax_datasets")
+    DATASET_REGISTRY_MAX_MB: int = int(os.getenv("DATASET_REGISTRY_MAX_MB", "2048"))
+    
+    # Filtros dos dashboards Dash (cache de máscaras e espera antes de aplicar a seleção)
+    FILTER_MASK_CACHE_MB: int = int(os.getenv("FILTER_MASK_CACHE_MB", "64"))
+    FILTER_DEBOUNCE_MS: int = int(os.getenv("FILTER_DEBOUNCE_MS", "300"))
+    TABLE_SORT_CACHE_MB: int = int(os.getenv("TABLE_SORT_CACHE_MB", "64"))
+    
+    # Construção concorrente dos gráficos dos dashboards Dash
+    CHART_BUILD_MAX_WORKERS: int = int(os.getenv("CHART_BUILD_MAX_WORKERS", "4"))
+    CHART_BUILD_TIMEOUT: float = float(os.getenv("CHART_BUILD_TIMEOUT", "20"))
+    # Máximo de gráficos por requisição generate_charts da API
+    BATCH_CHARTS_MAX: int = int(os.getenv("BATCH_CHARTS_MAX", "20"))
+    
+    # Compressão e cache HTTP do servidor Flask dos apps Dash
+    RESPONSE_COMPRESSION_ENABLED: bool = os.getenv("RESPONSE_COMPRESSION_ENABLED", "True").lower() == "true"
+    RESPONSE_COMPRESS_MIN_BYTES: int = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+    RESPONSE_BROTLI_QUALITY: int = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+    RESPONSE_GZIP_LEVEL: int = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+    
+    # Cache quente das funções serverless (api/index.py)
+    WARM_CACHE_MAX_MB: int = int(os.getenv("WARM_CACHE_MAX_MB", "256"))
+    WARM_CACHE_TTL: int = int(os.getenv("WARM_CACHE_TTL", "600"))
+    WARM_CACHE_PERSIST: bool = os.getenv("WARM_CACHE_PERSIST", "False").lower() == "true"
+    WARM_CACHE_DIR: str = os.getenv("WARM_CACHE_DIR", "/tmp/lucrax_warm")
+    WARM_CACHE_DISK_MB: int = int(os.getenv("WARM_CACHE_DISK_MB", "256"))
+    
+    # Respostas em streaming de datasets (NDJSON / Arrow IPC)
+    STREAM_CHUNK_ROWS: int = int(os.getenv("STREAM_CHUNK_ROWS", "10000"))
+    # Maior chunk_rows aceito do cliente
+    STREAM_MAX_CHUNK_ROWS: int = int(os.getenv("STREAM_MAX_CHUNK_ROWS", "100000"))
+    
+    # Gravação em segundo plano (write-behind) no Supabase, em lotes por tabela
+    SUPABASE_WRITE_BEHIND: bool = os.getenv("SUPABASE_WRITE_BEHIND", "True").lower() == "true"
+    SUPABASE_BATCH_ROWS: int = int(os.getenv("SUPABASE_BATCH_ROWS", "50"))
+    SUPABASE_FLUSH_INTERVAL: float = float(os.getenv("SUPABASE_FLUSH_INTERVAL", "2"))
+    SUPABASE_QUEUE_MAX_ROWS: int = int(os.getenv("SUPABASE_QUEUE_MAX_ROWS", "5000"))
+    SUPABASE_MAX_RETRIES: int = int(os.getenv("SUPABASE_MAX_RETRIES", "3"))
+    SUPABASE_RETRY_BACKOFF: float = float(os.getenv("SUPABASE_RETRY_BACKOFF", "0.5"))
+    SUPABASE_FLUSH_TIMEOUT: float = float(os.getenv("SUPABASE_FLUSH_TIMEOUT", "5"))
+    # Antecedência (segundos) do prazo a partir da qual a invocação serverless espera a gravação
+    SUPABASE_FLUSH_MARGIN: float = float(os.getenv("SUPABASE_FLUSH_MARGIN", "0.5"))
+    # Linhas por bloco dos dados importados (armazenamento deduplicado por conteúdo)
+    IMPORT_CHUNK_ROWS: int = int(os.getenv("IMPORT_CHUNK_ROWS", "2000"))
+    # Validade (segundos) do cache de identificadores das fontes de dados
+    DATA_SOURCE_CACHE_TTL: int = int(os.getenv("DATA_SOURCE_CACHE_TTL", "60"))
+    
+    # Tarefas longas dos apps Dash em segundo plano (carregamento e análise com IA)
+    BACKGROUND_JOBS_ENABLED: bool = os.getenv("BACKGROUND_JOBS_ENABLED", "True").lower() == "true"
+    BACKGROUND_JOBS_PATH: str = os.getenv("BACKGROUND_JOBS_PATH", "/tmp/lucrax_jobs")
+    BACKGROUND_JOBS_MAX_WORKERS: int = int(os.getenv("BACKGROUND_JOBS_MAX_WORKERS", "2"))
+    BACKGROUND_JOBS_CACHE_EXPIRE: int = int(os.getenv("BACKGROUND_JOBS_CACHE_EXPIRE", "3600"))
+    
     # Configurações de templates
     REPORT_TEMPLATES: list = ["Template 1", "Template 2"]
     
@@ -0,0 +1,33 @@
+-- Armazenamento em blocos, endereçado por conteúdo, dos dados importados
+-- O dataset deixa de ser gravado inteiro na coluna JSONB imported_data.data:
+-- as linhas são divididas em blocos de tamanho fixo (Parquet em base64),
+-- identificados pelo hash do conteúdo, e cada importação guarda apenas a
+-- lista ordenada de hashes. Blocos iguais são gravados uma única vez.
+
+-- Blocos de linhas, compartilhados entre importações
+CREATE TABLE IF NOT EXISTS public.imported_data_chunks (
+    content_hash TEXT PRIMARY KEY,
+    encoding TEXT NOT NULL CHECK (encoding IN ('parquet', 'json.gz')),
+    payload TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    byte_size INTEGER NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Importações passam a referenciar os blocos (linhas antigas mantêm o JSONB)
+ALTER TABLE public.imported_data ALTER COLUMN data DROP NOT NULL;
+ALTER TABLE public.imported_data ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE public.imported_data ADD COLUMN IF NOT EXISTS chunk_hashes TEXT[];
+
+-- Uma importação com o mesmo conteúdo é encontrada pelo hash do dataset
+CREATE INDEX IF NOT EXISTS idx_imported_data_content_hash ON public.imported_data(content_hash);
+
+ALTER TABLE public.imported_data_chunks ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow all operations on imported_data_chunks" ON public.imported_data_chunks FOR ALL USING (true);
+
+-- Verificar as colunas novas
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_schema = 'public'
+AND table_name IN ('imported_data', 'imported_data_chunks')
+ORDER BY table_name, ordinal_position;
@@ -0,0 +1,76 @@
+-- Deduplicação das fontes de dados por URL normalizada
+-- Cada carga de planilha criava uma nova linha em data_sources. A partir
+-- desta migração a aplicação faz upsert pela URL normalizada
+-- (DataValidator.normalize_source_url), garantido por um índice único. As
+-- duplicatas existentes são unificadas na linha mais antiga; análises e dados
+-- importados passam a apontar para ela antes da remoção das demais (a remoção
+-- direta apagaria esses registros em cascata).
+
+BEGIN;
+
+ALTER TABLE public.data_sources ADD COLUMN IF NOT EXISTS normalized_url TEXT;
+
+-- Mesma regra de DataValidator.normalize_source_url (conferida em tests/test_data_sources.py):
+-- planilhas do Google Sheets viram https://docs.google.com/spreadsheets/d/<id>; as demais URLs
+-- só perdem caracteres de controle, espaços nas pontas, o fragmento e a barra final
+CREATE OR REPLACE FUNCTION public.normalize_source_url(url TEXT) RETURNS TEXT
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE
+        WHEN sheet_id IS NOT NULL THEN 'https://docs.google.com/spreadsheets/d/' || sheet_id
+        ELSE regexp_replace(split_part(cleaned, '#', 1), '/+$', '')
+    END
+    FROM (
+        SELECT cleaned,
+               (regexp_match(cleaned, '^(?:https?://)?docs\.google\.com/spreadsheets/d/([A-Za-z0-9_-]+)', 'i'))[1] AS sheet_id
+        FROM (SELECT btrim(regexp_replace(coalesce(url, ''), '[\x01-\x1f\x7f-\x9f]', '', 'g'), ' ') AS cleaned) AS c
+    ) AS s
+$$;
+
+UPDATE public.data_sources
+SET normalized_url = public.normalize_source_url(url)
+WHERE normalized_url IS NULL;
+
+-- Linha mantida por URL: a mais antiga, com a data de atualização mais recente do grupo
+CREATE TEMP TABLE data_source_duplicates ON COMMIT DROP AS
+SELECT id,
+       first_value(id) OVER (PARTITION BY normalized_url ORDER BY created_at, id) AS keep_id,
+       max(updated_at) OVER (PARTITION BY normalized_url) AS last_updated_at,
+       bool_or(is_active) OVER (PARTITION BY normalized_url) AS any_active
+FROM public.data_sources;
+
+UPDATE public.data_analyses a
+SET data_source_id = d.keep_id
+FROM data_source_duplicates d
+WHERE a.data_source_id = d.id AND d.id <> d.keep_id;
+
+UPDATE public.imported_data i
+SET data_source_id = d.keep_id
+FROM data_source_duplicates d
+WHERE i.data_source_id = d.id AND d.id <> d.keep_id;
+
+UPDATE public.data_sources s
+SET updated_at = d.last_updated_at, is_active = d.any_active
+FROM data_source_duplicates d
+WHERE s.id = d.id AND d.id = d.keep_id;
+
+DELETE FROM public.data_sources s
+USING data_source_duplicates d
+WHERE s.id = d.id AND d.id <> d.keep_id;
+
+ALTER TABLE public.data_sources ALTER COLUMN normalized_url SET NOT NULL;
+
+-- Alvo do upsert (on_conflict=normalized_url)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_data_sources_normalized_url
+    ON public.data_sources(normalized_url);
+
+-- Fonte mais recente e paginação por chave (updated_at, id) sem ler a tabela inteira
+CREATE INDEX IF NOT EXISTS idx_data_sources_active_updated_at
+    ON public.data_sources(updated_at DESC, id DESC) WHERE is_active;
+
+COMMIT;
+
+-- Verificar que não restaram duplicatas
+SELECT normalized_url, count(*)
+FROM public.data_sources
+GROUP BY normalized_url
+HAVING count(*) > 1;
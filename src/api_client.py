@@ -4,7 +4,6 @@ Cliente API melhorado para o dataGPT
 import requests
 import pandas as pd
 from typing import Dict, Any, Optional, Tuple
-import streamlit as st
 from config import Config
 from src.validators import SecurityValidator
 
@@ -0,0 +1,260 @@
+"""
+Execução de tarefas longas dos apps Dash em segundo plano
+
+Carregamento de planilhas e análise com IA rodam como callbacks em segundo
+plano do Dash (``DiskcacheManager``): cada tarefa é executada fora do worker
+web, o resultado volta por um cache em disco local e o worker web fica livre
+enquanto o navegador consulta o andamento. Resultados podem ser reaproveitados
+por hash das entradas.
+
+As tarefas entram em uma fila no próprio cache e são executadas por no máximo
+``Config.BACKGROUND_JOBS_MAX_WORKERS`` processos por host: um processo só é
+criado quando há vaga, e cada processo executa tarefas da fila até esvaziá-la.
+Sem espera ativa: vagas de processos encerrados (ex.: tarefa cancelada) são
+recuperadas quando uma tarefa é enfileirada ou consultada.
+
+Os processos das tarefas só enxergam o estado gravado pelo armazenamento de
+sessões em disco ou em memória compartilhada ('disk', o padrão, ou 'shared').
+Com as tarefas habilitadas e o backend 'memory' a aplicação não inicia; sem
+as dependências os callbacks rodam na própria requisição.
+"""
+import os
+import logging
+from typing import Any, Callable, List, Optional
+from config import Config
+
+try:
+    import diskcache
+    import psutil
+    from dash import DiskcacheManager
+    # Exigido pelo DiskcacheManager para iniciar os processos das tarefas
+    import multiprocess  # noqa: F401
+    BACKGROUND_JOBS_AVAILABLE = True
+except ImportError:
+    BACKGROUND_JOBS_AVAILABLE = False
+    DiskcacheManager = object
+
+_SLOTS_KEY = 'lucrax:job-slots'
+_SEQUENCE_KEY = 'lucrax:job-sequence'
+_QUEUE_PREFIX = 'lucrax-jobs'
+_JOB_PREFIX = 'lucrax:job:'
+_CACHE_NAMESPACE = 'lucrax'
+
+# Estado de uma tarefa ainda na fila (em execução: PID do processo e chave do resultado)
+_PENDING = 'pending'
+
+
+def _alive(pid: int) -> bool:
+    """Verifica se o processo existe e não terminou (zumbis contam como encerrados)"""
+    try:
+        return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return False
+
+
+class BoundedDiskcacheManager(DiskcacheManager):
+    """DiskcacheManager com fila de tarefas e número máximo de processos por host"""
+
+    def __init__(self, cache, max_jobs: int, cache_by: Optional[List[Callable[[], Any]]] = None,
+                 expire: Optional[int] = None):
+        super().__init__(cache, cache_by=cache_by, expire=expire)
+        self.max_jobs = max_jobs
+
+    def _live_slots(self) -> list:
+        """PIDs dos processos de tarefas ainda vivos (chamar dentro de uma transação)"""
+        slots = [pid for pid in self.handle.get(_SLOTS_KEY, []) if _alive(pid)]
+        self.handle.set(_SLOTS_KEY, slots)
+        return slots
+
+    def _start_worker(self) -> int:
+        """Inicia um processo que executa tarefas da fila até esvaziá-la"""
+        from multiprocess import Process
+
+        process = Process(target=self._drain, daemon=False)
+        process.start()
+        return process.pid
+
+    def _spawn_if_free(self) -> None:
+        """Cria um processo se há tarefas na fila e vaga livre"""
+        with self.handle.transact(retry=True):
+            slots = self._live_slots()
+            if len(slots) >= self.max_jobs or self.handle.peek(prefix=_QUEUE_PREFIX, default=None) is None:
+                return
+            self.handle.set(_SLOTS_KEY, slots + [self._start_worker()])
+
+    def _background_key(self, job_fn: Callable) -> str:
+        for background_key, registered in self.func_registry.items():
+            if registered is job_fn:
+                return background_key
+        raise KeyError("Callback em segundo plano não registrado")
+
+    def call_job_fn(self, key, job_fn, args, context):
+        """Enfileira a tarefa e retorna seu identificador (não cria processo sem vaga)"""
+        job_id = self.handle.incr(_SEQUENCE_KEY)
+        self.handle.set(f'{_JOB_PREFIX}{job_id}', _PENDING)
+        self.handle.push((job_id, key, self._background_key(job_fn), args, dict(context)),
+                         prefix=_QUEUE_PREFIX)
+        self._spawn_if_free()
+        return job_id
+
+    def _next_job(self) -> Optional[tuple]:
+        """Retira a próxima tarefa; sem tarefas, libera a vaga deste processo"""
+        pid = os.getpid()
+        while True:
+            with self.handle.transact(retry=True):
+                _, job = self.handle.pull(prefix=_QUEUE_PREFIX, default=(None, None))
+                if job is None:
+                    self.handle.set(_SLOTS_KEY, [p for p in self.handle.get(_SLOTS_KEY, []) if p != pid])
+                    return None
+                state_key = f'{_JOB_PREFIX}{job[0]}'
+                # Tarefas canceladas enquanto aguardavam não têm mais estado
+                if self.handle.get(state_key) == _PENDING:
+                    self.handle.set(state_key, (pid, job[1]))
+                    return job
+
+    def _drain(self) -> None:
+        """Executa tarefas da fila neste processo até esvaziá-la"""
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            job_id, key, background_key, args, context = job
+            try:
+                self.func_registry[background_key](key, self._make_progress_key(key), args, context)
+            except Exception as e:
+                logging.error(f"Erro na tarefa em segundo plano {job_id}: {e}")
+            finally:
+                self.handle.delete(f'{_JOB_PREFIX}{job_id}')
+
+    def job_running(self, job):
+        if job is None:
+            return False
+        state = self.handle.get(f'{_JOB_PREFIX}{int(job)}')
+        if state == _PENDING:
+            # A consulta do navegador também repõe processos encerrados
+            self._spawn_if_free()
+            return True
+        return isinstance(state, tuple) and _alive(state[0])
+
+    def terminate_unhealthy_job(self, job):
+        state_key = f'{_JOB_PREFIX}{int(job)}'
+        state = self.handle.get(state_key)
+        if isinstance(state, tuple) and not _alive(state[0]):
+            self.handle.delete(state_key)
+            return True
+        return False
+
+    def terminate_job(self, job):
+        """Cancela a tarefa: retira da fila ou encerra o processo que a executa"""
+        if job is None:
+            return
+        state_key = f'{_JOB_PREFIX}{int(job)}'
+        with self.handle.transact(retry=True):
+            state = self.handle.get(state_key)
+            self.handle.delete(state_key)
+        # O Dash também encerra a tarefa após ler o resultado: o processo segue com a fila
+        if not isinstance(state, tuple) or self.handle.get(state[1]) is not None or not _alive(state[0]):
+            return
+
+        try:
+            process = psutil.Process(state[0])
+            children = process.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return
+        for child in children:
+            try:
+                child.kill()
+            except psutil.NoSuchProcess:
+                pass
+        try:
+            process.kill()
+            process.wait(1)
+        except (psutil.NoSuchProcess, psutil.TimeoutExpired):
+            pass
+        # As demais tarefas da fila seguem em um novo processo
+        self._spawn_if_free()
+
+
+def create_background_managers():
+    """
+    Cria os gerenciadores de tarefas em segundo plano
+
+    Returns:
+        Tuple: (gerenciador sem cache, gerenciador com cache de resultados por
+        hash das entradas), ou (None, None) se as tarefas devem rodar na requisição
+    """
+    if not Config.BACKGROUND_JOBS_ENABLED:
+        return None, None
+    if not BACKGROUND_JOBS_AVAILABLE:
+        logging.warning("Dependências de tarefas em segundo plano não disponíveis. "
+                        "Instale com: pip install \"dash[diskcache]\"")
+        return None, None
+    if Config.SESSION_STORE_BACKEND not in ('disk', 'shared'):
+        # Com sessões em memória os processos das tarefas não veriam o estado das sessões
+        raise RuntimeError("Tarefas em segundo plano exigem SESSION_STORE_BACKEND 'disk' ou 'shared' "
+                           f"(atual: '{Config.SESSION_STORE_BACKEND}'); use BACKGROUND_JOBS_ENABLED=False "
+                           "para executá-las na própria requisição")
+
+    cache = diskcache.Cache(Config.BACKGROUND_JOBS_PATH)
+    max_jobs = Config.BACKGROUND_JOBS_MAX_WORKERS
+    return (
+        BoundedDiskcacheManager(cache, max_jobs),
+        # O Dash já inclui na chave o código do callback e as entradas; o namespace apenas habilita o cache
+        BoundedDiskcacheManager(cache, max_jobs, cache_by=[lambda: _CACHE_NAMESPACE],
+                                expire=Config.BACKGROUND_JOBS_CACHE_EXPIRE),
+    )
+
+
+def _no_progress(*_):
+    """set_progress usado quando o callback roda na própria requisição"""
+
+
+def background_callback(app, *dependencies, progress=None, running=None, cancel=None,
+                        cache_results: bool = False, cache_args_to_ignore=None):
+    """
+    Registra um callback longo, em segundo plano quando disponível
+
+    A função decorada recebe ``set_progress`` como primeiro argumento nos dois
+    modos. Sem gerenciador, o callback roda na requisição: o progresso é
+    ignorado e as saídas de ``running`` que pertencem aos botões de
+    cancelamento não são usadas.
+
+    Args:
+        app: Aplicação Dash
+        *dependencies: Outputs, Inputs e States do callback
+        progress: Output(s) que exibem o andamento
+        running: Tuplas (Output, valor durante a execução, valor ao terminar)
+        cancel: Inputs que cancelam a tarefa em execução
+        cache_results: Reaproveita resultados por hash das entradas
+        cache_args_to_ignore: Índices dos argumentos fora da chave do cache
+
+    Returns:
+        Callable: Decorador
+    """
+    manager = background_managers[1] if cache_results else background_managers[0]
+    cancel = cancel or []
+
+    def decorator(fn):
+        if manager is not None:
+            return app.callback(
+                *dependencies, background=True, manager=manager, progress=progress,
+                running=running, cancel=cancel, cache_args_to_ignore=cache_args_to_ignore,
+                prevent_initial_call=True
+            )(fn)
+
+        cancel_ids = {c.component_id for c in cancel}
+        inline_running = [r for r in running or [] if r[0].component_id not in cancel_ids]
+
+        def inline(*args):
+            return fn(_no_progress, *args)
+
+        inline.__name__ = fn.__name__
+        inline.__doc__ = fn.__doc__
+        return app.callback(*dependencies, running=inline_running or None,
+                            prevent_initial_call=True)(inline)
+
+    return decorator
+
+
+# Instâncias globais dos gerenciadores (sem cache, com cache de resultados)
+background_managers = create_background_managers()
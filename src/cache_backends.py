@@ -0,0 +1,113 @@
+"""
+Backends de armazenamento chave-valor com orçamento de tamanho
+
+Usados pelo armazenamento de sessões dos apps Dash e pelo cache quente das
+funções serverless. O módulo não cria nenhuma instância: importá-lo não abre
+cache em disco, e o diskcache só é importado ao criar um DiskCacheBackend.
+"""
+import sys
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+import pandas as pd
+from src.lazy_imports import is_available
+
+DISKCACHE_AVAILABLE = is_available('diskcache')
+
+
+def estimate_size(value: Any) -> int:
+    """Estima o tamanho em bytes de um valor armazenado"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class InMemoryBackend:
+    """Backend no próprio processo com orçamento de memória e descarte LRU"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key][0]
+
+    def set(self, key: str, value: Any) -> None:
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._items:
+                self._total_bytes -= self._items.pop(key)[1]
+            self._items[key] = (value, size)
+            self._total_bytes += size
+            # Nunca descarta o item recém-gravado
+            while self._total_bytes > self.max_bytes and len(self._items) > 1:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self._total_bytes -= evicted_size
+
+    def update(self, key: str, fn: Callable[[Any], Any]) -> Any:
+        """Aplica fn ao valor atual e grava o resultado atomicamente (None não grava)"""
+        with self._lock:
+            value = fn(self.get(key))
+            if value is not None:
+                self.set(key, value)
+            return value
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._items:
+                self._total_bytes -= self._items.pop(key)[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._total_bytes = 0
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._items
+
+    @property
+    def total_bytes(self) -> int:
+        """Bytes ocupados atualmente"""
+        return self._total_bytes
+
+
+class DiskCacheBackend:
+    """Backend em disco local (diskcache), compartilhado entre workers do mesmo host"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        import diskcache
+
+        self.directory = directory
+        self._cache = diskcache.Cache(directory, size_limit=max_bytes,
+                                      eviction_policy='least-recently-used')
+
+    def get(self, key: str) -> Any:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self._cache.set(key, value)
+
+    def update(self, key: str, fn: Callable[[Any], Any]) -> Any:
+        """Aplica fn ao valor atual e grava o resultado em uma transação entre processos"""
+        with self._cache.transact(retry=True):
+            value = fn(self._cache.get(key))
+            if value is not None:
+                self._cache.set(key, value)
+            return value
+
+    def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
@@ -0,0 +1,64 @@
+"""
+Geração de chaves de cache estáveis para o dataGPT
+"""
+import json
+import hashlib
+from typing import Any, Optional
+
+
+def hash_payload(payload: Any) -> str:
+    """
+    Gera um hash estável para qualquer estrutura serializável em JSON
+
+    Args:
+        payload: Estrutura com dicionários, listas e valores simples
+
+    Returns:
+        str: Hash SHA-1 em hexadecimal
+    """
+    encoded = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+def make_filter_key(filters: Optional[dict]) -> str:
+    """
+    Gera a chave do estado de filtros, independente da ordem das seleções
+
+    Args:
+        filters: Dicionário coluna -> valores selecionados
+
+    Returns:
+        str: Chave do estado de filtros ('' quando não há filtros)
+    """
+    if not filters:
+        return ''
+
+    normalized = {
+        str(column): sorted((str(value) for value in values), key=str) if isinstance(values, (list, tuple, set)) else str(values)
+        for column, values in filters.items()
+    }
+    return hash_payload(normalized)
+
+
+def dataset_version(data) -> str:
+    """
+    Gera a versão de um DataFrame a partir do conteúdo (colunas, índice e valores)
+
+    Deve ser calculada uma vez por carga e reaproveitada como parte das chaves
+    de cache, em vez da URL de origem, que não muda quando a planilha é editada.
+
+    Args:
+        data: DataFrame carregado
+
+    Returns:
+        str: Hash do conteúdo em hexadecimal
+    """
+    import pandas as pd
+
+    digest = hashlib.sha1('\0'.join(str(column) for column in data.columns).encode('utf-8'))
+    try:
+        digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    except TypeError:
+        # Células não hasheáveis (listas, dicionários): usar a representação em JSON
+        digest.update(data.to_json(orient='split', date_format='iso', default_handler=str).encode('utf-8'))
+    return digest.hexdigest()
@@ -1,15 +1,91 @@
 """
 Gerador de gráficos melhorado para o dataGPT
 """
-import plotly.express as px
+import plotly.graph_objects as go
 import plotly.io as pio
-import matplotlib.pyplot as plt
-import seaborn as sns
+import numpy as np
 import pandas as pd
-import io
-from typing import Dict, Any, Optional, Tuple
-import streamlit as st
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 from src.validators import DataValidator
+from src.lazy_imports import LazyModule
+from src.render_service import render_service
+from src.distribution_stats import compute_group_stats
+from src.histogram_engine import histogram_engine, DEFAULT_BINS
+from src.correlation_engine import correlation_engine
+from src.chart_scheduler import SharedAggregates
+import src.serialization  # noqa: F401 - registra o encoder JSON rápido do Plotly/Dash
+from src.html_export import figures_to_html_bytes
+
+# plotly.express só é importado ao gerar o primeiro gráfico
+px = LazyModule('plotly.express')
+
+
+# Funções de desenho executadas pelo serviço de renderização. Ficam no nível
+# do módulo para que possam ser enviadas aos processos worker.
+
+def _finish_axes(ax, title: str, x_label: Optional[str] = None, y_label: Optional[str] = None):
+    """Aplica título, rótulos e grade comuns aos gráficos Matplotlib"""
+    if x_label is not None:
+        ax.set_xlabel(x_label)
+    if y_label is not None:
+        ax.set_ylabel(y_label)
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+
+
+def _draw_histogram(fig, ax, counts, edges, color, show_totals, title, x_label, y_label):
+    """Desenha histograma a partir de contagens e bordas pré-calculadas"""
+    ax.hist(edges[:-1], bins=edges, weights=counts, color=color, alpha=0.7)
+    _finish_axes(ax, title, x_label, y_label)
+    
+    # Adicionar totais se solicitado
+    if show_totals:
+        for i, count in enumerate(counts):
+            if count > 0:
+                ax.text(edges[i] + (edges[i+1] - edges[i])/2, count + 0.1, 
+                       str(int(count)), ha='center', va='bottom')
+
+
+def _draw_boxplot(fig, ax, group_stats, color, title, x_label, y_label):
+    """Desenha boxplot a partir de estatísticas pré-calculadas por grupo"""
+    ax.bxp(group_stats, patch_artist=True,
+           boxprops={'facecolor': color, 'alpha': 0.7},
+           medianprops={'color': 'black'},
+           flierprops={'marker': 'o', 'markersize': 3, 'alpha': 0.5})
+    _finish_axes(ax, title, x_label, y_label)
+
+
+def _draw_heatmap(fig, ax, corr_matrix, title, x_label=None, y_label=None):
+    """Desenha heatmap de correlação"""
+    import seaborn as sns
+    sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', ax=ax)
+    _finish_axes(ax, title)
+
+
+def _draw_violin(fig, ax, group_stats, color, title, x_label, y_label):
+    """Desenha gráfico de violino a partir da KDE binada de cada grupo"""
+    vpstats = [{
+        'coords': stats['kde_coords'],
+        'vals': stats['kde_vals'],
+        'mean': stats['mean'],
+        'median': stats['med'],
+        'min': stats['min'],
+        'max': stats['max'],
+    } for stats in group_stats]
+    positions = list(range(1, len(vpstats) + 1))
+    
+    parts = ax.violin(vpstats, positions=positions, widths=0.7, showmedians=True)
+    for body in parts['bodies']:
+        body.set_facecolor(color)
+        body.set_alpha(0.7)
+    
+    # Quartis como caixa estreita, no estilo do Seaborn
+    ax.vlines(positions, [s['q1'] for s in group_stats], [s['q3'] for s in group_stats],
+              color='black', linewidth=4)
+    ax.set_xticks(positions)
+    ax.set_xticklabels([s['label'] for s in group_stats])
+    _finish_axes(ax, title, x_label, y_label)
+
 
 class ChartGenerator:
     """Classe para geração de gráficos com validação e tratamento de erros"""
@@ -18,7 +94,8 @@ class ChartGenerator:
         self.supported_types = ['Linha', 'Barra', 'Dispersão', 'Histograma', 'Boxplot', 'Heatmap', 'Áreas', 'Violino', 'Bar', 'Line', 'Scatter', 'Pie', 'Area']
     
     def generate_chart(self, data: pd.DataFrame, x_col: str, y_col: str, 
-                      chart_type: str, chart_config: Dict[str, Any]) -> Tuple[bool, Optional[Any], Optional[str]]:
+                      chart_type: str, chart_config: Dict[str, Any],
+                      aggregates: Optional[SharedAggregates] = None) -> Tuple[bool, Optional[Any], Optional[str]]:
         """
         Gera gráfico com base nos parâmetros fornecidos
         
@@ -28,9 +105,12 @@ class ChartGenerator:
             y_col: Coluna para eixo Y
             chart_type: Tipo de gráfico
             chart_config: Configurações do gráfico
+            aggregates: Agregados compartilhados entre gráficos do mesmo lote
+                (contagens, estatísticas por grupo, histogramas e correlações)
             
         Returns:
             Tuple[bool, Optional[Any], Optional[str]]: (success, figure, error_message)
+            Para tipos Matplotlib a figura é retornada como bytes da imagem renderizada
         """
         try:
             # Validar entrada
@@ -44,15 +124,20 @@ class ChartGenerator:
             
             # Gerar gráfico baseado no tipo
             if chart_type in ['Linha', 'Barra', 'Dispersão', 'Áreas', 'Bar', 'Line', 'Scatter', 'Area', 'Pie']:
-                return self._generate_plotly_chart(data, x_col, y_col, chart_type, chart_config)
+                return self._generate_plotly_chart(data, x_col, y_col, chart_type, chart_config, aggregates)
+            elif chart_type == 'Boxplot' and chart_config.get('engine') == 'plotly':
+                return self.generate_plotly_boxplot(data, x_col, y_col, chart_config, aggregates)
+            elif chart_type == 'Histograma' and chart_config.get('engine') == 'plotly':
+                return self.generate_plotly_histogram(data, y_col, chart_config, aggregates)
             else:
-                return self._generate_matplotlib_chart(data, x_col, y_col, chart_type, chart_config)
+                return self._generate_matplotlib_chart(data, x_col, y_col, chart_type, chart_config, aggregates)
                 
         except Exception as e:
             return False, None, f"Erro ao gerar gráfico: {str(e)}"
     
     def _generate_plotly_chart(self, data: pd.DataFrame, x_col: str, y_col: str, 
-                              chart_type: str, config: Dict[str, Any]) -> Tuple[bool, Optional[Any], Optional[str]]:
+                              chart_type: str, config: Dict[str, Any],
+                              aggregates: Optional[SharedAggregates] = None) -> Tuple[bool, Optional[Any], Optional[str]]:
         """Gera gráfico usando Plotly"""
         try:
             # Configurações padrão
@@ -81,7 +166,8 @@ class ChartGenerator:
                             color_discrete_sequence=[color])
             elif chart_type == 'Pie':
                 # Para gráfico de pizza, usar contagem de valores únicos
-                value_counts = data[x_col].value_counts().head(10)
+                value_counts = self._shared(aggregates, ('value_counts', x_col),
+                                            lambda: data[x_col].value_counts().head(10))
                 fig = px.pie(
                     values=value_counts.values,
                     names=value_counts.index,
@@ -111,8 +197,9 @@ class ChartGenerator:
             return False, None, f"Erro ao gerar gráfico Plotly: {str(e)}"
     
     def _generate_matplotlib_chart(self, data: pd.DataFrame, x_col: str, y_col: str, 
-                                 chart_type: str, config: Dict[str, Any]) -> Tuple[bool, Optional[Any], Optional[str]]:
-        """Gera gráfico usando Matplotlib/Seaborn"""
+                                 chart_type: str, config: Dict[str, Any],
+                                 aggregates: Optional[SharedAggregates] = None) -> Tuple[bool, Optional[bytes], Optional[str]]:
+        """Gera gráfico usando Matplotlib/Seaborn no serviço de renderização e retorna os bytes da imagem"""
         try:
             # Configurações padrão
             title = config.get('title', f'Gráfico de {x_col} vs {y_col}')
@@ -120,71 +207,210 @@ class ChartGenerator:
             y_label = config.get('y_axis_label', y_col)
             color = config.get('color', '#1f77b4')
             show_totals = config.get('show_totals', False)
+            image_format = config.get('image_format', 'png')
             
-            # Configurar estilo
-            plt.style.use('default')
-            fig, ax = plt.subplots(figsize=(10, 6))
+            draw_kwargs = {'title': title, 'x_label': x_label, 'y_label': y_label}
             
-            # Gerar gráfico baseado no tipo
+            # Preparar apenas os dados necessários para o worker
             if chart_type == 'Histograma':
-                ax.hist(data[y_col].dropna(), bins=30, color=color, alpha=0.7)
-                ax.set_xlabel(x_label)
-                ax.set_ylabel(y_label)
+                draw_func = _draw_histogram
+                counts, edges = self._get_histogram(data, y_col, config, aggregates)
+                draw_kwargs.update(counts=counts, edges=edges, color=color, show_totals=show_totals)
                 
             elif chart_type == 'Boxplot':
-                sns.boxplot(x=data[x_col], y=data[y_col], ax=ax, color=color)
-                ax.set_xlabel(x_label)
-                ax.set_ylabel(y_label)
+                draw_func = _draw_boxplot
+                draw_kwargs.update(group_stats=self._group_stats(data, x_col, y_col, aggregates), color=color)
                 
             elif chart_type == 'Heatmap':
-                # Calcular correlação para heatmap
+                # Correlação a partir dos co-momentos em cache
                 numeric_data = data.select_dtypes(include=['number'])
                 if numeric_data.empty:
                     return False, None, "Nenhuma coluna numérica encontrada para heatmap"
                 
-                corr_matrix = numeric_data.corr()
-                sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', ax=ax)
+                draw_func = _draw_heatmap
+                corr_matrix = self._shared(aggregates, ('correlation',), lambda: correlation_engine.get_correlation(
+                    numeric_data,
+                    dataset_key=config.get('dataset_key'),
+                    filter_state=config.get('filter_state')
+                ))
+                draw_kwargs.update(corr_matrix=corr_matrix)
                 
             elif chart_type == 'Violino':
-                sns.violinplot(x=data[x_col], y=data[y_col], ax=ax, color=color)
-                ax.set_xlabel(x_label)
-                ax.set_ylabel(y_label)
+                draw_func = _draw_violin
+                draw_kwargs.update(group_stats=self._group_stats(data, x_col, y_col, aggregates), color=color)
                 
             else:
                 return False, None, f"Tipo de gráfico {chart_type} não suportado pelo Matplotlib"
             
-            # Configurações finais
-            ax.set_title(title, fontsize=14, fontweight='bold')
-            ax.grid(True, alpha=0.3)
+            success, image_bytes, error = render_service.render(
+                draw_func, image_format=image_format, **draw_kwargs
+            )
+            if not success:
+                return False, None, error
             
-            # Adicionar totais se solicitado
-            if show_totals and chart_type == 'Histograma':
-                counts, bins, patches = ax.hist(data[y_col].dropna(), bins=30, color=color, alpha=0.7)
-                for i, count in enumerate(counts):
-                    if count > 0:
-                        ax.text(bins[i] + (bins[i+1] - bins[i])/2, count + 0.1, 
-                               str(int(count)), ha='center', va='bottom')
-            
-            plt.tight_layout()
-            return True, fig, None
+            return True, image_bytes, None
             
         except Exception as e:
             return False, None, f"Erro ao gerar gráfico Matplotlib: {str(e)}"
     
-    def save_chart_as_html(self, fig) -> Tuple[bool, Optional[bytes], Optional[str]]:
+    @staticmethod
+    def _shared(aggregates: Optional[SharedAggregates], key: Tuple, compute):
+        """Calcula o agregado uma única vez por lote quando há agregados compartilhados"""
+        return aggregates.get(key, compute) if aggregates is not None else compute()
+    
+    def _group_stats(self, data: pd.DataFrame, x_col: str, y_col: str,
+                     aggregates: Optional[SharedAggregates] = None):
+        """Estatísticas por grupo (boxplot/violino), compartilhadas no lote"""
+        return self._shared(aggregates, ('group_stats', x_col, y_col),
+                            lambda: compute_group_stats(data, x_col, y_col))
+    
+    def _get_histogram(self, data: pd.DataFrame, column: str, config: Dict[str, Any],
+                       aggregates: Optional[SharedAggregates] = None):
+        """Obtém (counts, edges) do motor de histogramas, com cache por dataset e filtros"""
+        bins = config.get('bins', DEFAULT_BINS)
+        return self._shared(aggregates, ('histogram', column, bins), lambda: histogram_engine.get_histogram(
+            data[column],
+            bins=bins,
+            column=column,
+            dataset_key=config.get('dataset_key'),
+            filter_state=config.get('filter_state')
+        ))
+    
+    def generate_plotly_histogram(self, data: pd.DataFrame, column: str, config: Dict[str, Any],
+                                  aggregates: Optional[SharedAggregates] = None) -> Tuple[bool, Optional[Any], Optional[str]]:
+        """
+        Gera histograma Plotly a partir das contagens do motor de histogramas
+        
+        Args:
+            data: DataFrame com os dados
+            column: Coluna numérica
+            config: Configurações do gráfico
+            aggregates: Agregados compartilhados entre gráficos do mesmo lote
+            
+        Returns:
+            Tuple[bool, Optional[Any], Optional[str]]: (success, figure, error_message)
+        """
+        try:
+            counts, edges = self._get_histogram(data, column, config, aggregates)
+            show_totals = config.get('show_totals', False)
+            
+            fig = go.Figure(go.Bar(
+                x=(edges[:-1] + edges[1:]) / 2,
+                y=counts,
+                width=np.diff(edges),
+                marker_color=config.get('color', '#1f77b4'),
+                opacity=0.7,
+                text=counts if show_totals else None,
+                textposition='outside' if show_totals else None
+            ))
+            fig.update_layout(
+                title=config.get('title', f'Histograma de {column}'),
+                xaxis_title=config.get('x_axis_label', column),
+                yaxis_title=config.get('y_axis_label', 'Frequência'),
+                font=dict(size=12),
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                bargap=0
+            )
+            
+            return True, fig, None
+            
+        except Exception as e:
+            return False, None, f"Erro ao gerar histograma Plotly: {str(e)}"
+    
+    def generate_plotly_boxplot(self, data: pd.DataFrame, x_col: str, y_col: str, config: Dict[str, Any],
+                                aggregates: Optional[SharedAggregates] = None) -> Tuple[bool, Optional[Any], Optional[str]]:
+        """
+        Gera boxplot Plotly alimentado por quartis e cercas pré-calculados
+        
+        Args:
+            data: DataFrame com os dados
+            x_col: Coluna de agrupamento
+            y_col: Coluna numérica
+            config: Configurações do gráfico
+            aggregates: Agregados compartilhados entre gráficos do mesmo lote
+            
+        Returns:
+            Tuple[bool, Optional[Any], Optional[str]]: (success, figure, error_message)
+        """
+        try:
+            group_stats = self._group_stats(data, x_col, y_col, aggregates)
+            if not group_stats:
+                return False, None, f"Coluna Y '{y_col}' não possui valores numéricos"
+            
+            title = config.get('title', f'Gráfico de {x_col} vs {y_col}')
+            color = config.get('color', '#1f77b4')
+            labels = [stats['label'] for stats in group_stats]
+            
+            fig = go.Figure()
+            fig.add_trace(go.Box(
+                x=labels,
+                q1=[stats['q1'] for stats in group_stats],
+                median=[stats['med'] for stats in group_stats],
+                q3=[stats['q3'] for stats in group_stats],
+                lowerfence=[stats['whislo'] for stats in group_stats],
+                upperfence=[stats['whishi'] for stats in group_stats],
+                mean=[stats['mean'] for stats in group_stats],
+                name=y_col,
+                marker_color=color,
+                boxpoints=False
+            ))
+            
+            # Outliers amostrados como trace separado
+            outlier_x = [stats['label'] for stats in group_stats for _ in stats['fliers']]
+            outlier_y = [value for stats in group_stats for value in stats['fliers']]
+            if outlier_y:
+                fig.add_trace(go.Scatter(
+                    x=outlier_x, y=outlier_y, mode='markers', name='Outliers',
+                    marker=dict(color=color, size=4, opacity=0.6)
+                ))
+            
+            fig.update_layout(
+                title=title,
+                xaxis_title=config.get('x_axis_label', x_col),
+                yaxis_title=config.get('y_axis_label', y_col),
+                font=dict(size=12),
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                showlegend=False
+            )
+            
+            return True, fig, None
+            
+        except Exception as e:
+            return False, None, f"Erro ao gerar boxplot Plotly: {str(e)}"
+    
+    def save_chart_as_html(self, fig, asset_mode: Optional[str] = None) -> Tuple[bool, Optional[bytes], Optional[str]]:
         """
         Salva gráfico Plotly como HTML
         
         Args:
             fig: Figura do Plotly
+            asset_mode: Estratégia do plotly.js ('cdn', 'local' ou 'inline'); padrão da configuração
+            
+        Returns:
+            Tuple[bool, Optional[bytes], Optional[str]]: (success, html_bytes, error_message)
+        """
+        return self.save_charts_as_html_report([fig], asset_mode=asset_mode)
+    
+    def save_charts_as_html_report(self, figures: List[Any], titles: Optional[Sequence[str]] = None,
+                                   asset_mode: Optional[str] = None,
+                                   report_title: Optional[str] = None) -> Tuple[bool, Optional[bytes], Optional[str]]:
+        """
+        Salva vários gráficos Plotly em um único relatório HTML com o plotly.js incluído uma vez
+        
+        Args:
+            figures: Figuras do Plotly
+            titles: Títulos de cada gráfico (opcional)
+            asset_mode: Estratégia do plotly.js ('cdn', 'local' ou 'inline')
+            report_title: Título do relatório
             
         Returns:
             Tuple[bool, Optional[bytes], Optional[str]]: (success, html_bytes, error_message)
         """
         try:
-            buffer = io.StringIO()
-            pio.write_html(fig, buffer)
-            html_bytes = buffer.getvalue().encode('utf-8')
+            html_bytes = figures_to_html_bytes(figures, titles=titles, asset_mode=asset_mode,
+                                               report_title=report_title)
             return True, html_bytes, None
         except Exception as e:
             return False, None, f"Erro ao salvar gráfico como HTML: {str(e)}"
@@ -0,0 +1,212 @@
+"""
+Construção concorrente dos gráficos dos dashboards
+
+Os gráficos de um dashboard são independentes entre si e passam a maior
+parte do tempo em agrupamentos do pandas e operações do NumPy, que liberam o
+GIL. O agendador executa os construtores de um mesmo estado (dataset +
+filtros) em paralelo em um pool limitado de threads, uma única vez: o
+primeiro callback a pedir um gráfico dispara a construção de todos, e os
+demais apenas aguardam o resultado. Agregados intermediários (ex.: a mesma
+soma por categoria usada por dois gráficos) são calculados uma vez e
+compartilhados. Um gráfico lento ou com erro não bloqueia os outros: após o
+tempo limite o callback recebe um erro e exibe um substituto.
+
+Lotes sem estado (``run``, usado pela API) rodam em um pool próprio por
+requisição, fora do pool compartilhado dos dashboards. Uma thread em execução
+não pode ser interrompida: construtores que passam do tempo limite continuam
+até terminar, mas contam como abandonados e, acima de ``max_abandoned``,
+novos lotes são recusados em vez de acumular threads presas.
+"""
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from config import Config
+
+
+class SharedAggregates:
+    """Agregados intermediários calculados uma vez e compartilhados entre construtores"""
+
+    def __init__(self):
+        self._futures: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Retorna o agregado, calculando-o apenas na primeira chamada
+
+        Chamadas concorrentes para a mesma chave aguardam o primeiro cálculo.
+
+        Args:
+            key: Identificador do agregado
+            compute: Função que calcula o agregado
+
+        Returns:
+            Any: Valor do agregado
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._futures[key] = future
+
+        if owner:
+            try:
+                future.set_result(compute())
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+
+class ChartBuildScheduler:
+    """Pool limitado de threads que constrói os gráficos de cada estado uma única vez"""
+
+    def __init__(self, max_workers: Optional[int] = None, timeout: Optional[float] = None,
+                 max_builds: int = 8, max_abandoned: Optional[int] = None):
+        self.max_workers = max_workers or Config.CHART_BUILD_MAX_WORKERS
+        self.timeout = timeout or Config.CHART_BUILD_TIMEOUT
+        self.max_builds = max_builds
+        # Construtores de lotes ainda em execução após o tempo limite
+        self.max_abandoned = max_abandoned or self.max_workers * 2
+        self._abandoned = 0
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix='lucrax-charts')
+        self._builds = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, build_key: Hashable,
+               builders_factory: Callable[[], Dict[str, Callable[[], Any]]]) -> Dict[str, Future]:
+        """
+        Agenda a construção de todos os gráficos de um estado (se ainda não agendada)
+
+        Args:
+            build_key: Identificador do estado (ex.: dataset e chave de filtros)
+            builders_factory: Função que retorna {nome: construtor}; chamada apenas
+                quando o estado ainda não foi agendado
+
+        Returns:
+            Dict[str, Future]: Resultado futuro de cada gráfico
+        """
+        with self._lock:
+            futures = self._builds.get(build_key)
+            if futures is not None:
+                self._builds.move_to_end(build_key)
+                return futures
+
+            futures = {name: self._executor.submit(builder)
+                       for name, builder in builders_factory().items()}
+            self._builds[build_key] = futures
+            while len(self._builds) > self.max_builds:
+                self._builds.popitem(last=False)
+            return futures
+
+    def get_chart(self, build_key: Hashable, name: str,
+                  builders_factory: Callable[[], Dict[str, Callable[[], Any]]]) -> Tuple[bool, Any, Optional[str]]:
+        """
+        Retorna um gráfico do estado, aguardando no máximo o tempo limite
+
+        Args:
+            build_key: Identificador do estado
+            name: Nome do gráfico
+            builders_factory: Função que retorna {nome: construtor}
+
+        Returns:
+            Tuple[bool, Any, Optional[str]]: (success, figure, error_message)
+        """
+        futures = self.submit(build_key, builders_factory)
+        future = futures.get(name)
+        if future is None:
+            return False, None, f"Gráfico '{name}' não encontrado"
+
+        try:
+            return True, future.result(timeout=self.timeout), None
+        except TimeoutError:
+            logging.warning(f"Tempo esgotado ao gerar o gráfico '{name}'")
+            return False, None, f"Tempo esgotado ao gerar o gráfico '{name}'"
+        except Exception as e:
+            # Construção com erro não fica em cache: a próxima interação tenta de novo
+            with self._lock:
+                if self._builds.get(build_key) is futures:
+                    del self._builds[build_key]
+            logging.warning(f"Erro ao gerar o gráfico '{name}': {e}")
+            return False, None, f"Erro ao gerar o gráfico '{name}': {str(e)}"
+
+    def run(self, builders: Dict[str, Callable[[], Any]],
+            timeout: Optional[float] = None) -> Dict[str, Tuple[bool, Any, Optional[str]]]:
+        """
+        Executa um lote de construtores em paralelo, sem guardar o estado
+
+        O tempo limite vale para o lote inteiro: construtores que não terminam a
+        tempo são reportados com erro, sem atrasar os demais resultados. O lote
+        usa um pool próprio de até max_workers threads; construtores que ainda
+        não começaram quando o tempo acaba não são executados.
+
+        Args:
+            builders: Dicionário {nome: construtor}
+            timeout: Tempo limite do lote em segundos (padrão: o do agendador)
+
+        Returns:
+            Dict[str, Tuple[bool, Any, Optional[str]]]: (success, resultado, error_message) por nome
+        """
+        with self._lock:
+            abandoned = self._abandoned
+        if abandoned >= self.max_abandoned:
+            logging.warning(f"{abandoned} gráficos anteriores ainda em execução; lote recusado")
+            return {name: (False, None, "Servidor ocupado com gráficos anteriores, tente novamente")
+                    for name in builders}
+
+        expired = threading.Event()
+
+        def start(builder):
+            # Lote encerrado antes do início: não ocupa a thread
+            if expired.is_set():
+                raise TimeoutError()
+            return builder()
+
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(builders))),
+                                      thread_name_prefix='lucrax-chart-batch')
+        futures = {name: executor.submit(start, builder) for name, builder in builders.items()}
+        deadline = time.monotonic() + (timeout or self.timeout)
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = (True, future.result(timeout=max(0.0, deadline - time.monotonic())), None)
+            except TimeoutError:
+                expired.set()
+                if not future.cancel() and not future.done():
+                    self._abandon(future)
+                logging.warning(f"Tempo esgotado ao gerar o gráfico '{name}'")
+                results[name] = (False, None, f"Tempo esgotado ao gerar o gráfico '{name}'")
+            except Exception as e:
+                logging.warning(f"Erro ao gerar o gráfico '{name}': {e}")
+                results[name] = (False, None, f"Erro ao gerar o gráfico '{name}': {str(e)}")
+        executor.shutdown(wait=False, cancel_futures=True)
+        return results
+
+    def _abandon(self, future: Future) -> None:
+        """Conta um construtor em execução após o tempo limite até que ele termine"""
+        with self._lock:
+            self._abandoned += 1
+
+        def release(_):
+            with self._lock:
+                self._abandoned -= 1
+
+        future.add_done_callback(release)
+
+    def abandoned(self) -> int:
+        """Construtores de lotes ainda em execução após o tempo limite"""
+        with self._lock:
+            return self._abandoned
+
+    def clear(self) -> None:
+        """Descarta os estados agendados"""
+        with self._lock:
+            self._builds.clear()
+
+
+# Instância global do agendador de gráficos
+chart_scheduler = ChartBuildScheduler()
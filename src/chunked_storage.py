@@ -0,0 +1,283 @@
+"""
+Armazenamento em blocos, endereçado por conteúdo, dos dados importados
+
+Em vez de gravar o dataset inteiro como um único JSONB em
+``imported_data.data``, as linhas são divididas em blocos de
+``Config.IMPORT_CHUNK_ROWS`` linhas, codificados em Parquet (ou JSON com gzip
+sem pyarrow) e identificados pelo hash SHA-256 do conteúdo codificado. A
+importação guarda apenas a lista ordenada de hashes e o hash do dataset:
+
+- blocos iguais (ex.: as linhas iniciais de uma planilha que só recebeu novas
+  linhas no fim) são gravados uma única vez;
+- uma nova carga de uma fonte cujo conteúdo já foi importado para ela não
+  grava nenhuma importação.
+
+O leitor busca os blocos em grupos e os devolve como DataFrames, na ordem
+original, sem montar o dataset inteiro quando não é preciso. Requer a
+migração ``migrations/chunked_imported_data.sql``.
+"""
+import io
+import gzip
+import base64
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import pandas as pd
+from config import Config
+from src.lazy_imports import is_available
+from src.supabase_client import supabase_client
+
+PYARROW_AVAILABLE = is_available('pyarrow')
+
+# Codificação dos blocos gravados (a leitura aceita as duas)
+CHUNK_ENCODING = 'parquet' if PYARROW_AVAILABLE else 'json.gz'
+
+# Blocos por consulta na leitura (cada bloco pode ter centenas de KB)
+_READ_BATCH_CHUNKS = 20
+
+
+def encode_chunk(chunk: pd.DataFrame, encoding: str = CHUNK_ENCODING) -> bytes:
+    """
+    Codifica um bloco de linhas
+
+    Args:
+        chunk: Linhas do bloco
+        encoding: 'parquet' ou 'json.gz'
+
+    Returns:
+        bytes: Bloco codificado (determinístico para o mesmo conteúdo)
+    """
+    if encoding == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        sink = io.BytesIO()
+        pq.write_table(pa.Table.from_pandas(chunk, preserve_index=False), sink, compression='zstd')
+        return sink.getvalue()
+    text = chunk.to_json(orient='split', index=False, date_format='iso')
+    return gzip.compress(text.encode('utf-8'), mtime=0)
+
+
+def decode_chunk(encoding: str, payload: bytes) -> pd.DataFrame:
+    """
+    Decodifica um bloco gravado por encode_chunk
+
+    Args:
+        encoding: 'parquet' ou 'json.gz'
+        payload: Bloco codificado
+
+    Returns:
+        pd.DataFrame: Linhas do bloco
+    """
+    if encoding == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_table(io.BytesIO(payload)).to_pandas()
+    return pd.read_json(io.StringIO(gzip.decompress(payload).decode('utf-8')), orient='split')
+
+
+def split_dataset(data: pd.DataFrame, chunk_rows: Optional[int] = None) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Divide o dataset em blocos endereçados por conteúdo
+
+    Args:
+        data: DataFrame carregado
+        chunk_rows: Linhas por bloco (padrão: Config.IMPORT_CHUNK_ROWS)
+
+    Returns:
+        Tuple[str, List[Dict[str, Any]]]: (hash do dataset, linhas da tabela imported_data_chunks)
+    """
+    chunk_rows = chunk_rows or Config.IMPORT_CHUNK_ROWS
+    chunks = []
+    for start in range(0, max(len(data), 1), chunk_rows):
+        payload = encode_chunk(data.iloc[start:start + chunk_rows])
+        chunks.append({
+            'content_hash': hashlib.sha256(CHUNK_ENCODING.encode('utf-8') + payload).hexdigest(),
+            'encoding': CHUNK_ENCODING,
+            'payload': base64.b64encode(payload).decode('ascii'),
+            'row_count': min(chunk_rows, len(data) - start),
+            'byte_size': len(payload),
+        })
+
+    digest = hashlib.sha256()
+    for column in data.columns:
+        digest.update(str(column).encode('utf-8') + b'\0')
+    for chunk in chunks:
+        digest.update(chunk['content_hash'].encode('ascii'))
+    return digest.hexdigest(), chunks
+
+
+def prepare_dataset(data: pd.DataFrame,
+                    chunk_rows: Optional[int] = None) -> Tuple[bool, Optional[Tuple[str, List[Dict[str, Any]]]], Optional[str]]:
+    """
+    Divide o dataset em blocos sem propagar erros de codificação
+
+    Colunas que o Parquet não representa (ex.: números e textos misturados,
+    ArrowInvalid) impedem a gravação em blocos, mas não o carregamento.
+
+    Args:
+        data: DataFrame carregado
+        chunk_rows: Linhas por bloco (padrão: Config.IMPORT_CHUNK_ROWS)
+
+    Returns:
+        Tuple: (success, resultado de split_dataset, error_message)
+    """
+    try:
+        return True, split_dataset(data, chunk_rows), None
+    except Exception as e:
+        return False, None, f"Erro ao dividir o dataset em blocos: {str(e)}"
+
+
+class ChunkedDatasetStore:
+    """Gravação e leitura de importações em blocos deduplicados no Supabase"""
+
+    def __init__(self, client=None, chunk_rows: Optional[int] = None, max_known: int = 100_000):
+        self.client = client or supabase_client
+        self.chunk_rows = chunk_rows
+        self.max_known = max_known
+        # Hashes confirmados no banco por este processo: evitam consultas e regravações
+        self._known_chunks = OrderedDict()
+        self._known_datasets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, known: OrderedDict, key: str, value: Any = True) -> None:
+        with self._lock:
+            known[key] = value
+            known.move_to_end(key)
+            while len(known) > self.max_known:
+                known.popitem(last=False)
+
+    def find(self, content_hash: str, data_source_id: str) -> Optional[str]:
+        """
+        Identificador de uma importação já gravada da fonte com o mesmo conteúdo
+
+        Args:
+            content_hash: Hash do dataset (split_dataset)
+            data_source_id: Fonte de dados da importação
+
+        Returns:
+            Optional[str]: Id em imported_data, ou None se o conteúdo é novo para a fonte
+        """
+        known_key = f"{data_source_id}:{content_hash}"
+        with self._lock:
+            imported_data_id = self._known_datasets.get(known_key)
+        if imported_data_id is not None:
+            return imported_data_id
+
+        success, row, error = self.client.find_imported_data(content_hash, data_source_id)
+        if not success:
+            logging.warning(f"Deduplicação de dados importados indisponível: {error}")
+            return None
+        if row:
+            self._remember(self._known_datasets, known_key, row['id'])
+            return row['id']
+        return None
+
+    def save(self, data_source_id: str, data: pd.DataFrame,
+             prepared: Optional[Tuple[str, List[Dict[str, Any]]]] = None,
+             file_size_bytes: Optional[int] = None) -> Tuple[bool, Optional[str], Optional[str]]:
+        """
+        Grava uma importação, enviando apenas os blocos ainda não armazenados
+
+        Args:
+            data_source_id: Fonte de dados da importação
+            data: DataFrame carregado
+            prepared: Resultado de split_dataset, se já calculado
+            file_size_bytes: Tamanho dos dados (padrão: soma dos blocos codificados, sem nova serialização)
+
+        Returns:
+            Tuple[bool, Optional[str], Optional[str]]: (success, imported_data_id, error_message)
+        """
+        content_hash, chunks = prepared or split_dataset(data, self.chunk_rows)
+
+        with self._lock:
+            unknown = [chunk for chunk in chunks if chunk['content_hash'] not in self._known_chunks]
+        missing = {}
+        if unknown:
+            success, existing, _ = self.client.get_existing_chunk_hashes(
+                list({chunk['content_hash'] for chunk in unknown}))
+            existing = existing if success else set()
+            # Só blocos confirmados no banco são lembrados: um bloco ainda na fila
+            # de gravação (que pode falhar) é conferido de novo na próxima carga
+            for chunk_hash in existing:
+                self._remember(self._known_chunks, chunk_hash)
+            for chunk in unknown:
+                if chunk['content_hash'] not in existing:
+                    missing.setdefault(chunk['content_hash'], chunk)
+            if missing:
+                success, _, error = self.client.save_dataset_chunks(list(missing.values()))
+                if not success:
+                    return False, None, error
+
+        success, imported_data_id, error = self.client.save_imported_data(
+            data_source_id=data_source_id,
+            data=None,
+            columns=[str(column) for column in data.columns],
+            row_count=len(data),
+            file_size_bytes=file_size_bytes if file_size_bytes is not None else sum(
+                chunk['byte_size'] for chunk in chunks),
+            content_hash=content_hash,
+            chunk_hashes=[chunk['content_hash'] for chunk in chunks]
+        )
+        # A importação não é lembrada aqui: ainda na fila de gravação ela pode falhar,
+        # e find só considera importações confirmadas no banco
+        if success:
+            logging.info(f"Importação {imported_data_id}: {len(chunks)} blocos, "
+                         f"{len(missing)} gravados")
+        return success, imported_data_id, error
+
+    def iter_chunks(self, imported_data_id: str) -> Iterator[pd.DataFrame]:
+        """
+        Lê uma importação bloco a bloco, na ordem original
+
+        Importações antigas (dados inteiros em 'data') são devolvidas em um único bloco.
+
+        Args:
+            imported_data_id: Id em imported_data
+
+        Yields:
+            pd.DataFrame: Linhas de cada bloco
+
+        Raises:
+            ValueError: Se a importação ou algum bloco não for encontrado
+        """
+        success, row, error = self.client.get_imported_data(imported_data_id)
+        if not success:
+            raise ValueError(error)
+
+        hashes = row.get('chunk_hashes')
+        if hashes is None:
+            yield pd.DataFrame(row.get('data') or [], columns=row.get('columns'))
+            return
+
+        for start in range(0, len(hashes), _READ_BATCH_CHUNKS):
+            group = hashes[start:start + _READ_BATCH_CHUNKS]
+            success, chunk_rows, error = self.client.get_dataset_chunks(list(dict.fromkeys(group)))
+            if not success:
+                raise ValueError(error)
+            by_hash = {chunk['content_hash']: chunk for chunk in chunk_rows}
+            for content_hash in group:
+                chunk = by_hash.get(content_hash)
+                if chunk is None:
+                    raise ValueError(f"Bloco {content_hash} da importação {imported_data_id} não encontrado")
+                yield decode_chunk(chunk['encoding'], base64.b64decode(chunk['payload']))
+
+    def load(self, imported_data_id: str) -> Tuple[bool, Optional[pd.DataFrame], Optional[str]]:
+        """
+        Reconstrói o DataFrame de uma importação
+
+        Args:
+            imported_data_id: Id em imported_data
+
+        Returns:
+            Tuple[bool, Optional[pd.DataFrame], Optional[str]]: (success, data, error_message)
+        """
+        try:
+            chunks = list(self.iter_chunks(imported_data_id))
+            return True, pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0], None
+        except Exception as e:
+            return False, None, f"Erro ao ler dados importados: {str(e)}"
+
+
+# Instância global do armazenamento de dados importados
+chunked_store = ChunkedDatasetStore()
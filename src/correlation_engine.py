@@ -0,0 +1,244 @@
+"""
+Motor de correlação incremental do dataGPT
+
+Mantém acumuladores de co-momentos (contagem, médias e co-momentos por par
+de colunas) que podem ser atualizados com novas linhas e combinados entre
+partições de filtro (fórmula de Chan et al.), evitando recalcular a matriz
+de correlação do zero a cada execução. Valores nulos são tratados par a par,
+como em ``DataFrame.corr()``.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+import numpy as np
+import pandas as pd
+from src.cache_keys import make_filter_key
+
+
+class CoMomentAccumulator:
+    """
+    Acumulador mergeável de co-momentos para k colunas numéricas
+
+    Para cada par (i, j) guarda apenas as linhas em que ambas as colunas têm
+    valor: a contagem ``n[i, j]``, a média de i nessas linhas ``mean[i, j]``,
+    a soma de quadrados dos desvios ``m2[i, j]`` e o co-momento ``c[i, j]``.
+    """
+
+    def __init__(self, columns: Iterable[str]):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.rows = 0
+        self.n = np.zeros((k, k))
+        self.mean = np.zeros((k, k))
+        self.m2 = np.zeros((k, k))
+        self.c = np.zeros((k, k))
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame, columns: Optional[Iterable[str]] = None) -> 'CoMomentAccumulator':
+        """Cria um acumulador a partir das colunas numéricas de um DataFrame"""
+        if columns is None:
+            columns = data.select_dtypes(include=['number']).columns
+        accumulator = cls(columns)
+        accumulator.update(data)
+        return accumulator
+
+    def _batch(self, data: pd.DataFrame) -> 'CoMomentAccumulator':
+        """Calcula os co-momentos de um bloco em uma única passagem matricial"""
+        values = data[self.columns].to_numpy(dtype=float, na_value=np.nan)
+        batch = CoMomentAccumulator(self.columns)
+        batch.rows = len(values)
+        if batch.rows == 0:
+            return batch
+
+        mask = np.isfinite(values)
+        # Deslocar pela média da coluna mantém a precisão das somas brutas
+        with np.errstate(invalid='ignore'):
+            shift = np.nanmean(np.where(mask, values, np.nan), axis=0)
+        shift = np.nan_to_num(shift)
+        x = np.where(mask, values - shift, 0.0)
+        m = mask.astype(float)
+
+        n = m.T @ m
+        sums = x.T @ m                 # sums[i, j] = soma de x_i nas linhas com i e j
+        squares = (x * x).T @ m
+        cross = x.T @ x
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(n > 0, sums / n, 0.0)
+            batch.m2 = np.where(n > 0, squares - sums * mean, 0.0)
+            batch.c = np.where(n > 0, cross - sums * mean.T, 0.0)
+        batch.n = n
+        batch.mean = mean + shift[:, None]
+        return batch
+
+    def merge(self, other: 'CoMomentAccumulator') -> 'CoMomentAccumulator':
+        """
+        Combina outro acumulador (mesmas colunas) neste
+
+        Args:
+            other: Acumulador de outra partição ou bloco de linhas
+
+        Returns:
+            CoMomentAccumulator: O próprio acumulador, atualizado
+        """
+        if other.columns != self.columns:
+            raise ValueError("Acumuladores com colunas diferentes não podem ser combinados")
+
+        n = self.n + other.n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(n > 0, other.n / n, 0.0)
+            delta = other.mean - self.mean
+            factor = np.where(n > 0, self.n * other.n / n, 0.0)
+
+        self.mean = self.mean + delta * weight
+        self.m2 = self.m2 + other.m2 + delta * delta * factor
+        self.c = self.c + other.c + delta * delta.T * factor
+        self.n = n
+        self.rows += other.rows
+        return self
+
+    def update(self, data: pd.DataFrame) -> 'CoMomentAccumulator':
+        """Acumula novas linhas"""
+        return self.merge(self._batch(data))
+
+    def copy(self) -> 'CoMomentAccumulator':
+        """Retorna uma cópia independente do acumulador"""
+        clone = CoMomentAccumulator(self.columns)
+        clone.rows = self.rows
+        clone.n, clone.mean = self.n.copy(), self.mean.copy()
+        clone.m2, clone.c = self.m2.copy(), self.c.copy()
+        return clone
+
+    def correlation(self) -> pd.DataFrame:
+        """Matriz de correlação de Pearson a partir dos co-momentos"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            denominator = np.sqrt(self.m2 * self.m2.T)
+            corr = np.where((self.n > 1) & (denominator > 0), self.c / denominator, np.nan)
+        corr = np.clip(corr, -1.0, 1.0)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+def _row_hashes(data: pd.DataFrame, columns: Tuple[str, ...]) -> np.ndarray:
+    """Hash de cada linha das colunas correlacionadas (valida o cache pelo conteúdo)"""
+    return pd.util.hash_pandas_object(data[list(columns)], index=False).to_numpy()
+
+
+def _digest(row_hashes: np.ndarray) -> str:
+    """Resumo de um intervalo de hashes de linhas"""
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+
+class CorrelationEngine:
+    """Cache LRU de acumuladores e matrizes de correlação por dataset e filtros"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def _store(self, key, entry) -> None:
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def get_correlation(self, data: pd.DataFrame, dataset_key: Optional[str] = None,
+                        filter_state: Optional[dict] = None) -> pd.DataFrame:
+        """
+        Retorna a matriz de correlação das colunas numéricas
+
+        Quando o dataset é identificado, o acumulador fica em cache junto com o
+        resumo dos hashes das linhas. A matriz é reaproveitada apenas se o
+        conteúdo é o mesmo; se as linhas anteriores não mudaram e outras foram
+        anexadas ao final, apenas as novas linhas são processadas. Calcular os
+        hashes custa uma passagem linear, contra a quadrática (no número de
+        colunas) da correlação.
+
+        Args:
+            data: DataFrame (já filtrado)
+            dataset_key: Identificador do dataset (ex.: URL de origem)
+            filter_state: Filtros aplicados ao DataFrame
+
+        Returns:
+            pd.DataFrame: Matriz de correlação
+        """
+        columns = tuple(data.select_dtypes(include=['number']).columns)
+        if dataset_key is None:
+            return CoMomentAccumulator.from_frame(data, columns).correlation()
+
+        key = (dataset_key, make_filter_key(filter_state), columns)
+        entry = self._lookup(key)
+        row_hashes = _row_hashes(data, columns)
+        digest = _digest(row_hashes)
+
+        if entry is not None and entry['digest'] == digest:
+            return entry['matrix']
+
+        cached_rows = entry['accumulator'].rows if entry is not None else 0
+        if entry is not None and cached_rows < len(data) and _digest(row_hashes[:cached_rows]) == entry['digest']:
+            accumulator = entry['accumulator'].copy().update(data.iloc[cached_rows:])
+        else:
+            accumulator = CoMomentAccumulator.from_frame(data, columns)
+
+        matrix = accumulator.correlation()
+        self._store(key, {'accumulator': accumulator, 'matrix': matrix, 'digest': digest})
+        return matrix
+
+    def get_partitioned_correlation(self, data: pd.DataFrame, partition_col: str,
+                                    selected_values: Iterable,
+                                    dataset_key: Optional[str] = None) -> pd.DataFrame:
+        """
+        Retorna a correlação de um filtro por valores de uma coluna categórica
+
+        Os acumuladores de cada valor da coluna são calculados uma vez sobre o
+        DataFrame completo; qualquer seleção de valores é obtida combinando os
+        acumuladores selecionados, sem reler as linhas.
+
+        Args:
+            data: DataFrame completo (sem o filtro da coluna de partição)
+            partition_col: Coluna usada no filtro
+            selected_values: Valores selecionados no filtro
+            dataset_key: Identificador do dataset
+
+        Returns:
+            pd.DataFrame: Matriz de correlação das linhas selecionadas
+        """
+        columns = tuple(c for c in data.select_dtypes(include=['number']).columns if c != partition_col)
+        key = (dataset_key, 'partition', partition_col, columns)
+        partitions = self._lookup(key) if dataset_key is not None else None
+        digest = _digest(_row_hashes(data, columns + (partition_col,)))
+
+        if partitions is None or partitions['digest'] != digest:
+            partitions = {
+                'digest': digest,
+                'accumulators': {
+                    value: CoMomentAccumulator.from_frame(group, columns)
+                    for value, group in data.groupby(partition_col, sort=False)
+                }
+            }
+            if dataset_key is not None:
+                self._store(key, partitions)
+
+        merged = CoMomentAccumulator(columns)
+        for value in selected_values:
+            if value in partitions['accumulators']:
+                merged.merge(partitions['accumulators'][value])
+        return merged.correlation()
+
+    def clear(self) -> None:
+        """Limpa o cache de correlações"""
+        with self._lock:
+            self._cache.clear()
+
+
+# Instância global do motor de correlação
+correlation_engine = CorrelationEngine()
@@ -0,0 +1,114 @@
+"""
+Filtros dos apps Dash ligados ao servidor
+
+Os dropdowns de filtro usam IDs com padrão (``{'type': 'column-filter',
+'column': ...}``), lidos em conjunto por um callback ``ALL``. No navegador um
+callback clientside aguarda ``Config.FILTER_DEBOUNCE_MS`` e descarta seleções
+substituídas antes do fim da espera, de modo que cliques rápidos geram uma
+única requisição. No servidor a seleção é normalizada pelo motor de filtros
+incremental; estados equivalentes ao atual não disparam recálculo, e cada
+alteração incrementa a revisão de filtros da sessão, usada pelos callbacks de
+gráficos e métricas para abandonar trabalho já superado.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import pandas as pd
+from config import Config
+from src.cache_keys import make_filter_key
+from src.filter_engine import filter_engine
+from src.session_store import session_store
+
+FILTER_TYPE = 'column-filter'
+
+# Espera no navegador antes de enviar a seleção; cada nova seleção reinicia a contagem
+_DEBOUNCE_SOURCE = """
+function(values, ids) {
+    var state = window.lucraxFilterDebounce = window.lucraxFilterDebounce || {token: 0};
+    var token = ++state.token;
+    return new Promise(function(resolve) {
+        setTimeout(function() {
+            if (token !== state.token) {
+                resolve(window.dash_clientside.no_update);
+                return;
+            }
+            var selection = {};
+            ids.forEach(function(id, i) { selection[id.column] = values[i]; });
+            resolve(selection);
+        }, %d);
+    });
+}
+"""
+
+
+def filter_control_id(column: str) -> dict:
+    """ID do dropdown de filtro de uma coluna"""
+    return {'type': FILTER_TYPE, 'column': str(column)}
+
+
+def filter_state_payload(session_state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Conteúdo do dcc.Store 'filter-state' para um estado de sessão"""
+    if session_state is None:
+        return {'key': '', 'revision': 0}
+    return {'key': make_filter_key(session_state['filters']), 'revision': session_state.get('revision', 0)}
+
+
+def update_session_filters(session_id: Optional[str], selection: Optional[Dict[str, List[Any]]],
+                           data: Optional[pd.DataFrame]) -> Optional[Dict[str, Any]]:
+    """
+    Grava a seleção de filtros na sessão, se ela alterar o estado efetivo
+
+    Args:
+        session_id: Identificador da sessão
+        selection: Dicionário coluna -> valores selecionados nos dropdowns
+        data: Dataset da sessão sem filtros
+
+    Returns:
+        Optional[Dict[str, Any]]: Novo conteúdo do 'filter-state' ou None se nada mudou
+    """
+    state = session_store.get_session(session_id)
+    if state is None or data is None:
+        return None
+
+    filters = filter_engine.normalize(data, selection,
+                                      dataset_key=session_store.cache_key(state['dataset_key'], data))
+    if make_filter_key(filters) == make_filter_key(state['filters']):
+        return None
+    return filter_state_payload(session_store.update_filters(session_id, filters))
+
+
+def is_superseded(session_id: Optional[str], filter_state: Optional[Dict[str, Any]]) -> bool:
+    """Indica se já existe uma seleção de filtros mais recente que a recebida pelo callback"""
+    if not filter_state:
+        return False
+    return session_store.get_revision(session_id) > filter_state.get('revision', 0)
+
+
+def register_filter_callbacks(app, get_data: Callable[[Optional[str]], Optional[pd.DataFrame]]) -> None:
+    """
+    Registra no app Dash os callbacks dos filtros por coluna
+
+    O layout deve conter os stores 'session-id', 'filter-selection' e
+    'filter-state' e os dropdowns criados com filter_control_id.
+
+    Args:
+        app: Aplicação Dash
+        get_data: Função (session_id) -> dataset da sessão sem filtros
+    """
+    from dash import Input, Output, State, ALL, no_update
+
+    app.clientside_callback(
+        _DEBOUNCE_SOURCE % Config.FILTER_DEBOUNCE_MS,
+        Output('filter-selection', 'data'),
+        Input({'type': FILTER_TYPE, 'column': ALL}, 'value'),
+        State({'type': FILTER_TYPE, 'column': ALL}, 'id'),
+        prevent_initial_call=True
+    )
+
+    @app.callback(
+        Output('filter-state', 'data'),
+        Input('filter-selection', 'data'),
+        State('session-id', 'data'),
+        prevent_initial_call=True
+    )
+    def apply_filter_selection(selection, session_id):
+        payload = update_session_filters(session_id, selection, get_data(session_id))
+        return payload if payload is not None else no_update
@@ -2,10 +2,10 @@
 Módulo de carregamento de dados melhorado para o dataGPT
 """
 import pandas as pd
-import streamlit as st
 import requests
 from typing import Tuple, Optional
 from src.validators import DataValidator, SecurityValidator
+from src.lazy_imports import streamlit_cache_data
 import sys
 
 # Garantir encoding UTF-8 no stdout/stderr (evita caracteres truncados)
@@ -134,8 +134,8 @@ class DataLoader:
 # Instância global do carregador de dados
 data_loader = DataLoader()
 
-# Funções de compatibilidade para manter a API existente
-@st.cache_data
+# Funções de compatibilidade para manter a API existente (cache do Streamlit aplicado no primeiro uso)
+@streamlit_cache_data
 def get_csv_export_url(url: str) -> str:
     """
     Função de compatibilidade - converte URL para CSV
@@ -154,7 +154,7 @@ def get_csv_export_url(url: str) -> str:
         raise ValueError(error)
     return csv_url
 
-@st.cache_data
+@streamlit_cache_data
 def load_data(url: str) -> pd.DataFrame:
     """
     Função de compatibilidade - carrega dados do Google Sheets
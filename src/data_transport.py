@@ -0,0 +1,286 @@
+"""
+Formatos de transporte de datasets da API JSON
+
+O cliente escolhe o formato dos dados (campo ``format`` ou cabeçalho
+``Accept``):
+
+- ``records``: lista de objetos JSON (formato original);
+- ``split``: JSON orientado a colunas (``{"columns": [...], "data": [[...]]}``),
+  sem repetir os nomes das colunas em cada linha;
+- ``arrow``: stream Arrow IPC (``application/vnd.apache.arrow.stream``),
+  binário e colunar, lido sem conversão de texto;
+- ``parquet``: arquivo Parquet (``application/vnd.apache.parquet``);
+- ``ndjson``: um objeto JSON por linha (``application/x-ndjson``).
+
+NDJSON e Arrow também podem ser gerados em blocos de
+``Config.STREAM_CHUNK_ROWS`` linhas (``stream_dataframe``), para respostas em
+streaming com memória limitada e tamanho contado durante a própria geração.
+
+A compressão é opcional: zstd/lz4 nos buffers Arrow, o codec do Parquet ou
+gzip do corpo JSON. Os formatos binários exigem pyarrow, importado apenas
+quando usados.
+"""
+import io
+import gzip
+import zlib
+from typing import Any, Iterator, Optional, Tuple
+import pandas as pd
+from config import Config
+from src.lazy_imports import is_available
+from src.serialization import RawJSON, dumps
+
+PYARROW_AVAILABLE = is_available('pyarrow')
+
+ARROW_STREAM_TYPE = 'application/vnd.apache.arrow.stream'
+PARQUET_TYPE = 'application/vnd.apache.parquet'
+JSON_TYPE = 'application/json'
+NDJSON_TYPE = 'application/x-ndjson'
+
+# Formato -> tipo de conteúdo
+CONTENT_TYPES = {
+    'records': JSON_TYPE,
+    'split': JSON_TYPE,
+    'arrow': ARROW_STREAM_TYPE,
+    'parquet': PARQUET_TYPE,
+    'ndjson': NDJSON_TYPE,
+}
+STREAM_FORMATS = ('ndjson', 'arrow')
+BINARY_FORMATS = ('arrow', 'parquet')
+
+# Compressões aceitas por formato
+COMPRESSIONS = {
+    'records': ('gzip',),
+    'split': ('gzip',),
+    'arrow': ('zstd', 'lz4'),
+    'parquet': ('snappy', 'gzip', 'zstd', 'brotli', 'lz4'),
+    'ndjson': ('gzip',),
+}
+
+_ACCEPT_FORMATS = {
+    ARROW_STREAM_TYPE: 'arrow',
+    PARQUET_TYPE: 'parquet',
+    'application/x-parquet': 'parquet',
+    NDJSON_TYPE: 'ndjson',
+}
+
+
+def negotiate_format(requested: Optional[str], accept: Optional[str] = None,
+                     compression: Optional[str] = None) -> Tuple[bool, Optional[Tuple[str, Optional[str]]], Optional[str]]:
+    """
+    Escolhe formato e compressão a partir da requisição
+
+    Args:
+        requested: Campo 'format' do corpo (tem prioridade sobre o Accept)
+        accept: Cabeçalho Accept
+        compression: Campo 'compression' do corpo
+
+    Returns:
+        Tuple: (success, (formato, compressão), error_message)
+    """
+    fmt = requested
+    if not fmt and accept:
+        for media_type in accept.split(','):
+            fmt = _ACCEPT_FORMATS.get(media_type.split(';')[0].strip().lower())
+            if fmt:
+                break
+    fmt = (fmt or 'records').lower()
+
+    if fmt not in CONTENT_TYPES:
+        return False, None, f"Formato '{fmt}' não suportado. Use: {', '.join(CONTENT_TYPES)}"
+    if fmt in BINARY_FORMATS and not PYARROW_AVAILABLE:
+        return False, None, "Formatos binários exigem pyarrow no servidor"
+    if compression in (None, '', 'none'):
+        compression = None
+    elif compression not in COMPRESSIONS[fmt]:
+        return False, None, f"Compressão '{compression}' não suportada para '{fmt}'. Use: {', '.join(COMPRESSIONS[fmt])}"
+    return True, (fmt, compression), None
+
+
+def _to_arrow_table(data: pd.DataFrame):
+    import pyarrow as pa
+    return pa.Table.from_pandas(data, preserve_index=False)
+
+
+def encode_dataframe(data: pd.DataFrame, fmt: str, compression: Optional[str] = None) -> Tuple[bool, Any, Optional[str]]:
+    """
+    Codifica um DataFrame no formato de transporte
+
+    Args:
+        data: DataFrame a enviar
+        fmt: 'records', 'split', 'arrow' ou 'parquet'
+        compression: Compressão aceita pelo formato (ver COMPRESSIONS)
+
+    Returns:
+        Tuple[bool, Any, Optional[str]]: (success, payload, error_message). O
+        payload é bytes para formatos binários ou JSON comprimido, e RawJSON
+        (para embutir com dumps_with_raw) nos demais casos
+    """
+    try:
+        if fmt == 'arrow':
+            import pyarrow as pa
+            table = _to_arrow_table(data)
+            sink = io.BytesIO()
+            options = pa.ipc.IpcWriteOptions(compression=compression)
+            with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+                writer.write_table(table)
+            return True, sink.getvalue(), None
+
+        if fmt == 'parquet':
+            import pyarrow.parquet as pq
+            sink = io.BytesIO()
+            pq.write_table(_to_arrow_table(data), sink, compression=compression or 'none')
+            return True, sink.getvalue(), None
+
+        if fmt == 'ndjson':
+            text = b''.join(iter_ndjson(data))
+            if compression == 'gzip':
+                return True, gzip.compress(text, mtime=0), None
+            return True, text, None
+
+        # JSON serializado em C pelo pandas (datas em ISO 8601, NaN como null). O
+        # 'split' é montado a partir de orient='values', bem mais rápido que
+        # orient='split' com index=False
+        if fmt == 'split':
+            text = ('{"columns":' + dumps([str(column) for column in data.columns])
+                    + ',"data":' + data.to_json(orient='values', date_format='iso') + '}')
+        else:
+            text = data.to_json(orient='records', date_format='iso')
+        if compression == 'gzip':
+            return True, gzip.compress(text.encode('utf-8'), mtime=0), None
+        return True, RawJSON(text), None
+    except Exception as e:
+        return False, None, f"Erro ao codificar dados em '{fmt}': {str(e)}"
+
+
+def iter_ndjson(data: pd.DataFrame, chunk_rows: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Gera o dataset em NDJSON, um bloco de linhas por vez
+
+    Args:
+        data: DataFrame a enviar
+        chunk_rows: Linhas por bloco (padrão: Config.STREAM_CHUNK_ROWS)
+
+    Yields:
+        bytes: Bloco de linhas JSON terminadas em quebra de linha
+    """
+    chunk_rows = chunk_rows or Config.STREAM_CHUNK_ROWS
+    for start in range(0, len(data), chunk_rows):
+        chunk = data.iloc[start:start + chunk_rows]
+        yield chunk.to_json(orient='records', lines=True, date_format='iso').rstrip('\n').encode('utf-8') + b'\n'
+
+
+def iter_arrow_batches(data: pd.DataFrame, chunk_rows: Optional[int] = None,
+                       compression: Optional[str] = None) -> Iterator[bytes]:
+    """
+    Gera o dataset como stream Arrow IPC, um record batch por vez
+
+    Args:
+        data: DataFrame a enviar
+        chunk_rows: Linhas por record batch (padrão: Config.STREAM_CHUNK_ROWS)
+        compression: 'zstd', 'lz4' ou None
+
+    Yields:
+        bytes: Mensagem de schema, record batches e marcador de fim do stream
+    """
+    import pyarrow as pa
+
+    chunk_rows = chunk_rows or Config.STREAM_CHUNK_ROWS
+    sink = io.BytesIO()
+
+    def drain() -> bytes:
+        chunk = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return chunk
+
+    schema = pa.Schema.from_pandas(data, preserve_index=False)
+    writer = pa.ipc.new_stream(sink, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+    for start in range(0, len(data), chunk_rows):
+        batch = pa.RecordBatch.from_pandas(data.iloc[start:start + chunk_rows], schema=schema,
+                                           preserve_index=False)
+        writer.write_batch(batch)
+        yield drain()
+    writer.close()
+    yield drain()
+
+
+class SizedStream:
+    """Iterador de blocos que conta os bytes enviados durante a própria geração"""
+
+    def __init__(self, chunks: Iterator[bytes], gzip_output: bool = False):
+        self._chunks = chunks
+        self._compressor = zlib.compressobj(wbits=31) if gzip_output else None
+        self.bytes_written = 0
+        self.raw_bytes = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._chunks:
+            self.raw_bytes += len(chunk)
+            if self._compressor is not None:
+                chunk = self._compressor.compress(chunk)
+                if not chunk:
+                    continue
+            self.bytes_written += len(chunk)
+            yield chunk
+        if self._compressor is not None:
+            tail = self._compressor.flush()
+            self.bytes_written += len(tail)
+            yield tail
+
+
+def parse_chunk_rows(value: Any) -> Tuple[bool, Optional[int], Optional[str]]:
+    """
+    Valida o tamanho de bloco pedido pelo cliente
+
+    Args:
+        value: Linhas por bloco (inteiro ou texto; None usa Config.STREAM_CHUNK_ROWS)
+
+    Returns:
+        Tuple[bool, Optional[int], Optional[str]]: (success, chunk_rows, error_message)
+    """
+    if value is None:
+        return True, Config.STREAM_CHUNK_ROWS, None
+    try:
+        if isinstance(value, bool):
+            raise TypeError(value)
+        chunk_rows = int(value)
+    except (TypeError, ValueError):
+        return False, None, "chunk_rows deve ser um número inteiro"
+    # O limite mantém a memória do streaming limitada a um bloco de tamanho conhecido
+    if not 0 < chunk_rows <= Config.STREAM_MAX_CHUNK_ROWS:
+        return False, None, f"chunk_rows deve estar entre 1 e {Config.STREAM_MAX_CHUNK_ROWS}"
+    return True, chunk_rows, None
+
+
+def stream_dataframe(data: pd.DataFrame, fmt: str, compression: Optional[str] = None,
+                     chunk_rows: Optional[int] = None) -> Tuple[bool, Optional[SizedStream], Optional[str]]:
+    """
+    Prepara a resposta em streaming de um dataset
+
+    Args:
+        data: DataFrame a enviar
+        fmt: 'ndjson' ou 'arrow'
+        compression: 'gzip' (ndjson) ou 'zstd'/'lz4' (arrow)
+        chunk_rows: Linhas por bloco
+
+    Returns:
+        Tuple[bool, Optional[SizedStream], Optional[str]]: (success, stream, error_message)
+    """
+    if fmt == 'ndjson':
+        return True, SizedStream(iter_ndjson(data, chunk_rows), gzip_output=compression == 'gzip'), None
+    if fmt == 'arrow':
+        return True, SizedStream(iter_arrow_batches(data, chunk_rows, compression)), None
+    return False, None, f"Formato '{fmt}' não disponível em streaming. Use: {', '.join(STREAM_FORMATS)}"
+
+
+def records_size(data: pd.DataFrame) -> int:
+    """
+    Tamanho em bytes do dataset em JSON (uma linha por registro)
+
+    Medido bloco a bloco, sem montar o texto inteiro em memória; difere do
+    tamanho da lista JSON equivalente em apenas um byte.
+    """
+    stream = SizedStream(iter_ndjson(data))
+    for _ in stream:
+        pass
+    return stream.bytes_written
@@ -0,0 +1,180 @@
+"""
+Identificadores de datasets da API JSON
+
+Em vez de devolver o dataset inteiro no ``load_data`` e recebê-lo de volta a
+cada ``generate_chart``/``analyze_data``, a API registra o dataset no servidor
+(cache quente do container) e devolve um identificador compacto e o schema.
+As demais ações recebem o identificador, com filtros e projeção de colunas
+aplicados no servidor.
+
+O identificador é derivado da URL de origem: um container que ainda não
+conhece o identificador (ou cujo cache expirou) recarrega a planilha quando o
+cliente envia a URL junto. A chave dos caches derivados (figuras, análises,
+máscaras de filtro) leva o hash do conteúdo, calculado uma vez por DataFrame
+registrado: é a mesma em qualquer processo e muda sempre que a planilha muda.
+"""
+import hashlib
+import weakref
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import pandas as pd
+from src.cache_keys import dataset_version
+from src.filter_engine import filter_engine
+from src.warm_cache import warm_cache
+
+_HANDLE_PREFIX = 'ds_'
+
+
+def make_dataset_id(url: str) -> str:
+    """Identificador compacto e estável de um dataset a partir da URL de origem"""
+    return _HANDLE_PREFIX + hashlib.sha1(url.strip().encode('utf-8')).hexdigest()[:20]
+
+
+def describe_schema(data: pd.DataFrame) -> List[Dict[str, str]]:
+    """
+    Schema do dataset devolvido aos clientes
+
+    Args:
+        data: DataFrame carregado
+
+    Returns:
+        List[Dict[str, str]]: Nome e tipo (dtype do pandas) de cada coluna
+    """
+    return [{'name': str(column), 'dtype': str(dtype)} for column, dtype in data.dtypes.items()]
+
+
+def select_data(data: pd.DataFrame, filters: Optional[Dict[str, Any]] = None,
+                columns: Optional[List[str]] = None,
+                dataset_key: Optional[str] = None) -> Tuple[bool, Optional[pd.DataFrame], Optional[str]]:
+    """
+    Aplica filtros por coluna e projeção no servidor
+
+    Args:
+        data: Dataset completo
+        filters: Dicionário coluna -> valores aceitos (mesmo formato dos dashboards)
+        columns: Colunas a manter (todas se None)
+        dataset_key: Chave do dataset para o cache de máscaras do motor de filtros
+
+    Returns:
+        Tuple[bool, Optional[pd.DataFrame], Optional[str]]: (success, data, error_message)
+    """
+    if filters is not None and not isinstance(filters, dict):
+        return False, None, "Filtros devem ser um objeto coluna -> valores"
+    if columns is not None and not isinstance(columns, list):
+        return False, None, "Colunas devem ser uma lista"
+
+    for column in list(filters or {}) + list(columns or []):
+        if column not in data.columns:
+            return False, None, f"Coluna '{column}' não encontrada no dataset"
+
+    if filters:
+        data = filter_engine.apply(data, filters, dataset_key=dataset_key)
+    if columns:
+        data = data[columns]
+    return True, data, None
+
+
+class DatasetHandles:
+    """Registro identificador -> URL de origem, com os dados no cache quente"""
+
+    def __init__(self, cache=None, max_handles: int = 4096):
+        self.cache = cache or warm_cache
+        self.max_handles = max_handles
+        self._handles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, dataset_id: str, url: str) -> Dict[str, Any]:
+        with self._lock:
+            entry = self._handles.pop(dataset_id, None) or {'url': url, 'version': None, 'data': None}
+            self._handles[dataset_id] = entry
+            while len(self._handles) > self.max_handles:
+                self._handles.popitem(last=False)
+            return entry
+
+    def register(self, url: str, data: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Registra um dataset recém-carregado
+
+        Args:
+            url: URL de origem
+            data: DataFrame carregado
+
+        Returns:
+            Dict[str, Any]: Identificador, schema e dimensões do dataset
+        """
+        dataset_id = make_dataset_id(url)
+        entry = self._remember(dataset_id, url)
+        if self._track(entry, data):
+            self.cache.store(self.cache.make_key('dataset', url), data)
+        return {
+            'dataset_id': dataset_id,
+            'schema': describe_schema(data),
+            'shape': list(data.shape),
+        }
+
+    def _track(self, entry: Dict[str, Any], data: pd.DataFrame) -> bool:
+        """Associa o DataFrame à entrada e calcula a versão do conteúdo (True se era outro objeto)"""
+        with self._lock:
+            # O mesmo DataFrame (vindo do cache) mantém versão e validade
+            if entry.get('data') is not None and entry['data']() is data:
+                return False
+        version = dataset_version(data)
+        with self._lock:
+            entry['data'] = weakref.ref(data)
+            entry['version'] = version
+        return True
+
+    def dataset_key(self, dataset_id: str) -> Optional[str]:
+        """
+        Chave do conteúdo atual para os caches de figuras e agregados
+
+        Returns:
+            Optional[str]: '<identificador>@<hash do conteúdo>', ou None se o
+            dataset ainda não foi registrado ou resolvido neste processo
+        """
+        with self._lock:
+            entry = self._handles.get(dataset_id)
+            if entry is None or entry['version'] is None:
+                return None
+            return f"{dataset_id}@{entry['version']}"
+
+    def resolve(self, dataset_id: str, loader: Callable[[str], Tuple[bool, Any, Optional[str]]],
+                url: Optional[str] = None) -> Tuple[bool, Optional[pd.DataFrame], Optional[str]]:
+        """
+        Obtém o dataset de um identificador, recarregando-o se saiu do cache
+
+        Args:
+            dataset_id: Identificador devolvido pelo load_data
+            loader: Função (url) -> (success, data, error) usada na recarga
+            url: URL de origem enviada pelo cliente (permite resolver em outro container)
+
+        Returns:
+            Tuple[bool, Optional[pd.DataFrame], Optional[str]]: (success, data, error_message)
+        """
+        with self._lock:
+            entry = self._handles.get(dataset_id)
+            if entry is not None:
+                self._handles.move_to_end(dataset_id)
+                url = entry['url']
+
+        if entry is None:
+            if not url or make_dataset_id(url) != dataset_id:
+                return False, None, "Dataset não encontrado. Carregue os dados novamente"
+            entry = self._remember(dataset_id, url)
+
+        data, _ = self.cache.lookup(self.cache.make_key('dataset', url))
+        if data is not None:
+            # Ex.: dataset gravado em disco por outro processo
+            self._track(entry, data)
+            return True, data, None
+
+        success, data, error = loader(url)
+        if not success:
+            return False, None, error
+        self.register(url, data)
+        return True, data, None
+
+
+# Instância global do registro de datasets da API
+dataset_handles = DatasetHandles()
@@ -0,0 +1,448 @@
+"""
+Registro de datasets em memória compartilhada entre workers
+
+Quando o servidor Flask do Dash roda com vários processos (Gunicorn), cada
+dataset limpo é gravado uma única vez como snapshot Arrow IPC em um diretório
+de memória compartilhada (``/dev/shm`` por padrão). Os workers abrem o
+arquivo com memory-map e obtêm visões somente leitura sem cópia para colunas
+numéricas. Um índice protegido por lock de arquivo guarda tamanho, último
+acesso e os processos com o dataset mapeado, coordenando o descarte.
+
+Consultas leem o índice com lock compartilhado; o lock exclusivo fica para
+publicação, descarte e registro de acesso, que é atualizado no máximo a cada
+``_ACCESS_UPDATE_SECONDS`` por dataset e processo. Cada processo mantém até
+``max_attached`` datasets mapeados e libera a referência dos demais (e de
+todos ao encerrar).
+"""
+import os
+import json
+import time
+import atexit
+import pickle
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+import pandas as pd
+from config import Config
+
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    pa = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: coordenação apenas dentro do processo
+    fcntl = None
+
+_INDEX_FILE = 'index.json'
+_LOCK_FILE = '.lock'
+
+# Intervalo mínimo entre atualizações do último acesso de um dataset por processo
+_ACCESS_UPDATE_SECONDS = 30.0
+
+# Intervalo mínimo entre limpezas do estado de sessões expirado
+_STATE_CLEANUP_SECONDS = 300.0
+
+
+def _file_id(key: str) -> str:
+    """Nome de arquivo estável para uma chave"""
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def _pid_alive(pid: int) -> bool:
+    """Verifica se um processo ainda existe"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedDatasetRegistry:
+    """Snapshots Arrow compartilhados com contagem de referências e descarte LRU"""
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None,
+                 max_attached: int = 8):
+        directory = directory or Config.DATASET_REGISTRY_PATH
+        if not os.path.isdir(os.path.dirname(directory) or '.'):
+            # Sem /dev/shm (ex.: macOS/Windows): snapshots no diretório temporário
+            directory = os.path.join(tempfile.gettempdir(), os.path.basename(directory))
+        self.directory = directory
+        self.max_bytes = max_bytes or Config.DATASET_REGISTRY_MAX_MB * 1024 * 1024
+        self.max_attached = max_attached
+        # Chave -> [versão, DataFrame mapeado, momento do último registro de acesso]
+        self._attached: OrderedDict = OrderedDict()
+        self._thread_lock = threading.RLock()
+        self._exit_registered = False
+        os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def available(self) -> bool:
+        """Indica se o registro pode ser usado (requer pyarrow)"""
+        return PYARROW_AVAILABLE
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Lock do índice entre processos (compartilhado para leituras)"""
+        with open(os.path.join(self.directory, _LOCK_FILE), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_index(self) -> tuple:
+        try:
+            with open(os.path.join(self.directory, _INDEX_FILE), encoding='utf-8') as f:
+                original = f.read()
+            return original, json.loads(original)
+        except (FileNotFoundError, ValueError):
+            return None, {}
+
+    def _read_index(self) -> Dict[str, Any]:
+        """Lê o índice com lock compartilhado, sem bloquear outros leitores"""
+        with self._file_lock(exclusive=False):
+            return self._load_index()[1]
+
+    @contextmanager
+    def _locked_index(self):
+        """Abre o índice com lock exclusivo entre processos e grava ao sair"""
+        with self._thread_lock:
+            with self._file_lock(exclusive=True):
+                original, index = self._load_index()
+
+                yield index
+
+                # Leituras sem alteração não regravam o índice
+                updated = json.dumps(index)
+                if updated == original:
+                    return
+                index_path = os.path.join(self.directory, _INDEX_FILE)
+                tmp_path = f'{index_path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(updated)
+                os.replace(tmp_path, index_path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{_file_id(key)}.arrow')
+
+    def publish(self, key: str, data: pd.DataFrame) -> bool:
+        """
+        Grava o snapshot de um dataset no registro compartilhado
+
+        Args:
+            key: Chave do dataset (ex.: URL de origem)
+            data: DataFrame limpo
+
+        Returns:
+            bool: True se o snapshot foi gravado
+        """
+        if not self.available:
+            return False
+
+        try:
+            table = pa.Table.from_pandas(data)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            logging.warning(f"Dataset não convertido para Arrow, mantendo cópia local: {e}")
+            return False
+
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+        with self._locked_index() as index:
+            entry = index.get(key, {'refs': {}})
+            now = time.time()
+            entry.update(file=os.path.basename(path), bytes=os.path.getsize(path),
+                         version=now, last_access=now)
+            index[key] = entry
+            self._evict(index, keep=key)
+
+        with self._thread_lock:
+            self._attached.pop(key, None)
+        return True
+
+    def attach(self, key: str) -> Optional[pd.DataFrame]:
+        """
+        Retorna uma visão somente leitura do dataset (memory-map, sem cópia)
+
+        Args:
+            key: Chave do dataset
+
+        Returns:
+            Optional[pd.DataFrame]: Dataset ou None se não estiver no registro
+        """
+        if not self.available:
+            return None
+
+        entry = self._read_index().get(key)
+        path = os.path.join(self.directory, entry['file']) if entry is not None else None
+        if entry is None or not os.path.exists(path):
+            with self._thread_lock:
+                self._attached.pop(key, None)
+            return None
+
+        now = time.time()
+        with self._thread_lock:
+            # Reaproveita a visão já mapeada enquanto o snapshot não for substituído
+            attached = self._attached.get(key)
+            if attached is not None and attached[0] == entry['version']:
+                self._attached.move_to_end(key)
+                data = attached[1]
+                touch = now - attached[2] >= _ACCESS_UPDATE_SECONDS
+            else:
+                try:
+                    source = pa.memory_map(path, 'r')
+                except FileNotFoundError:
+                    # Descartado entre a leitura do índice e a abertura
+                    return None
+                table = pa.ipc.open_file(source).read_all()
+                # split_blocks permite visões sem cópia para colunas numéricas sem nulos
+                data = table.to_pandas(split_blocks=True)
+                attached = [entry['version'], data, now]
+                self._attached[key] = attached
+                touch = True
+            if touch:
+                attached[2] = now
+            evicted = []
+            while len(self._attached) > self.max_attached:
+                evicted.append(self._attached.popitem(last=False)[0])
+
+        if touch or evicted:
+            self._register_access(key if touch else None, evicted, now)
+        return data
+
+    def _register_access(self, key: Optional[str], released: list, now: float) -> None:
+        """Grava o último acesso e a referência deste processo e libera as referências descartadas"""
+        pid = str(os.getpid())
+        with self._locked_index() as index:
+            if key in index:
+                index[key]['last_access'] = now
+                index[key]['refs'][pid] = 1
+            for released_key in released:
+                if released_key in index:
+                    index[released_key]['refs'].pop(pid, None)
+        if not self._exit_registered:
+            self._exit_registered = True
+            atexit.register(self.close)
+
+    def release(self, key: str) -> None:
+        """Libera a referência deste processo ao dataset"""
+        with self._thread_lock:
+            self._attached.pop(key, None)
+        with self._locked_index() as index:
+            if key in index:
+                index[key]['refs'].pop(str(os.getpid()), None)
+
+    def close(self) -> None:
+        """Libera as referências de todos os datasets mapeados por este processo"""
+        with self._thread_lock:
+            keys = list(self._attached)
+            self._attached.clear()
+        if not keys:
+            return
+        pid = str(os.getpid())
+        try:
+            with self._locked_index() as index:
+                for key in keys:
+                    if key in index:
+                        index[key]['refs'].pop(pid, None)
+        except OSError as e:
+            # Diretório removido: não há referências a liberar
+            logging.debug(f"Registro de datasets indisponível ao liberar referências: {e}")
+
+    def delete(self, key: str) -> None:
+        """Remove o dataset do registro"""
+        with self._thread_lock:
+            self._attached.pop(key, None)
+        with self._locked_index() as index:
+            entry = index.pop(key, None)
+            if entry is not None:
+                self._unlink(entry)
+
+    def _unlink(self, entry: Dict[str, Any]) -> None:
+        # Processos com o arquivo mapeado continuam com a visão válida (POSIX)
+        try:
+            os.remove(os.path.join(self.directory, entry['file']))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self, index: Dict[str, Any], keep: Optional[str] = None) -> None:
+        """Descarta datasets menos usados até caber no orçamento"""
+        for key in [k for k, entry in index.items()
+                    if not os.path.exists(os.path.join(self.directory, entry['file']))]:
+            index.pop(key)
+        for entry in index.values():
+            entry['refs'] = {pid: n for pid, n in entry['refs'].items() if _pid_alive(int(pid))}
+
+        total = sum(entry['bytes'] for entry in index.values())
+        # Primeiro os que nenhum worker usa; depois os demais, do menos recente ao mais recente
+        candidates = sorted(
+            (key for key in index if key != keep),
+            key=lambda k: (bool(index[k]['refs']), index[k]['last_access'])
+        )
+        for key in candidates:
+            if total <= self.max_bytes:
+                break
+            entry = index.pop(key)
+            total -= entry['bytes']
+            self._unlink(entry)
+
+    def clear(self) -> None:
+        """Remove todos os datasets do registro"""
+        with self._locked_index() as index:
+            for entry in index.values():
+                self._unlink(entry)
+            index.clear()
+            self._attached.clear()
+
+    def total_bytes(self) -> int:
+        """Bytes ocupados pelos snapshots registrados"""
+        return sum(entry['bytes'] for entry in self._read_index().values())
+
+
+class SharedMemoryBackend:
+    """
+    Backend do armazenamento de sessões sobre o registro compartilhado
+
+    DataFrames vão para snapshots Arrow; o estado das sessões (pequeno) é
+    gravado como arquivos pickle no mesmo diretório, visível a todos os workers
+    e fora do orçamento dos snapshots. Estados sem leitura nem gravação há mais
+    de ``state_ttl`` segundos são removidos.
+    """
+
+    # O estado das sessões não disputa o orçamento com os datasets
+    separate_session_state = True
+
+    def __init__(self, registry: Optional[SharedDatasetRegistry] = None,
+                 state_ttl: Optional[float] = None):
+        self.registry = registry or SharedDatasetRegistry()
+        self.state_ttl = state_ttl if state_ttl is not None else Config.SESSION_STATE_TTL
+        self._state_dir = os.path.join(self.registry.directory, 'state')
+        self._local: Dict[str, Any] = {}
+        self._state_lock = threading.RLock()
+        self._last_cleanup = 0.0
+        os.makedirs(self._state_dir, exist_ok=True)
+
+    def _state_path(self, key: str) -> str:
+        return os.path.join(self._state_dir, f'{_file_id(key)}.pkl')
+
+    def _read_state(self, key: str) -> Any:
+        path = self._state_path(key)
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+                modified = os.fstat(f.fileno()).st_mtime
+        except (FileNotFoundError, EOFError):
+            return None
+        # Sessões apenas lidas continuam válidas: renova a data sem regravar
+        if time.time() - modified > _STATE_CLEANUP_SECONDS:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+        return state
+
+    def cleanup_state(self, force: bool = False) -> int:
+        """
+        Remove o estado de sessões expiradas (executa no máximo a cada alguns minutos)
+
+        Args:
+            force: Ignora o intervalo mínimo entre limpezas
+
+        Returns:
+            int: Arquivos removidos
+        """
+        now = time.time()
+        if not force and now - self._last_cleanup < _STATE_CLEANUP_SECONDS:
+            return 0
+        self._last_cleanup = now
+        removed = 0
+        for entry in os.scandir(self._state_dir):
+            if entry.name == _LOCK_FILE:
+                continue
+            try:
+                if now - entry.stat().st_mtime > self.state_ttl:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    @contextmanager
+    def _locked_state(self):
+        """Lock exclusivo entre processos para leitura e gravação do estado"""
+        with self._state_lock:
+            with open(os.path.join(self._state_dir, _LOCK_FILE), 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get(self, key: str) -> Any:
+        state = self._read_state(key)
+        if state is not None:
+            return state
+        data = self.registry.attach(key)
+        if data is not None:
+            return data
+        return self._local.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        if isinstance(value, pd.DataFrame):
+            if self.registry.publish(key, value):
+                self._local.pop(key, None)
+            else:
+                # Dataset não representável em Arrow: fica apenas neste worker
+                self._local[key] = value
+            return
+
+        self._write_state(key, value)
+
+    def _write_state(self, key: str, value: Any) -> None:
+        path = self._state_path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.cleanup_state()
+
+    def update(self, key: str, fn: Callable[[Any], Any]) -> Any:
+        """Aplica fn ao estado atual e grava o resultado sob lock entre processos (None não grava)"""
+        with self._locked_state():
+            value = fn(self._read_state(key))
+            if value is not None:
+                self._write_state(key, value)
+            return value
+
+    def delete(self, key: str) -> None:
+        self.registry.delete(key)
+        self._local.pop(key, None)
+        try:
+            os.remove(self._state_path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        self.registry.clear()
+        self._local.clear()
+        for name in os.listdir(self._state_dir):
+            if name != _LOCK_FILE:
+                os.remove(os.path.join(self._state_dir, name))
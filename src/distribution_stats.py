@@ -0,0 +1,151 @@
+"""
+Estatísticas de distribuição por grupo para Boxplot e Violino
+
+Calcula quartis, cercas, outliers amostrados e uma KDE por categoria sem
+repassar as linhas brutas para o Seaborn. Os quartis vêm de um sketch de
+histograma de largura fixa (exatos para bases pequenas) e a KDE é avaliada
+sobre o histograma binado, então o custo de desenho depende apenas do
+número de grupos.
+"""
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+# Até este número de linhas os quartis são calculados de forma exata
+EXACT_QUANTILE_MAX_ROWS = 200_000
+
+# Resolução do sketch de histograma usado para quartis e KDE
+SKETCH_BINS = 2048
+
+# Pontos de avaliação da KDE em cada violino
+KDE_POINTS = 100
+
+# Máximo de outliers enviados para o desenho em cada grupo
+MAX_OUTLIERS_PER_GROUP = 50
+
+
+def _sketch_quantiles(counts: np.ndarray, lo: float, width: float, q: float) -> np.ndarray:
+    """Estima o quantil q de cada linha da matriz de contagens (grupos x bins)"""
+    cumulative = counts.cumsum(axis=1)
+    totals = cumulative[:, -1]
+    target = q * totals
+
+    # Primeiro bin cuja contagem acumulada alcança o alvo
+    bin_index = np.argmax(cumulative >= target[:, None], axis=1)
+    rows = np.arange(len(counts))
+    previous = np.where(bin_index > 0, cumulative[rows, bin_index - 1], 0)
+    in_bin = counts[rows, bin_index]
+    fraction = np.divide(target - previous, in_bin, out=np.zeros(len(counts)), where=in_bin > 0)
+
+    return lo + (bin_index + fraction) * width
+
+
+def _binned_kde(counts: np.ndarray, centers: np.ndarray, bandwidth: float,
+                grid: np.ndarray) -> np.ndarray:
+    """Avalia uma KDE gaussiana sobre contagens binadas"""
+    total = counts.sum()
+    occupied = counts > 0
+    if total == 0 or not occupied.any():
+        return np.zeros_like(grid)
+
+    # Apenas bins ocupados entram no somatório
+    z = (grid[:, None] - centers[occupied][None, :]) / bandwidth
+    weights = counts[occupied][None, :]
+    density = (weights * np.exp(-0.5 * z * z)).sum(axis=1)
+    return density / (total * bandwidth * np.sqrt(2 * np.pi))
+
+
+def compute_group_stats(data: pd.DataFrame, x_col: str, y_col: str,
+                        max_outliers: int = MAX_OUTLIERS_PER_GROUP,
+                        kde_points: int = KDE_POINTS,
+                        random_state: Optional[int] = 0) -> List[Dict[str, Any]]:
+    """
+    Calcula estatísticas de Boxplot e Violino para cada categoria de x_col
+
+    Args:
+        data: DataFrame com os dados
+        x_col: Coluna categórica de agrupamento
+        y_col: Coluna numérica analisada
+        max_outliers: Máximo de outliers amostrados por grupo
+        kde_points: Número de pontos de avaliação da KDE
+        random_state: Semente da amostragem de outliers
+
+    Returns:
+        List[Dict[str, Any]]: Um dicionário por grupo com label, count, mean,
+        q1, med, q3, whislo, whishi, fliers, min, max, kde_coords e kde_vals
+    """
+    values = pd.to_numeric(data[y_col], errors='coerce')
+    valid = values.notna() & data[x_col].notna()
+    if not valid.any():
+        return []
+
+    codes, labels = pd.factorize(data[x_col][valid], sort=True)
+    values = values[valid].to_numpy(dtype=float)
+    n_groups = len(labels)
+
+    grouped = pd.Series(values).groupby(codes)
+    counts_per_group = grouped.size().to_numpy()
+    means = grouped.mean().to_numpy()
+    stds = grouped.std(ddof=1).fillna(0).to_numpy()
+    mins = grouped.min().to_numpy()
+    maxs = grouped.max().to_numpy()
+
+    # Sketch: histograma de largura fixa por grupo em uma única passagem
+    lo, hi = float(values.min()), float(values.max())
+    width = (hi - lo) / SKETCH_BINS if hi > lo else 1.0 / SKETCH_BINS
+    bin_index = np.minimum(((values - lo) / width).astype(np.int64), SKETCH_BINS - 1)
+    counts = np.bincount(codes * SKETCH_BINS + bin_index,
+                         minlength=n_groups * SKETCH_BINS).reshape(n_groups, SKETCH_BINS)
+
+    if len(values) <= EXACT_QUANTILE_MAX_ROWS:
+        quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+        q1, med, q3 = (quartiles[q].to_numpy() for q in (0.25, 0.5, 0.75))
+    else:
+        q1, med, q3 = (np.clip(_sketch_quantiles(counts, lo, width, q), mins, maxs)
+                       for q in (0.25, 0.5, 0.75))
+
+    # Cercas de Tukey e bigodes (valores extremos dentro das cercas)
+    iqr = q3 - q1
+    lower_fence = q1 - 1.5 * iqr
+    upper_fence = q3 + 1.5 * iqr
+    inside = (values >= lower_fence[codes]) & (values <= upper_fence[codes])
+
+    inside_grouped = pd.Series(values[inside]).groupby(codes[inside])
+    whislo = inside_grouped.min().reindex(range(n_groups)).fillna(pd.Series(q1)).to_numpy()
+    whishi = inside_grouped.max().reindex(range(n_groups)).fillna(pd.Series(q3)).to_numpy()
+
+    # Outliers amostrados por grupo
+    rng = np.random.default_rng(random_state)
+    outlier_positions = np.flatnonzero(~inside)
+    outlier_positions = outlier_positions[np.argsort(codes[outlier_positions], kind='stable')]
+    split_points = np.searchsorted(codes[outlier_positions], np.arange(1, n_groups))
+    fliers = []
+    for positions in np.split(outlier_positions, split_points):
+        if len(positions) > max_outliers:
+            positions = rng.choice(positions, size=max_outliers, replace=False)
+        fliers.append(values[positions])
+
+    centers = lo + (np.arange(SKETCH_BINS) + 0.5) * width
+    stats = []
+    for g in range(n_groups):
+        # Largura de banda pela regra de Silverman, nunca menor que um bin
+        bandwidth = max(1.06 * stds[g] * counts_per_group[g] ** (-1 / 5), width)
+        grid = np.linspace(mins[g], maxs[g], kde_points)
+
+        stats.append({
+            'label': str(labels[g]),
+            'count': int(counts_per_group[g]),
+            'mean': float(means[g]),
+            'q1': float(q1[g]),
+            'med': float(med[g]),
+            'q3': float(q3[g]),
+            'whislo': float(whislo[g]),
+            'whishi': float(whishi[g]),
+            'fliers': fliers[g],
+            'min': float(mins[g]),
+            'max': float(maxs[g]),
+            'kde_coords': grid,
+            'kde_vals': _binned_kde(counts[g], centers, bandwidth, grid),
+        })
+
+    return stats
@@ -0,0 +1,217 @@
+"""
+Serviço de exportação de gráficos em lote para o dataGPT
+
+Renderiza saídas do ChartGenerator em PNG/SVG/PDF usando um pool de workers
+e mantém um cache de imagens por hash da figura. Gráficos Matplotlib são
+renderizados pelo serviço de renderização (Agg, sem interface gráfica);
+figuras Plotly usam o Kaleido, que roda localmente sem navegador externo.
+"""
+import io
+import hashlib
+import logging
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import pandas as pd
+import plotly.io as pio
+from config import Config
+from src.cache_keys import hash_payload
+from src.chart_generator import chart_generator
+from src.render_service import SUPPORTED_IMAGE_FORMATS
+from src.serialization import figure_to_json
+
+try:
+    import kaleido  # noqa: F401
+    KALEIDO_AVAILABLE = True
+except ImportError:
+    KALEIDO_AVAILABLE = False
+    logging.warning("Kaleido não disponível. Instale com: pip install kaleido==0.2.1")
+
+# Parâmetros do ChartGenerator que não alteram a imagem
+_NON_VISUAL_CONFIG_KEYS = ('dataset_key', 'filter_state', 'image_format')
+
+
+def _hash_frame(data: pd.DataFrame) -> str:
+    """Hash do conteúdo de um DataFrame (valores, índice e colunas)"""
+    digest = hashlib.sha1(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    digest.update(repr(list(data.columns)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ExportService:
+    """Exportação de gráficos para imagens estáticas com cache por hash"""
+
+    def __init__(self, max_workers: Optional[int] = None, max_cache_mb: Optional[int] = None):
+        self.max_workers = max_workers or Config.EXPORT_MAX_WORKERS
+        self.max_cache_bytes = (max_cache_mb or Config.EXPORT_CACHE_MAX_MB) * 1024 * 1024
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        # O Kaleido usa um único subprocesso por interpretador
+        self._kaleido_lock = threading.Lock()
+
+    def _lookup(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def _store(self, key: str, image_bytes: bytes) -> None:
+        if len(image_bytes) > self.max_cache_bytes:
+            return
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = image_bytes
+            self._cache_bytes += len(image_bytes)
+            while self._cache_bytes > self.max_cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+
+    def export_figure(self, fig, image_format: str = 'png',
+                      scale: float = 1.0) -> Tuple[bool, Optional[bytes], Optional[str]]:
+        """
+        Exporta uma figura Plotly para imagem estática
+
+        Args:
+            fig: Figura do Plotly
+            image_format: Formato de saída ('png', 'svg' ou 'pdf')
+            scale: Fator de escala da imagem
+
+        Returns:
+            Tuple[bool, Optional[bytes], Optional[str]]: (success, image_bytes, error_message)
+        """
+        if image_format not in SUPPORTED_IMAGE_FORMATS:
+            return False, None, f"Formato de imagem '{image_format}' não suportado"
+        if not KALEIDO_AVAILABLE:
+            return False, None, "Exportação de gráficos Plotly requer o pacote kaleido"
+
+        try:
+            digest = hashlib.sha1(figure_to_json(fig).encode('utf-8'))
+            key = f'plotly:{digest.hexdigest()}:{image_format}:{scale}'
+            cached = self._lookup(key)
+            if cached is not None:
+                return True, cached, None
+
+            with self._kaleido_lock:
+                image_bytes = pio.to_image(fig, format=image_format, scale=scale, validate=False)
+            self._store(key, image_bytes)
+            return True, image_bytes, None
+
+        except Exception as e:
+            return False, None, f"Erro ao exportar gráfico: {str(e)}"
+
+    def export_chart(self, data: pd.DataFrame, x_col: str, y_col: str, chart_type: str,
+                     config: Optional[Dict[str, Any]] = None,
+                     image_format: str = 'png') -> Tuple[bool, Optional[bytes], Optional[str]]:
+        """
+        Gera um gráfico com o ChartGenerator e o exporta como imagem
+
+        Args:
+            data: DataFrame com os dados
+            x_col: Coluna do eixo X
+            y_col: Coluna do eixo Y
+            chart_type: Tipo de gráfico
+            config: Configurações do gráfico
+            image_format: Formato de saída ('png', 'svg' ou 'pdf')
+
+        Returns:
+            Tuple[bool, Optional[bytes], Optional[str]]: (success, image_bytes, error_message)
+        """
+        if image_format not in SUPPORTED_IMAGE_FORMATS:
+            return False, None, f"Formato de imagem '{image_format}' não suportado"
+
+        config = dict(config or {})
+        visual_config = {k: v for k, v in config.items() if k not in _NON_VISUAL_CONFIG_KEYS}
+        key = hash_payload(['chart', _hash_frame(data), x_col, y_col, chart_type, visual_config, image_format])
+        cached = self._lookup(key)
+        if cached is not None:
+            return True, cached, None
+
+        config['image_format'] = image_format
+        success, output, error = chart_generator.generate_chart(data, x_col, y_col, chart_type, config)
+        if not success:
+            return False, None, error
+
+        if not isinstance(output, bytes):
+            # Figura Plotly: cache próprio por hash da figura
+            return self.export_figure(output, image_format=image_format)
+
+        self._store(key, output)
+        return True, output, None
+
+    def export_batch(self, charts: List[Dict[str, Any]],
+                     image_format: str = 'png') -> Tuple[bool, List[Dict[str, Any]], Optional[str]]:
+        """
+        Exporta vários gráficos em paralelo
+
+        Cada item pode conter 'figure' (figura Plotly pronta) ou os parâmetros
+        do ChartGenerator ('data', 'x_col', 'y_col', 'chart_type', 'config'),
+        além de um 'name' opcional.
+
+        Args:
+            charts: Especificações dos gráficos
+            image_format: Formato de saída ('png', 'svg' ou 'pdf')
+
+        Returns:
+            Tuple[bool, List[Dict[str, Any]], Optional[str]]: (all_success, results, error_message)
+        """
+        def export_one(index: int, chart: Dict[str, Any]) -> Dict[str, Any]:
+            if 'figure' in chart:
+                success, image_bytes, error = self.export_figure(chart['figure'], image_format=image_format)
+            else:
+                success, image_bytes, error = self.export_chart(
+                    chart['data'], chart.get('x_col'), chart.get('y_col'),
+                    chart['chart_type'], chart.get('config'), image_format=image_format
+                )
+            return {
+                'name': chart.get('name') or f'grafico_{index + 1}',
+                'success': success,
+                'image': image_bytes,
+                'error': error
+            }
+
+        if not charts:
+            return True, [], None
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(charts)),
+                                thread_name_prefix='datagpt-export') as executor:
+            futures = [executor.submit(export_one, i, chart) for i, chart in enumerate(charts)]
+            results = [future.result() for future in futures]
+
+        failed = [r['name'] for r in results if not r['success']]
+        if failed:
+            return False, results, f"Falha ao exportar: {', '.join(failed)}"
+        return True, results, None
+
+    @staticmethod
+    def build_zip(results: List[Dict[str, Any]], image_format: str = 'png') -> bytes:
+        """
+        Empacota as imagens exportadas com sucesso em um arquivo ZIP
+
+        Args:
+            results: Resultados de export_batch
+            image_format: Extensão dos arquivos
+
+        Returns:
+            bytes: Conteúdo do arquivo ZIP
+        """
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for result in results:
+                if result['success']:
+                    archive.writestr(f"{result['name']}.{image_format}", result['image'])
+        return buffer.getvalue()
+
+    def clear(self) -> None:
+        """Limpa o cache de imagens"""
+        with self._lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+
+
+# Instância global do serviço de exportação
+export_service = ExportService()
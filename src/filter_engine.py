@@ -0,0 +1,169 @@
+"""
+Motor de filtros incremental dos dashboards
+
+Cada filtro de coluna vira uma máscara booleana guardada em cache por
+(dataset, coluna, valores). Quando o usuário altera um único filtro, apenas
+a máscara dessa coluna é recalculada; as demais são reaproveitadas e
+combinadas. Seleções que cobrem todos os valores da coluna são descartadas,
+de modo que estados equivalentes geram a mesma chave.
+
+A chave do dataset deve identificar o conteúdo (ex.: ``SessionStore.cache_key``,
+URL e versão), e não o objeto: os backends de sessão em disco e compartilhado
+e o ``st.cache_data`` devolvem um novo DataFrame a cada leitura.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import numpy as np
+import pandas as pd
+from config import Config
+from src.cache_keys import hash_payload, make_filter_key
+
+
+def _values_key(values) -> str:
+    """Chave de uma seleção de valores, independente da ordem"""
+    return hash_payload(sorted({str(value) for value in values}))
+
+
+class FilterEngine:
+    """Cache LRU de máscaras por coluna e dos últimos resultados filtrados"""
+
+    def __init__(self, max_cache_mb: Optional[int] = None, max_results: int = 4,
+                 max_unique_counts: int = 4096):
+        self.max_cache_bytes = (max_cache_mb or Config.FILTER_MASK_CACHE_MB) * 1024 * 1024
+        self.max_results = max_results
+        self.max_unique_counts = max_unique_counts
+        self._masks = OrderedDict()
+        self._mask_bytes = 0
+        self._results = OrderedDict()
+        self._unique_counts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _unique_count(self, data: pd.DataFrame, dataset_key: Optional[str], column: str) -> int:
+        if dataset_key is None:
+            return data[column].nunique(dropna=False)
+        key = (dataset_key, column)
+        if key in self._unique_counts:
+            self._unique_counts.move_to_end(key)
+        else:
+            self._unique_counts[key] = data[column].nunique(dropna=False)
+            while len(self._unique_counts) > self.max_unique_counts:
+                self._unique_counts.popitem(last=False)
+        return self._unique_counts[key]
+
+    def normalize(self, data: pd.DataFrame, filters: Optional[Dict[str, Any]],
+                  dataset_key: Optional[str] = None) -> Dict[str, list]:
+        """
+        Remove filtros sem efeito (vazios, colunas inexistentes ou seleção completa)
+
+        Args:
+            data: DataFrame sem filtros
+            filters: Dicionário coluna -> valores selecionados
+            dataset_key: Identificador do conteúdo do dataset (ex.: URL e versão)
+
+        Returns:
+            Dict[str, list]: Filtros efetivos
+        """
+        if data is None or not filters:
+            return {}
+
+        with self._lock:
+            normalized = {}
+            for column, values in filters.items():
+                if column not in data.columns or not values:
+                    continue
+                values = list(values) if isinstance(values, (list, tuple, set)) else [values]
+                if len({str(value) for value in values}) >= self._unique_count(data, dataset_key, column):
+                    continue
+                normalized[column] = values
+            return normalized
+
+    def _column_mask(self, data: pd.DataFrame, dataset_key: Optional[str],
+                     column: str, values: list) -> np.ndarray:
+        if dataset_key is None:
+            return data[column].isin(values).to_numpy()
+
+        key = (dataset_key, column, _values_key(values))
+        with self._lock:
+            if key in self._masks:
+                self._masks.move_to_end(key)
+                return self._masks[key]
+
+        mask = data[column].isin(values).to_numpy()
+        if mask.nbytes > self.max_cache_bytes:
+            return mask
+        with self._lock:
+            if key not in self._masks:
+                self._masks[key] = mask
+                self._mask_bytes += mask.nbytes
+                while self._mask_bytes > self.max_cache_bytes:
+                    _, evicted = self._masks.popitem(last=False)
+                    self._mask_bytes -= evicted.nbytes
+        return mask
+
+    def mask(self, data: pd.DataFrame, filters: Optional[Dict[str, Any]],
+             dataset_key: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        Máscara booleana das linhas que passam nos filtros
+
+        Args:
+            data: DataFrame sem filtros
+            filters: Dicionário coluna -> valores selecionados
+            dataset_key: Identificador do conteúdo do dataset; sem ele nada é guardado em cache
+
+        Returns:
+            Optional[np.ndarray]: Máscara por posição ou None se não houver filtros efetivos
+        """
+        filters = self.normalize(data, filters, dataset_key)
+        if not filters:
+            return None
+
+        mask = np.ones(len(data), dtype=bool)
+        for column, values in filters.items():
+            mask &= self._column_mask(data, dataset_key, column, values)
+        return mask
+
+    def apply(self, data: pd.DataFrame, filters: Optional[Dict[str, Any]],
+              dataset_key: Optional[str] = None) -> pd.DataFrame:
+        """
+        Aplica os filtros combinando máscaras por coluna em cache
+
+        Args:
+            data: DataFrame sem filtros
+            filters: Dicionário coluna -> valores selecionados
+            dataset_key: Identificador do conteúdo do dataset; sem ele nada é guardado em cache
+
+        Returns:
+            pd.DataFrame: Dados filtrados (o próprio DataFrame se não houver filtros efetivos)
+        """
+        filters = self.normalize(data, filters, dataset_key)
+        if not filters:
+            return data
+
+        result_key = (dataset_key, make_filter_key(filters))
+        if dataset_key is not None:
+            with self._lock:
+                if result_key in self._results:
+                    self._results.move_to_end(result_key)
+                    return self._results[result_key]
+
+        filtered = data[self.mask(data, filters, dataset_key)]
+
+        if dataset_key is not None:
+            with self._lock:
+                self._results[result_key] = filtered
+                while len(self._results) > self.max_results:
+                    self._results.popitem(last=False)
+        return filtered
+
+    def clear(self) -> None:
+        """Limpa todos os caches"""
+        with self._lock:
+            self._masks.clear()
+            self._mask_bytes = 0
+            self._results.clear()
+            self._unique_counts.clear()
+
+
+# Instância global do motor de filtros
+filter_engine = FilterEngine()
@@ -0,0 +1,190 @@
+"""
+Motor de histogramas do dataGPT
+
+Calcula bordas e contagens em uma única passagem vetorizada (ou de forma
+incremental para dados em blocos) e mantém um cache por coluna, número de
+bins e estado de filtros. O mesmo resultado alimenta os renderizadores
+Matplotlib e Plotly e os rótulos de totais.
+"""
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+import numpy as np
+import pandas as pd
+from src.cache_keys import make_filter_key
+
+DEFAULT_BINS = 30
+
+
+def _finite_values(values) -> np.ndarray:
+    """Converte para float e descarta nulos e infinitos"""
+    array = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+    return array[np.isfinite(array)]
+
+
+def compute_histogram(values, bins: int = DEFAULT_BINS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcula contagens e bordas do histograma em uma única passagem
+
+    Args:
+        values: Valores numéricos (Series, array ou lista)
+        bins: Número de bins
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (counts, edges)
+    """
+    counts, edges = np.histogram(_finite_values(values), bins=bins)
+    return counts, edges
+
+
+class StreamingHistogram:
+    """
+    Histograma incremental para dados em blocos
+
+    Mantém um número fixo de bins de largura uniforme. Quando um bloco traz
+    valores fora do intervalo atual, a largura dos bins dobra (somando pares
+    adjacentes) até cobrir os novos valores, sem revisitar blocos anteriores.
+    """
+
+    def __init__(self, bins: int = DEFAULT_BINS):
+        # Número par de bins para permitir a fusão de pares
+        self.bins = bins + (bins % 2)
+        self.counts = np.zeros(self.bins, dtype=np.int64)
+        self.lo = None
+        self.width = None
+
+    @property
+    def edges(self) -> np.ndarray:
+        """Bordas atuais dos bins"""
+        return self.lo + self.width * np.arange(self.bins + 1)
+
+    def _grow(self, upward: bool) -> None:
+        """Dobra a largura dos bins expandindo o intervalo para cima ou para baixo"""
+        merged = self.counts.reshape(-1, 2).sum(axis=1)
+        empty = np.zeros(self.bins // 2, dtype=np.int64)
+        if upward:
+            self.counts = np.concatenate([merged, empty])
+        else:
+            self.counts = np.concatenate([empty, merged])
+            self.lo -= self.width * self.bins
+        self.width *= 2
+
+    def update(self, values) -> None:
+        """Acumula um bloco de valores"""
+        array = _finite_values(values)
+        if array.size == 0:
+            return
+
+        low, high = float(array.min()), float(array.max())
+        if self.lo is None:
+            self.lo = low
+            self.width = (high - low) / self.bins if high > low else 1.0
+
+        while low < self.lo:
+            self._grow(upward=False)
+        while high >= self.lo + self.width * self.bins:
+            self._grow(upward=True)
+
+        index = np.minimum(((array - self.lo) / self.width).astype(np.int64), self.bins - 1)
+        self.counts += np.bincount(index, minlength=self.bins)
+
+    def result(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Retorna (counts, edges) recortando bins vazios nas extremidades"""
+        if self.lo is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(1)
+
+        occupied = np.flatnonzero(self.counts)
+        first, last = occupied[0], occupied[-1] + 1
+        return self.counts[first:last].copy(), self.edges[first:last + 1]
+
+
+class HistogramEngine:
+    """Cache LRU de histogramas por (dataset, coluna, bins, estado de filtros)"""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def _store(self, key, result) -> None:
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def get_histogram(self, values, bins: int = DEFAULT_BINS, column: Optional[str] = None,
+                      dataset_key: Optional[str] = None,
+                      filter_state: Optional[dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Retorna o histograma dos valores, usando o cache quando identificado
+
+        Args:
+            values: Valores da coluna (já filtrados)
+            bins: Número de bins
+            column: Nome da coluna
+            dataset_key: Identificador do dataset (ex.: URL de origem)
+            filter_state: Filtros aplicados aos valores
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (counts, edges)
+        """
+        if dataset_key is None or column is None:
+            return compute_histogram(values, bins)
+
+        key = (dataset_key, column, bins, make_filter_key(filter_state))
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        result = compute_histogram(values, bins)
+        self._store(key, result)
+        return result
+
+    def get_streaming_histogram(self, chunks: Iterable, bins: int = DEFAULT_BINS,
+                                column: Optional[str] = None, dataset_key: Optional[str] = None,
+                                filter_state: Optional[dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Retorna o histograma de dados em blocos, percorrendo cada bloco uma vez
+
+        Args:
+            chunks: Iterável de blocos de valores
+            bins: Número de bins
+            column: Nome da coluna
+            dataset_key: Identificador do dataset
+            filter_state: Filtros aplicados aos valores
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (counts, edges)
+        """
+        key = None
+        if dataset_key is not None and column is not None:
+            key = (dataset_key, column, bins, make_filter_key(filter_state), 'stream')
+            cached = self._lookup(key)
+            if cached is not None:
+                return cached
+
+        histogram = StreamingHistogram(bins)
+        for chunk in chunks:
+            histogram.update(chunk)
+        result = histogram.result()
+
+        if key is not None:
+            self._store(key, result)
+        return result
+
+    def clear(self) -> None:
+        """Limpa o cache de histogramas"""
+        with self._lock:
+            self._cache.clear()
+
+
+# Instância global do motor de histogramas
+histogram_engine = HistogramEngine()
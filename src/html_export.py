@@ -0,0 +1,117 @@
+"""
+Exportação HTML enxuta de gráficos Plotly para o dataGPT
+
+Escreve o HTML diretamente em um stream de bytes, com a biblioteca plotly.js
+referenciada por CDN, por um arquivo local compartilhado ou embutida uma
+única vez no arquivo, mesmo quando o relatório contém várias figuras.
+"""
+import io
+import os
+import html
+import json
+import uuid
+from typing import BinaryIO, Optional, Sequence
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+from config import Config
+from src.serialization import figure_to_json
+
+ASSET_MODES = ('cdn', 'local', 'inline')
+
+_PLOTLY_CONFIG = json.dumps({'responsive': True})
+
+
+def _plotlyjs_tag(asset_mode: str, asset_url: Optional[str]) -> str:
+    """Monta a tag <script> que carrega o plotly.js conforme a estratégia"""
+    if asset_mode == 'cdn':
+        src = f'https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js'
+        return f'<script src="{src}" charset="utf-8"></script>\n'
+    if asset_mode == 'local':
+        src = html.escape(asset_url or Config.HTML_EXPORT_PLOTLYJS_URL, quote=True)
+        return f'<script src="{src}" charset="utf-8"></script>\n'
+    return f'<script type="text/javascript">{get_plotlyjs()}</script>\n'
+
+
+def write_figures_html(figures: Sequence, stream: BinaryIO, titles: Optional[Sequence[str]] = None,
+                       asset_mode: Optional[str] = None, asset_url: Optional[str] = None,
+                       report_title: Optional[str] = None) -> None:
+    """
+    Escreve uma ou mais figuras Plotly como HTML em um stream binário
+
+    Args:
+        figures: Figuras Plotly
+        stream: Stream binário de destino (arquivo ou BytesIO)
+        titles: Títulos exibidos acima de cada figura (opcional)
+        asset_mode: 'cdn', 'local' ou 'inline' (padrão: Config.HTML_EXPORT_ASSET_MODE)
+        asset_url: URL do plotly.js compartilhado quando asset_mode='local'
+        report_title: Título da página
+    """
+    asset_mode = asset_mode or Config.HTML_EXPORT_ASSET_MODE
+    if asset_mode not in ASSET_MODES:
+        raise ValueError(f"Estratégia de assets '{asset_mode}' não suportada")
+
+    def write(text: str) -> None:
+        stream.write(text.encode('utf-8'))
+
+    write('<html>\n<head><meta charset="utf-8" />\n')
+    if report_title:
+        write(f'<title>{html.escape(report_title)}</title>\n')
+    write(_plotlyjs_tag(asset_mode, asset_url))
+    write('</head>\n<body>\n')
+
+    for index, fig in enumerate(figures):
+        div_id = uuid.uuid4().hex
+        if titles and index < len(titles) and titles[index]:
+            write(f'<h2>{html.escape(titles[index])}</h2>\n')
+
+        # "</" é escapado para que o JSON não encerre a tag <script>
+        figure_json = figure_to_json(fig).replace('</', '<\\/')
+        write(f'<div id="{div_id}" class="plotly-graph-div" style="height:100%; width:100%;"></div>\n')
+        write('<script type="text/javascript">\n')
+        write(f'var figure = {figure_json};\n')
+        write(f'Plotly.newPlot("{div_id}", figure.data, figure.layout, {_PLOTLY_CONFIG});\n')
+        write('</script>\n')
+
+    write('</body>\n</html>\n')
+
+
+def figures_to_html_bytes(figures: Sequence, titles: Optional[Sequence[str]] = None,
+                          asset_mode: Optional[str] = None, asset_url: Optional[str] = None,
+                          report_title: Optional[str] = None) -> bytes:
+    """
+    Exporta figuras Plotly para HTML e retorna os bytes
+
+    Args:
+        figures: Figuras Plotly
+        titles: Títulos de cada figura (opcional)
+        asset_mode: 'cdn', 'local' ou 'inline'
+        asset_url: URL do plotly.js compartilhado quando asset_mode='local'
+        report_title: Título da página
+
+    Returns:
+        bytes: Documento HTML
+    """
+    buffer = io.BytesIO()
+    write_figures_html(figures, buffer, titles=titles, asset_mode=asset_mode,
+                       asset_url=asset_url, report_title=report_title)
+    return buffer.getvalue()
+
+
+def write_plotlyjs_asset(directory: str, filename: str = 'plotly.min.js') -> str:
+    """
+    Grava o plotly.js compartilhado usado pelo modo 'local'
+
+    O arquivo só é escrito se ainda não existir.
+
+    Args:
+        directory: Diretório de destino
+        filename: Nome do arquivo
+
+    Returns:
+        str: Caminho do arquivo
+    """
+    path = os.path.join(directory, filename)
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+    return path
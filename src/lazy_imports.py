@@ -0,0 +1,83 @@
+"""
+Importação sob demanda de bibliotecas pesadas
+
+Streamlit, OpenAI, Supabase e plotly.express levam centenas de milissegundos
+para importar. Os módulos de ``src`` não dependem de nenhum framework na
+importação: bibliotecas pesadas são carregadas no primeiro uso e os recursos
+do Streamlit só são aplicados quando o código roda dentro de um app
+Streamlit. Isso reduz o cold start das funções serverless (``api/``) e o boot
+dos workers Dash.
+"""
+import functools
+import importlib
+import importlib.util
+import threading
+from typing import Callable
+
+
+def is_available(name: str) -> bool:
+    """
+    Verifica se um módulo pode ser importado, sem importá-lo
+
+    Args:
+        name: Nome do módulo (ex.: 'openai')
+
+    Returns:
+        bool: True se o módulo estiver instalado
+    """
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule:
+    """Módulo importado apenas no primeiro acesso a um de seus atributos"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = 'carregado' if self._module is not None else 'não carregado'
+        return f"<LazyModule '{self._name}' ({state})>"
+
+
+def streamlit_cache_data(func: Callable) -> Callable:
+    """
+    Equivalente a ``@st.cache_data`` aplicado no primeiro uso
+
+    O Streamlit só é importado quando a função é chamada; sem ele instalado a
+    função é executada diretamente, sem cache.
+
+    Args:
+        func: Função a ser armazenada em cache
+
+    Returns:
+        Callable: Função decorada
+    """
+    cached = None
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        nonlocal cached
+        if cached is None:
+            try:
+                import streamlit as st
+                cached = st.cache_data(func)
+            except ImportError:
+                cached = func
+        return cached(*args, **kwargs)
+
+    return wrapper
@@ -1,25 +1,34 @@
 """
 Cliente OpenAI para o dataGPT v2.6
 """
-import openai
 import pandas as pd
 from typing import Dict, Any, Optional, Tuple
-import streamlit as st
 from config import Config
+from src.lazy_imports import is_available
+
+# O pacote openai só é importado quando o cliente é usado pela primeira vez
+OPENAI_AVAILABLE = is_available('openai')
 
 class OpenAIClient:
     """Cliente para comunicação com a API da OpenAI"""
     
     def __init__(self):
         self.config = Config()
-        self.client = None
-        self._initialize_client()
+        self._client = None
+    
+    @property
+    def client(self):
+        """Cliente OpenAI, criado no primeiro uso (None sem chave API)"""
+        if self._client is None:
+            self._initialize_client()
+        return self._client
     
     def _initialize_client(self):
         """Inicializa o cliente OpenAI"""
-        if self.config.OPENAI_API_KEY:
+        if self.config.OPENAI_API_KEY and OPENAI_AVAILABLE:
+            import openai
             openai.api_key = self.config.OPENAI_API_KEY
-            self.client = openai.OpenAI(api_key=self.config.OPENAI_API_KEY)
+            self._client = openai.OpenAI(api_key=self.config.OPENAI_API_KEY)
     
     def analyze_data(self, prompt: str, data: pd.DataFrame, chart_info: Dict[str, Any]) -> Tuple[bool, Optional[str], Optional[str]]:
         """
@@ -113,7 +122,7 @@ Mantenha a análise clara, objetiva e útil para tomada de decisões.
     
     def is_available(self) -> bool:
         """Verifica se o cliente OpenAI está disponível"""
-        return self.client is not None and self.config.OPENAI_API_KEY is not None
+        return OPENAI_AVAILABLE and bool(self.config.OPENAI_API_KEY)
 
 # Instância global do cliente OpenAI
 openai_client = OpenAIClient()
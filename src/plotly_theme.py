@@ -0,0 +1,153 @@
+"""
+Tema Plotly do Lucrax.ai
+
+O layout escuro compartilhado pelos dashboards é registrado uma única vez em
+``plotly.io.templates`` e referenciado pelo nome. Nos apps Dash o template
+não viaja em cada figura: o cliente o aplica a partir de um asset estático
+(``assets/lucrax_theme.js``), servido com cache pelo navegador.
+"""
+import json
+from typing import Optional
+import plotly.io as pio
+import plotly.graph_objects as go
+
+THEME_NAME = 'lucrax_dark'
+
+# Namespace do asset JavaScript que aplica o tema no cliente
+CLIENTSIDE_NAMESPACE = 'lucrax_theme'
+
+_AXIS_STYLE = {
+    'gridcolor': '#374151',
+    'linecolor': '#6b7280',
+    'tickfont': {'color': '#9ca3af'},
+    'title': {'font': {'color': '#ffffff'}},
+}
+
+THEME_LAYOUT = {
+    'plot_bgcolor': 'rgba(0,0,0,0)',
+    'paper_bgcolor': 'rgba(0,0,0,0)',
+    'font': {'color': 'white', 'size': 12},
+    'title': {'font': {'size': 16, 'color': 'white'}},
+    'margin': {'l': 60, 'r': 60, 't': 80, 'b': 60},
+    'xaxis': _AXIS_STYLE,
+    'yaxis': _AXIS_STYLE,
+    'legend': {'bgcolor': 'rgba(0,0,0,0)', 'font': {'color': 'white'}},
+}
+
+
+def build_template() -> go.layout.Template:
+    """Monta o template do tema escuro"""
+    return go.layout.Template(layout=THEME_LAYOUT)
+
+
+def register_theme() -> str:
+    """
+    Registra o tema em plotly.io.templates (apenas na primeira chamada)
+
+    Returns:
+        str: Nome do template registrado
+    """
+    if THEME_NAME not in pio.templates:
+        pio.templates[THEME_NAME] = build_template()
+    return THEME_NAME
+
+
+def apply_theme(fig: go.Figure, client_side: bool = False, **layout) -> go.Figure:
+    """
+    Aplica o tema a uma figura, com ajustes específicos do gráfico
+
+    Args:
+        fig: Figura do Plotly
+        client_side: Se True, a figura leva apenas o template vazio 'none' e
+            o tema é aplicado no navegador (ver themed_graph)
+        **layout: Propriedades de layout próprias do gráfico (título, altura...)
+
+    Returns:
+        go.Figure: A própria figura
+    """
+    fig.update_layout(template='none' if client_side else THEME_NAME, **layout)
+    return fig
+
+
+def theme_asset_source() -> str:
+    """Conteúdo do asset JavaScript que aplica o tema nos apps Dash"""
+    template_json = json.dumps(build_template().to_plotly_json(), sort_keys=True)
+    return (
+        "// Gerado por src/plotly_theme.py (theme_asset_source). Não editar manualmente.\n"
+        f"window.LUCRAX_PLOTLY_TEMPLATE = {template_json};\n"
+        "window.dash_clientside = Object.assign({}, window.dash_clientside, {\n"
+        f"    {CLIENTSIDE_NAMESPACE}: {{\n"
+        "        apply: function(figure) {\n"
+        "            if (!figure) {\n"
+        "                return window.dash_clientside.no_update;\n"
+        "            }\n"
+        "            var layout = Object.assign({}, figure.layout, {template: window.LUCRAX_PLOTLY_TEMPLATE});\n"
+        "            return Object.assign({}, figure, {layout: layout});\n"
+        "        }\n"
+        "    }\n"
+        "});\n"
+    )
+
+
+def figure_store_id(name: str) -> dict:
+    """ID do dcc.Store que guarda a figura (sem tema) de um gráfico"""
+    return {'type': 'themed-figure', 'index': name}
+
+
+def themed_graph(name: str, fig: Optional[go.Figure] = None, style: dict = None):
+    """
+    Cria um dcc.Graph cujo tema é aplicado no cliente
+
+    A figura (sem template) vai para um dcc.Store; um callback clientside
+    (ver register_theme_callback) copia a figura para o gráfico já com o tema.
+    Sem figura, o gráfico fica vazio até um callback preencher o Store.
+
+    Args:
+        name: Identificador único do gráfico na página
+        fig: Figura criada com apply_theme(..., client_side=True)
+        style: Estilo do componente dcc.Graph
+
+    Returns:
+        html.Div: Store e gráfico
+    """
+    from dash import dcc, html
+
+    return html.Div([
+        dcc.Store(id=figure_store_id(name), data=fig.to_plotly_json() if fig is not None else None),
+        dcc.Graph(id={'type': 'themed-graph', 'index': name}, style=style or {})
+    ])
+
+
+def figure_data_patch(fig: go.Figure):
+    """
+    Atualização parcial que substitui apenas os traces da figura armazenada
+
+    Usada quando só os dados mudam (ex.: filtros): layout e configuração já
+    estão no cliente e não são reenviados.
+
+    Args:
+        fig: Figura recalculada
+
+    Returns:
+        dash.Patch: Atualização para o dcc.Store da figura
+    """
+    from dash import Patch
+
+    patch = Patch()
+    patch['data'] = fig.to_plotly_json()['data']
+    return patch
+
+
+def register_theme_callback(app) -> None:
+    """Registra no app Dash o callback clientside que aplica o tema"""
+    from dash import Input, Output, MATCH, ClientsideFunction
+
+    app.clientside_callback(
+        ClientsideFunction(namespace=CLIENTSIDE_NAMESPACE, function_name='apply'),
+        Output({'type': 'themed-graph', 'index': MATCH}, 'figure'),
+        Input({'type': 'themed-figure', 'index': MATCH}, 'data')
+    )
+
+
+# Registro único por processo
+register_theme()
@@ -1,6 +1,5 @@
 import plotly.express as px
-import plotly.io as pio
-import io
+from src.html_export import figures_to_html_bytes
 
 
 def generate_plot(data, x_axis_col, y_axis_col, chart_type='Linha'):
@@ -35,7 +34,4 @@ def save_plot_as_html(fig):
     Returns:
     html_bytes: Gráfico em formato HTML.
     """
-    buffer = io.StringIO()
-    pio.write_html(fig, buffer)
-    html_bytes = buffer.getvalue().encode()
-    return html_bytes
+    return figures_to_html_bytes([fig])
@@ -0,0 +1,140 @@
+"""
+Serviço de renderização Matplotlib para o dataGPT
+
+Renderiza figuras em um pool de processos com backend Agg e devolve os
+bytes da imagem (PNG/SVG). As figuras são criadas pela API orientada a
+objetos do Matplotlib (sem pyplot), portanto não há estado global
+compartilhado entre sessões e cada figura é liberada logo após o render.
+"""
+import io
+import sys
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Tuple
+from config import Config
+
+SUPPORTED_IMAGE_FORMATS = ('png', 'svg', 'pdf')
+
+
+def _render_figure(draw_func: Callable, draw_kwargs: dict, image_format: str,
+                   figsize: Tuple[float, float], dpi: int) -> bytes:
+    """
+    Executa a função de desenho em uma figura nova e retorna os bytes
+
+    Roda dentro do processo worker. A figura nunca é registrada no pyplot,
+    então é descartada de forma determinística ao final.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    try:
+        ax = fig.add_subplot(111)
+        draw_func(fig, ax, **draw_kwargs)
+        fig.tight_layout()
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=image_format)
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+        del fig
+
+
+class RenderService:
+    """Pool de renderização de figuras Matplotlib com concorrência limitada"""
+
+    def __init__(self, max_workers: Optional[int] = None, backend: Optional[str] = None,
+                 timeout: Optional[float] = None):
+        self.max_workers = max_workers or Config.RENDER_MAX_WORKERS
+        self.backend = backend or Config.RENDER_BACKEND
+        self.timeout = timeout or Config.RENDER_TIMEOUT_SECONDS
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _create_executor(self):
+        """Cria o executor conforme o backend configurado"""
+        if self.backend == 'thread':
+            return ThreadPoolExecutor(max_workers=self.max_workers,
+                                      thread_name_prefix='datagpt-render')
+
+        # 'spawn' evita herdar threads e estado do pyplot do processo pai
+        kwargs = {
+            'max_workers': self.max_workers,
+            'mp_context': multiprocessing.get_context('spawn'),
+        }
+        if sys.version_info >= (3, 11):
+            # Recicla workers periodicamente para conter crescimento de memória
+            kwargs['max_tasks_per_child'] = Config.RENDER_MAX_TASKS_PER_CHILD
+        return ProcessPoolExecutor(**kwargs)
+
+    def _get_executor(self):
+        """Retorna o executor, criando-o na primeira utilização"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            return self._executor
+
+    def _reset_executor(self) -> None:
+        """Descarta um executor quebrado para que seja recriado"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def render(self, draw_func: Callable, image_format: str = 'png',
+               figsize: Tuple[float, float] = (10, 6), dpi: int = 100,
+               **draw_kwargs: Any) -> Tuple[bool, Optional[bytes], Optional[str]]:
+        """
+        Renderiza uma figura no pool e retorna os bytes da imagem
+
+        Args:
+            draw_func: Função de nível de módulo com assinatura (fig, ax, **kwargs)
+            image_format: Formato de saída ('png', 'svg' ou 'pdf')
+            figsize: Tamanho da figura em polegadas
+            dpi: Resolução da imagem
+            **draw_kwargs: Argumentos repassados para draw_func
+
+        Returns:
+            Tuple[bool, Optional[bytes], Optional[str]]: (success, image_bytes, error_message)
+        """
+        if image_format not in SUPPORTED_IMAGE_FORMATS:
+            return False, None, f"Formato de imagem '{image_format}' não suportado"
+
+        args = (draw_func, draw_kwargs, image_format, figsize, dpi)
+
+        for attempt in range(2):
+            try:
+                future = self._get_executor().submit(_render_figure, *args)
+                return True, future.result(timeout=self.timeout), None
+            except BrokenProcessPool:
+                logging.warning("Pool de renderização quebrado, recriando workers")
+                self._reset_executor()
+            except FutureTimeoutError:
+                future.cancel()
+                return False, None, "Tempo limite excedido ao renderizar gráfico"
+            except Exception as e:
+                return False, None, f"Erro ao renderizar gráfico: {str(e)}"
+
+        # Sem pool disponível: renderiza no próprio processo (a figura continua fora do pyplot)
+        logging.warning("Pool de renderização indisponível, renderizando no processo atual")
+        try:
+            return True, _render_figure(*args), None
+        except Exception as e:
+            return False, None, f"Erro ao renderizar gráfico: {str(e)}"
+
+    def shutdown(self) -> None:
+        """Encerra os workers do pool"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+# Instância global do serviço de renderização
+render_service = RenderService()
@@ -0,0 +1,190 @@
+"""
+Camada de respostas HTTP do servidor Flask dos apps Dash
+
+Registrada como ``after_request`` no ``app.server``, ela:
+
+- comprime com Brotli (quando disponível) ou gzip as respostas de texto/JSON
+  acima de ``Config.RESPONSE_COMPRESS_MIN_BYTES``, conforme o
+  ``Accept-Encoding`` do navegador (respostas de callbacks com dados de
+  figuras chegam a ficar 5-10x menores);
+- marca os recursos com fingerprint (bundles em ``_dash-component-suites``
+  com versão no nome e ``assets`` com ``?m=``) como imutáveis por um ano, com
+  ETag forte e corpo comprimido guardado em cache;
+- responde 304 às buscas repetidas do layout e das dependências quando o
+  ``If-None-Match`` coincide com o ETag do conteúdo.
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+from config import Config
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/javascript', 'text/javascript',
+    'text/css', 'text/html', 'text/plain', 'image/svg+xml',
+}
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Respostas do Dash buscadas a cada carregamento da página
+_REVALIDATED_ENDPOINTS = ('_dash-layout', '_dash-dependencies')
+
+
+def choose_encoding(accept_encodings) -> Optional[str]:
+    """
+    Escolhe a codificação da resposta a partir do Accept-Encoding
+
+    Args:
+        accept_encodings: Cabeçalho já interpretado (request.accept_encodings)
+
+    Returns:
+        Optional[str]: 'br', 'gzip' ou None
+    """
+    if BROTLI_AVAILABLE and accept_encodings.quality('br') > 0:
+        return 'br'
+    if accept_encodings.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+
+def compress_body(data: bytes, encoding: str) -> bytes:
+    """
+    Comprime o corpo de uma resposta
+
+    Args:
+        data: Corpo original
+        encoding: 'br' ou 'gzip'
+
+    Returns:
+        bytes: Corpo comprimido (determinístico, para manter o ETag estável)
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=Config.RESPONSE_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=Config.RESPONSE_GZIP_LEVEL, mtime=0)
+
+
+def _etag(data: bytes, encoding: Optional[str]) -> str:
+    """ETag forte do conteúdo; cada codificação é uma representação diferente"""
+    tag = hashlib.sha1(data).hexdigest()
+    return f"{tag}-{encoding}" if encoding else tag
+
+
+class ResponseLayer:
+    """Compressão, cache de recursos com fingerprint e respostas 304 para o servidor Flask"""
+
+    def __init__(self, min_bytes: Optional[int] = None, max_cached_assets: int = 64):
+        self.min_bytes = min_bytes if min_bytes is not None else Config.RESPONSE_COMPRESS_MIN_BYTES
+        self.max_cached_assets = max_cached_assets
+        self._assets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, server) -> None:
+        """Registra a camada no servidor Flask (apenas uma vez por servidor)"""
+        if getattr(server, '_lucrax_response_layer', False):
+            return
+        server.after_request(self.process)
+        server._lucrax_response_layer = True
+
+    @staticmethod
+    def is_fingerprinted(request) -> bool:
+        """Indica se a URL muda sempre que o conteúdo muda (seguro para cache imutável)"""
+        from dash.fingerprint import check_fingerprint
+
+        path = request.path
+        if '/_dash-component-suites/' in path:
+            return check_fingerprint(path)[1]
+        return '/assets/' in path and 'm' in request.args
+
+    def _encoding_for(self, request, response, size: int) -> Optional[str]:
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return None
+        response.vary.add('Accept-Encoding')
+        if size < self.min_bytes:
+            return None
+        return choose_encoding(request.accept_encodings)
+
+    def process(self, response):
+        """
+        Ajusta cabeçalhos e corpo de uma resposta (hook after_request)
+
+        Args:
+            response: Resposta do Flask
+
+        Returns:
+            Resposta ajustada (ou 304 sem corpo)
+        """
+        from flask import request
+
+        fingerprinted = self.is_fingerprinted(request)
+        if fingerprinted and response.status_code in (200, 304):
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+
+        # Arquivos enviados em streaming (send_file) já têm ETag e 304 do próprio Flask
+        if (not Config.RESPONSE_COMPRESSION_ENABLED or response.status_code != 200
+                or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        data = response.get_data()
+        encoding = self._encoding_for(request, response, len(data))
+
+        if fingerprinted:
+            return self._serve_asset(request, response, data, encoding)
+        if request.method == 'GET' and request.path.endswith(_REVALIDATED_ENDPOINTS):
+            response.set_etag(_etag(data, encoding))
+            response.headers['Cache-Control'] = 'no-cache'
+            response.make_conditional(request)
+            if response.status_code == 304:
+                return response
+        if encoding:
+            response.set_data(compress_body(data, encoding))
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+    def _serve_asset(self, request, response, data: bytes, encoding: Optional[str]):
+        """Recurso com fingerprint: corpo comprimido e ETag calculados uma única vez"""
+        key = (request.path, encoding)
+        with self._lock:
+            cached = self._assets.get(key)
+            if cached is not None:
+                self._assets.move_to_end(key)
+
+        if cached is None:
+            body = compress_body(data, encoding) if encoding else data
+            cached = (body, _etag(data, encoding))
+            with self._lock:
+                self._assets[key] = cached
+                while len(self._assets) > self.max_cached_assets:
+                    self._assets.popitem(last=False)
+
+        body, tag = cached
+        response.set_data(body)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(tag)
+        return response.make_conditional(request)
+
+    def clear(self) -> None:
+        """Descarta os recursos comprimidos em cache"""
+        with self._lock:
+            self._assets.clear()
+
+
+def register_response_layer(server) -> None:
+    """
+    Registra a camada de respostas no servidor Flask de um app Dash
+
+    Args:
+        server: app.server do Dash
+    """
+    response_layer.init_app(server)
+
+
+# Instância global da camada de respostas
+response_layer = ResponseLayer()
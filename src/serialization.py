@@ -0,0 +1,115 @@
+"""
+Serialização JSON rápida para respostas do dataGPT
+
+Usa orjson (com suporte nativo a arrays NumPy) quando disponível e cai para
+o módulo json da biblioteca padrão caso contrário. Figuras Plotly são
+serializadas uma única vez e embutidas na resposta como JSON bruto, sem
+novo parse nem nova serialização.
+"""
+import json
+import uuid
+import datetime
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+from typing import Any
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+# Plotly (e o Dash, que serializa figuras via plotly.io) passam a usar orjson
+if ORJSON_AVAILABLE:
+    pio.json.config.default_engine = 'orjson'
+
+
+class RawJSON:
+    """Trecho de JSON já serializado, embutido sem ser reprocessado"""
+
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def _default(obj: Any) -> Any:
+    """Converte tipos não suportados nativamente pelo encoder"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (pd.Timestamp, datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    if obj is pd.NaT:
+        return None
+    return str(obj)
+
+
+def dumps(payload: Any) -> str:
+    """
+    Serializa uma estrutura para texto JSON
+
+    Args:
+        payload: Estrutura com dicionários, listas, escalares e arrays NumPy
+
+    Returns:
+        str: Texto JSON
+    """
+    if ORJSON_AVAILABLE:
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        return orjson.dumps(payload, option=options, default=_default).decode('utf-8')
+    return json.dumps(payload, default=_default)
+
+
+def _replace_raw(payload: Any, token: str, fragments: list) -> Any:
+    """Substitui instâncias de RawJSON por marcadores únicos"""
+    if isinstance(payload, RawJSON):
+        fragments.append(payload.text)
+        return f'{token}{len(fragments) - 1}'
+    if isinstance(payload, dict):
+        return {key: _replace_raw(value, token, fragments) for key, value in payload.items()}
+    if isinstance(payload, (list, tuple)):
+        return [_replace_raw(value, token, fragments) for value in payload]
+    return payload
+
+
+def dumps_with_raw(payload: Any) -> str:
+    """
+    Serializa uma estrutura que pode conter trechos RawJSON
+
+    Os trechos pré-serializados são inseridos no texto final por
+    substituição, sem passar novamente pelo encoder.
+
+    Args:
+        payload: Estrutura com possíveis valores RawJSON
+
+    Returns:
+        str: Texto JSON
+    """
+    fragments = []
+    token = f'__raw_json_{uuid.uuid4().hex}_'
+    text = dumps(_replace_raw(payload, token, fragments))
+    for index, fragment in enumerate(fragments):
+        text = text.replace(f'"{token}{index}"', fragment, 1)
+    return text
+
+
+def figure_to_json(fig) -> str:
+    """
+    Serializa uma figura Plotly em uma única passagem
+
+    Args:
+        fig: Figura do Plotly
+
+    Returns:
+        str: JSON da figura
+    """
+    return pio.to_json(fig, validate=False)
+
+
+def figure_to_raw_json(fig) -> RawJSON:
+    """Serializa uma figura Plotly para ser embutida em uma resposta"""
+    return RawJSON(figure_to_json(fig))
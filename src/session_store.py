@@ -0,0 +1,315 @@
+"""
+Armazenamento de sessões dos dashboards Dash
+
+Cada sessão (identificada por um ID guardado em um ``dcc.Store`` no
+navegador) referencia um dataset pela sua chave (a URL de origem), guarda o
+estado dos filtros e agregados em cache. Datasets são compartilhados entre
+sessões que usam a mesma origem e ficam em um backend com orçamento de
+memória e descarte LRU. Um dataset descartado é recarregado sob demanda; o
+estado das sessões fica em um backend com orçamento próprio, que datasets
+grandes não podem esvaziar. Alterações do estado são atômicas (leitura e
+gravação sob o lock do backend), pois os callbacks rodam em paralelo.
+Com o backend 'shared' os datasets ficam no registro em memória
+compartilhada (src/dataset_registry.py), uma cópia por host.
+"""
+import os
+import uuid
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+import pandas as pd
+from config import Config
+from src.cache_backends import DISKCACHE_AVAILABLE, DiskCacheBackend, InMemoryBackend, estimate_size
+from src.cache_keys import dataset_version, make_filter_key
+
+_SESSION_PREFIX = 'session:'
+_DATASET_PREFIX = 'dataset:'
+_VERSION_PREFIX = 'dataset-version:'
+
+
+def create_backend(name: Optional[str] = None, max_bytes: Optional[int] = None):
+    """
+    Cria o backend de armazenamento configurado
+
+    Args:
+        name: 'memory', 'disk' ou 'shared' (padrão: Config.SESSION_STORE_BACKEND)
+        max_bytes: Orçamento de memória/disco em bytes (padrão: Config.SESSION_STORE_MAX_MB,
+            ou Config.DATASET_REGISTRY_MAX_MB para o backend 'shared')
+
+    Returns:
+        Backend de armazenamento
+    """
+    name = name or Config.SESSION_STORE_BACKEND
+
+    if name == 'shared':
+        from src.dataset_registry import PYARROW_AVAILABLE, SharedDatasetRegistry, SharedMemoryBackend
+        if PYARROW_AVAILABLE:
+            # Sem orçamento explícito vale o do registro (DATASET_REGISTRY_MAX_MB)
+            return SharedMemoryBackend(SharedDatasetRegistry(max_bytes=max_bytes))
+        logging.warning("pyarrow não disponível, usando armazenamento em memória. "
+                        "Instale com: pip install pyarrow")
+    elif name == 'disk':
+        if DISKCACHE_AVAILABLE:
+            return DiskCacheBackend(Config.SESSION_STORE_DISK_PATH,
+                                    max_bytes or Config.SESSION_STORE_MAX_MB * 1024 * 1024)
+        logging.warning("diskcache não disponível, usando armazenamento em memória. "
+                        "Instale com: pip install diskcache")
+    elif name != 'memory':
+        logging.warning(f"Backend de sessão '{name}' desconhecido, usando armazenamento em memória")
+    return InMemoryBackend(max_bytes or Config.SESSION_STORE_MAX_MB * 1024 * 1024)
+
+
+def create_session_backend(backend):
+    """
+    Cria o backend do estado das sessões, separado do orçamento dos datasets
+
+    Um dataset grande gravado no mesmo LRU poderia descartar o estado das
+    sessões (chave do dataset e filtros), impedindo a recarga sob demanda.
+
+    Args:
+        backend: Backend dos datasets
+
+    Returns:
+        Backend do estado das sessões
+    """
+    if getattr(backend, 'separate_session_state', False):
+        # O backend já guarda o estado fora do orçamento dos datasets
+        return backend
+    max_bytes = Config.SESSION_STATE_MAX_MB * 1024 * 1024
+    if isinstance(backend, DiskCacheBackend):
+        return DiskCacheBackend(os.path.normpath(backend.directory) + '_sessions', max_bytes)
+    return InMemoryBackend(max_bytes)
+
+
+class SessionStore:
+    """Estado por sessão dos dashboards: dataset, filtros e agregados"""
+
+    def __init__(self, backend=None, session_backend=None):
+        self.backend = backend if backend is not None else create_backend()
+        self.sessions = session_backend if session_backend is not None else create_session_backend(self.backend)
+
+    @staticmethod
+    def new_session_id() -> str:
+        """Gera um novo identificador de sessão"""
+        return uuid.uuid4().hex
+
+    def get_session(self, session_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Retorna o estado da sessão (ou None se inexistente)"""
+        if not session_id:
+            return None
+        return self.sessions.get(_SESSION_PREFIX + session_id)
+
+    def _update_session(self, session_id: str,
+                        fn: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Lê, altera e grava o estado da sessão atomicamente (fn recebe uma cópia)"""
+        return self.sessions.update(_SESSION_PREFIX + session_id,
+                                    lambda state: fn(dict(state) if state is not None else None))
+
+    def save_session(self, session_id: str, dataset_key: Optional[str] = None,
+                     filters: Optional[Dict[str, Any]] = None,
+                     aggregates: Optional[Dict[str, Any]] = None,
+                     revision: int = 0) -> Dict[str, Any]:
+        """
+        Grava o estado da sessão
+
+        Args:
+            session_id: Identificador da sessão
+            dataset_key: Chave do dataset usado pela sessão
+            filters: Estado dos filtros (coluna -> valores)
+            aggregates: Agregados em cache
+            revision: Revisão dos filtros (incrementada a cada alteração)
+
+        Returns:
+            Dict[str, Any]: Estado gravado
+        """
+        state = {
+            'dataset_key': dataset_key,
+            'filters': filters or {},
+            'aggregates': aggregates or {},
+            'revision': revision,
+        }
+        self.sessions.set(_SESSION_PREFIX + session_id, state)
+        return state
+
+    def set_dataset(self, session_id: str, dataset_key: str) -> Dict[str, Any]:
+        """
+        Associa um novo dataset à sessão, limpando filtros e agregados
+
+        A revisão é incrementada: cálculos ainda pendentes do dataset anterior
+        são descartados.
+
+        Args:
+            session_id: Identificador da sessão
+            dataset_key: Chave do dataset
+
+        Returns:
+            Dict[str, Any]: Estado gravado
+        """
+        def apply(state):
+            revision = state.get('revision', 0) + 1 if state is not None else 0
+            return {'dataset_key': dataset_key, 'filters': {}, 'aggregates': {}, 'revision': revision}
+        return self._update_session(session_id, apply)
+
+    def update_filters(self, session_id: str, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Atualiza os filtros da sessão, mantendo apenas os agregados do novo estado e incrementando a revisão"""
+        filter_key = make_filter_key(filters)
+
+        def apply(state):
+            if state is None:
+                return None
+            state['filters'] = filters
+            state['aggregates'] = {key: value for key, value in state['aggregates'].items() if key[1] == filter_key}
+            state['revision'] = state.get('revision', 0) + 1
+            return state
+        return self._update_session(session_id, apply)
+
+    def get_revision(self, session_id: Optional[str]) -> int:
+        """Revisão atual dos filtros da sessão (0 se inexistente)"""
+        state = self.get_session(session_id)
+        return state.get('revision', 0) if state is not None else 0
+
+    def delete_session(self, session_id: str) -> None:
+        """Remove o estado da sessão"""
+        self.sessions.delete(_SESSION_PREFIX + session_id)
+
+    def put_dataset(self, dataset_key: str, data: pd.DataFrame) -> str:
+        """
+        Armazena um dataset compartilhável entre sessões
+
+        A versão do conteúdo é gravada junto ao estado das sessões (não é
+        descartada com o dataset) e compõe a chave dos caches de filtros,
+        tabelas e gráficos (cache_key).
+
+        Args:
+            dataset_key: Chave do dataset (URL de origem)
+            data: DataFrame carregado
+
+        Returns:
+            str: Versão do conteúdo
+        """
+        version = dataset_version(data)
+        self.backend.set(_DATASET_PREFIX + dataset_key, data)
+        self.sessions.set(_VERSION_PREFIX + dataset_key, version)
+        return version
+
+    def cache_key(self, dataset_key: Optional[str], data: Optional[pd.DataFrame] = None) -> Optional[str]:
+        """
+        Chave do conteúdo atual de um dataset para os caches derivados
+
+        Os backends em disco e compartilhado devolvem um novo DataFrame a cada
+        leitura; a chave identifica o conteúdo, não o objeto.
+
+        Args:
+            dataset_key: Chave do dataset (URL de origem)
+            data: Dataset, usado para calcular a versão se ela não estiver registrada
+
+        Returns:
+            Optional[str]: '<dataset_key>@<versão>' ou None
+        """
+        if not dataset_key:
+            return None
+        version = self.sessions.get(_VERSION_PREFIX + dataset_key)
+        if version is None and data is not None:
+            version = dataset_version(data)
+            self.sessions.set(_VERSION_PREFIX + dataset_key, version)
+        return f"{dataset_key}@{version}" if version is not None else None
+
+    def get_dataset(self, dataset_key: Optional[str],
+                    loader: Optional[Callable[[str], Tuple[bool, Any, Optional[str]]]] = None) -> Optional[pd.DataFrame]:
+        """
+        Retorna um dataset, recarregando-o pelo loader se tiver sido descartado
+
+        Args:
+            dataset_key: Chave do dataset (URL de origem)
+            loader: Função (dataset_key) -> (success, data, error)
+
+        Returns:
+            Optional[pd.DataFrame]: Dataset ou None
+        """
+        if not dataset_key:
+            return None
+
+        data = self.backend.get(_DATASET_PREFIX + dataset_key)
+        if data is None and loader is not None:
+            success, data, error = loader(dataset_key)
+            if not success:
+                logging.warning(f"Falha ao recarregar dataset da sessão: {error}")
+                return None
+            self.put_dataset(dataset_key, data)
+        return data
+
+    def get_aggregate(self, session_id: str, name: str, filters: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Retorna um agregado em cache
+
+        Args:
+            session_id: Identificador da sessão
+            name: Nome do agregado
+            filters: Filtros dos dados do chamador (padrão: os filtros atuais da sessão)
+
+        Returns:
+            Any: Agregado ou None
+        """
+        state = self.get_session(session_id)
+        if state is None:
+            return None
+        return state['aggregates'].get((name, make_filter_key(state['filters'] if filters is None else filters)))
+
+    def set_aggregate(self, session_id: str, name: str, value: Any,
+                      filters: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Guarda um agregado para o estado de filtros atual da sessão
+
+        Agregados de outros estados de filtros são descartados. Um valor
+        calculado com filtros que já foram substituídos não é gravado.
+
+        Args:
+            session_id: Identificador da sessão
+            name: Nome do agregado
+            value: Valor calculado
+            filters: Filtros usados no cálculo (padrão: os filtros atuais da sessão)
+        """
+        def apply(state):
+            if state is None:
+                return None
+            filter_key = make_filter_key(state['filters'])
+            if filters is not None and make_filter_key(filters) != filter_key:
+                return None
+            aggregates = {key: item for key, item in state['aggregates'].items() if key[1] == filter_key}
+            aggregates[(name, filter_key)] = value
+            state['aggregates'] = aggregates
+            return state
+        self._update_session(session_id, apply)
+
+
+# Gera no navegador um ID no mesmo formato de new_session_id (32 dígitos hexadecimais)
+_SESSION_ID_SOURCE = """
+function(_) {
+    var bytes = new Uint8Array(16);
+    window.crypto.getRandomValues(bytes);
+    return Array.from(bytes, function(b) { return ('0' + b.toString(16)).slice(-2); }).join('');
+}
+"""
+
+
+def register_session_id_callback(app) -> None:
+    """
+    Registra o callback clientside que cria o ID da sessão ao abrir a página
+
+    Com o ID gerado no navegador o layout deixa de variar por requisição e
+    pode ser revalidado com ETag (resposta 304). O layout deve conter um
+    ``dcc.Store(id='session-id')`` sem valor inicial.
+
+    Args:
+        app: Aplicação Dash
+    """
+    from dash import Input, Output
+
+    app.clientside_callback(
+        _SESSION_ID_SOURCE,
+        Output('session-id', 'data'),
+        Input('session-id', 'id')
+    )
+
+
+# Instância global do armazenamento de sessões
+session_store = SessionStore()
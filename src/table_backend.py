@@ -0,0 +1,354 @@
+"""
+Paginação, ordenação e filtragem de tabelas no servidor
+
+As tabelas dos dashboards recebem apenas a página visível. A ordem de cada
+especificação de ordenação é calculada uma vez sobre o dataset completo e
+guardada em cache; filtros (dos dashboards ou da própria tabela) apenas
+selecionam posições dessa ordem, sem nova ordenação. A sintaxe de filtro
+aceita é a do ``filter_query`` do Dash DataTable
+(ex.: ``{Cidade} contains Rio && {Vendas} > 100``). Os caches são indexados
+pela chave do conteúdo do dataset (URL e versão), não pelo objeto DataFrame.
+"""
+import re
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from config import Config
+from src.filter_engine import filter_engine
+
+DEFAULT_PAGE_SIZE = 20
+
+# Operadores do filter_query do DataTable (as formas simbólicas são equivalentes)
+_OPERATORS = {
+    'eq': 'eq', '=': 'eq', 'ne': 'ne', '!=': 'ne',
+    'lt': 'lt', '<': 'lt', 'le': 'le', '<=': 'le',
+    'gt': 'gt', '>': 'gt', 'ge': 'ge', '>=': 'ge',
+    'contains': 'contains', 'icontains': 'contains', 'scontains': 'scontains',
+    'datestartswith': 'datestartswith', 'is blank': 'blank',
+}
+
+_FILTER_PART = re.compile(
+    r'^\s*\{(?P<column>[^}]+)\}\s*'
+    r'(?P<operator>is blank|datestartswith|s?contains|icontains|eq|ne|lt|le|gt|ge|!=|<=|>=|=|<|>)'
+    r'\s*(?P<value>.*?)\s*$'
+)
+
+
+def _strip_quotes(raw: str) -> str:
+    """Remove as aspas do valor de uma condição"""
+    if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in '"\'`':
+        return raw[1:-1]
+    return raw
+
+
+def _comparable(series: pd.Series, value: str) -> Tuple[pd.Series, Any]:
+    """Converte coluna e valor para um tipo comum (número, data ou texto)"""
+    if pd.api.types.is_numeric_dtype(series):
+        number = pd.to_numeric(value, errors='coerce')
+        if not pd.isna(number):
+            return series, number
+    elif pd.api.types.is_datetime64_any_dtype(series):
+        timestamp = pd.to_datetime(value, errors='coerce')
+        if not pd.isna(timestamp):
+            return series, timestamp
+    return series.astype(str), value
+
+
+def parse_filter_query(query: Optional[str]) -> List[Tuple[str, str, str]]:
+    """
+    Interpreta o filter_query do DataTable
+
+    Args:
+        query: Expressão com condições unidas por '&&'
+
+    Returns:
+        List[Tuple[str, str, str]]: Condições (coluna, operador, valor); partes inválidas são ignoradas
+    """
+    conditions = []
+    for part in (query or '').split(' && '):
+        match = _FILTER_PART.match(part)
+        if match is None:
+            continue
+        operator = _OPERATORS[match.group('operator')]
+        conditions.append((match.group('column'), operator, _strip_quotes(match.group('value'))))
+    return conditions
+
+
+def filter_query_mask(data: pd.DataFrame, query: Optional[str]) -> Optional[np.ndarray]:
+    """
+    Máscara das linhas que atendem ao filter_query
+
+    Args:
+        data: DataFrame
+        query: Expressão de filtro do DataTable
+
+    Returns:
+        Optional[np.ndarray]: Máscara por posição ou None se não houver condições válidas
+    """
+    mask = None
+    for column, operator, value in parse_filter_query(query):
+        if column not in data.columns:
+            continue
+        series = data[column]
+        if operator == 'blank':
+            condition = series.isna() | (series.astype(str).str.strip() == '')
+        elif operator in ('contains', 'scontains', 'datestartswith'):
+            text = series.astype(str)
+            if operator == 'contains':
+                condition = text.str.contains(value, case=False, regex=False)
+            elif operator == 'scontains':
+                condition = text.str.contains(value, regex=False)
+            else:
+                condition = text.str.startswith(value)
+        else:
+            series, value = _comparable(series, value)
+            try:
+                condition = {
+                    'eq': series.__eq__, 'ne': series.__ne__, 'lt': series.__lt__,
+                    'le': series.__le__, 'gt': series.__gt__, 'ge': series.__ge__,
+                }[operator](value)
+            except TypeError:
+                continue
+        condition = condition.fillna(False).to_numpy(dtype=bool)
+        mask = condition if mask is None else mask & condition
+    return mask
+
+
+class TableBackend:
+    """Páginas de tabela servidas a partir de ordens de linhas em cache"""
+
+    def __init__(self, max_cache_mb: Optional[int] = None):
+        self.max_cache_bytes = (max_cache_mb or Config.TABLE_SORT_CACHE_MB) * 1024 * 1024
+        self._orders = OrderedDict()
+        self._order_bytes = 0
+        self._lock = threading.Lock()
+
+    def sort_order(self, data: pd.DataFrame, sort_by: Optional[List[Dict[str, str]]],
+                   dataset_key: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        Posições das linhas na ordem pedida (estável, nulos por último)
+
+        Args:
+            data: DataFrame completo (sem filtros)
+            sort_by: Ordenação no formato do DataTable ([{'column_id', 'direction'}])
+            dataset_key: Identificador do conteúdo do dataset; sem ele nada é guardado em cache
+
+        Returns:
+            Optional[np.ndarray]: Posições ordenadas ou None se não houver ordenação
+        """
+        sort_by = [s for s in sort_by or [] if s.get('column_id') in data.columns]
+        if not sort_by:
+            return None
+
+        key = (dataset_key, tuple((s['column_id'], s.get('direction', 'asc')) for s in sort_by))
+        if dataset_key is not None:
+            with self._lock:
+                if key in self._orders:
+                    self._orders.move_to_end(key)
+                    return self._orders[key]
+
+        columns = [s['column_id'] for s in sort_by]
+        ascending = [s.get('direction', 'asc') == 'asc' for s in sort_by]
+        order = (data[columns].reset_index(drop=True)
+                 .sort_values(by=columns, ascending=ascending, kind='stable', na_position='last')
+                 .index.to_numpy())
+
+        if dataset_key is not None and order.nbytes <= self.max_cache_bytes:
+            with self._lock:
+                if key in self._orders:
+                    return self._orders[key]
+                self._orders[key] = order
+                self._order_bytes += order.nbytes
+                while self._order_bytes > self.max_cache_bytes:
+                    _, evicted = self._orders.popitem(last=False)
+                    self._order_bytes -= evicted.nbytes
+        return order
+
+    def get_page(self, data: pd.DataFrame, page_current: int = 0,
+                 page_size: int = DEFAULT_PAGE_SIZE,
+                 sort_by: Optional[List[Dict[str, str]]] = None,
+                 filter_query: Optional[str] = None,
+                 filters: Optional[Dict[str, Any]] = None,
+                 dataset_key: Optional[str] = None) -> Tuple[pd.DataFrame, int, int]:
+        """
+        Retorna uma página da tabela
+
+        Args:
+            data: DataFrame completo (sem filtros)
+            page_current: Índice da página (a partir de 0; limitado à última página)
+            page_size: Linhas por página
+            sort_by: Ordenação no formato do DataTable
+            filter_query: Filtro no formato do DataTable
+            filters: Filtros do dashboard (coluna -> valores)
+            dataset_key: Identificador do conteúdo do dataset (habilita os caches)
+
+        Returns:
+            Tuple[pd.DataFrame, int, int]: (página, número de páginas, total de linhas filtradas)
+        """
+        page_size = max(int(page_size or DEFAULT_PAGE_SIZE), 1)
+
+        mask = filter_engine.mask(data, filters, dataset_key)
+        query_mask = filter_query_mask(data, filter_query)
+        if query_mask is not None:
+            mask = query_mask if mask is None else mask & query_mask
+
+        positions = self.sort_order(data, sort_by, dataset_key)
+        if mask is not None:
+            positions = np.flatnonzero(mask) if positions is None else positions[mask[positions]]
+
+        total = len(data) if positions is None else len(positions)
+        page_count = max(math.ceil(total / page_size), 1)
+        page_current = min(max(int(page_current or 0), 0), page_count - 1)
+        start = page_current * page_size
+
+        if positions is None:
+            page = data.iloc[start:start + page_size]
+        else:
+            page = data.iloc[positions[start:start + page_size]]
+        return page, page_count, total
+
+    def clear(self) -> None:
+        """Limpa o cache de ordenações"""
+        with self._lock:
+            self._orders.clear()
+            self._order_bytes = 0
+
+
+def page_records(page: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Converte uma página em registros serializáveis para o DataTable"""
+    page = page.copy()
+    page.columns = [str(c) for c in page.columns]
+    for column in page.columns:
+        if pd.api.types.is_datetime64_any_dtype(page[column]):
+            page[column] = page[column].dt.strftime('%Y-%m-%d %H:%M:%S')
+    return page.astype(object).where(page.notna(), None).to_dict('records')
+
+
+def server_side_table(table_id: str, page_size: int = DEFAULT_PAGE_SIZE, **props):
+    """
+    Cria um DataTable paginado, ordenado e filtrado no servidor
+
+    Args:
+        table_id: ID do componente
+        page_size: Linhas por página
+        **props: Demais propriedades do DataTable (estilos)
+
+    Returns:
+        dash_table.DataTable: Tabela sem dados; as páginas vêm de register_table_callbacks
+    """
+    from dash import dash_table
+
+    return dash_table.DataTable(
+        id=table_id, columns=[], data=[], page_current=0, page_size=page_size, page_count=1,
+        page_action='custom', sort_action='custom', sort_mode='multi', sort_by=[],
+        filter_action='custom', filter_query='', **props
+    )
+
+
+def register_table_callbacks(app, table_id: str, container_id: str,
+                             get_data: Callable[[Optional[str]], Optional[pd.DataFrame]],
+                             describe: Optional[Callable[[pd.DataFrame], Tuple[list, list]]] = None) -> None:
+    """
+    Registra no app Dash os callbacks de uma tabela criada com server_side_table
+
+    Um novo dataset ('dataset-version') redefine colunas, ordenação e filtro e
+    exibe o contêiner; página, ordenação, filtro da tabela e filtros do
+    dashboard ('filter-state') pedem apenas a página visível.
+
+    Args:
+        app: Aplicação Dash
+        table_id: ID do DataTable
+        container_id: ID do contêiner exibido após o carregamento
+        get_data: Função (session_id) -> dataset da sessão sem filtros
+        describe: Função (data) -> (colunas do DataTable, ordenação inicial)
+    """
+    from dash import Input, Output, State, callback_context, no_update
+    from src.dash_filters import is_superseded
+    from src.session_store import session_store
+
+    def default_describe(data: pd.DataFrame) -> Tuple[list, list]:
+        return [{'name': str(c), 'id': str(c)} for c in data.columns], []
+
+    describe = describe or default_describe
+
+    @app.callback(
+        Output(table_id, 'columns'),
+        Output(table_id, 'sort_by'),
+        Output(table_id, 'page_current'),
+        Output(table_id, 'filter_query'),
+        Output(container_id, 'style'),
+        Input('dataset-version', 'data'),
+        State('session-id', 'data'),
+        prevent_initial_call=True
+    )
+    def reset_table(dataset_version, session_id):
+        data = get_data(session_id)
+        if data is None or data.empty:
+            return [], [], 0, '', {'display': 'none'}
+        columns, sort_by = describe(data)
+        return columns, sort_by, 0, '', {}
+
+    @app.callback(
+        Output(table_id, 'data'),
+        Output(table_id, 'page_count'),
+        Input(table_id, 'page_current'),
+        Input(table_id, 'page_size'),
+        Input(table_id, 'sort_by'),
+        Input(table_id, 'filter_query'),
+        Input('filter-state', 'data'),
+        State('session-id', 'data'),
+        prevent_initial_call=True
+    )
+    def update_table_page(page_current, page_size, sort_by, filter_query, filter_state, session_id):
+        if callback_context.triggered_id == 'filter-state' and is_superseded(session_id, filter_state):
+            return no_update, no_update
+        data = get_data(session_id)
+        state = session_store.get_session(session_id)
+        if data is None or state is None:
+            return [], 1
+        page, page_count, _ = table_backend.get_page(
+            data, page_current, page_size, sort_by=sort_by, filter_query=filter_query,
+            filters=state['filters'], dataset_key=session_store.cache_key(state['dataset_key'], data)
+        )
+        return page_records(page), page_count
+
+
+def st_paginated_dataframe(data: pd.DataFrame, key: str, page_size: int = 50,
+                           dataset_key: Optional[str] = None, **kwargs) -> None:
+    """
+    Exibe um DataFrame no Streamlit em páginas, ordenadas no servidor
+
+    Args:
+        data: DataFrame completo
+        key: Chave única dos controles na página
+        page_size: Linhas por página
+        dataset_key: Identificador do dataset (mantém a ordenação em cache entre reexecuções)
+        **kwargs: Repassados para st.dataframe
+    """
+    import streamlit as st
+
+    col_sort, col_direction, col_page = st.columns([2, 1, 1])
+    with col_sort:
+        sort_column = st.selectbox("Ordenar por", ["(ordem original)"] + [str(c) for c in data.columns],
+                                   key=f"{key}-sort")
+    with col_direction:
+        direction = st.selectbox("Direção", ["asc", "desc"], key=f"{key}-direction",
+                                 format_func=lambda d: "Crescente" if d == "asc" else "Decrescente")
+    page_count = max(math.ceil(len(data) / page_size), 1)
+    with col_page:
+        page_number = st.number_input("Página", min_value=1, max_value=page_count, value=1, step=1,
+                                      key=f"{key}-page")
+
+    columns = {str(c): c for c in data.columns}
+    sort_by = [{'column_id': columns[sort_column], 'direction': direction}] if sort_column in columns else None
+    page, _, total = table_backend.get_page(data, page_current=page_number - 1, page_size=page_size,
+                                            sort_by=sort_by, dataset_key=dataset_key)
+    st.dataframe(page, **kwargs)
+    st.caption(f"Página {page_number} de {page_count} • {total:,} linhas")
+
+
+# Instância global do backend de tabelas
+table_backend = TableBackend()
@@ -5,7 +5,6 @@ import re
 import pandas as pd
 from typing import Optional, Tuple, List
 from urllib.parse import urlparse
-import streamlit as st
 
 class DataValidator:
     """Classe para validação de dados e URLs"""
@@ -17,6 +16,12 @@ class DataValidator:
     CSV_URL_PATTERN = re.compile(
         r'https://docs\.google\.com/spreadsheets/d/([a-zA-Z0-9-_]+)/export\?format=csv'
     )
+    # Deduplicação das fontes de dados: mesma regra de public.normalize_source_url
+    # (migrations/data_sources_url_dedup.sql)
+    SOURCE_SHEETS_PATTERN = re.compile(
+        r'^(?:https?://)?docs\.google\.com/spreadsheets/d/([A-Za-z0-9_-]+)', re.IGNORECASE
+    )
+    CONTROL_CHARS_PATTERN = re.compile(r'[\x00-\x1f\x7f-\x9f]')
     
     @staticmethod
     def validate_google_sheets_url(url: str) -> Tuple[bool, Optional[str], Optional[str]]:
@@ -75,6 +80,32 @@ class DataValidator:
         except Exception:
             return ""
     
+    @staticmethod
+    def normalize_source_url(url: str) -> str:
+        """
+        Forma canônica da URL de uma fonte de dados (chave de deduplicação)
+        
+        Planilhas do Google Sheets viram ``https://docs.google.com/spreadsheets/d/<id>``,
+        o mesmo arquivo exportado pelo carregador, qualquer que seja o modo
+        (edit/view), a aba ou os parâmetros de compartilhamento. As demais URLs
+        só perdem caracteres de controle, espaços nas pontas, o fragmento e a
+        barra final. A regra é reproduzida em SQL na migração de deduplicação;
+        alterações devem ser feitas nos dois lugares.
+        
+        Args:
+            url: URL informada pelo usuário
+        
+        Returns:
+            str: URL normalizada
+        """
+        cleaned = DataValidator.CONTROL_CHARS_PATTERN.sub('', url or '').strip(' ')
+        
+        match = DataValidator.SOURCE_SHEETS_PATTERN.search(cleaned)
+        if match:
+            return f"https://docs.google.com/spreadsheets/d/{match.group(1)}"
+        
+        return re.sub(r'/+$', '', cleaned.split('#', 1)[0])
+    
     @staticmethod
     def validate_dataframe(data: pd.DataFrame) -> Tuple[bool, Optional[str]]:
         """
@@ -0,0 +1,168 @@
+"""
+Cache de estado "quente" das funções serverless
+
+No Vercel o mesmo container atende várias invocações seguidas; o que fica no
+nível do módulo sobrevive entre elas. Este cache guarda datasets já
+carregados, figuras serializadas e resultados de análise, indexados pelo hash
+das entradas, com orçamento de memória e descarte LRU
+(``Config.WARM_CACHE_MAX_MB``) e validade de ``Config.WARM_CACHE_TTL``
+segundos. Opcionalmente (``Config.WARM_CACHE_PERSIST``) as entradas também
+são gravadas em disco local (``/tmp``), de modo que um processo novo no mesmo
+container as reaproveite. Acertos e erros são expostos nos cabeçalhos das
+respostas.
+"""
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+from config import Config
+from src.cache_keys import hash_payload
+from src.cache_backends import DISKCACHE_AVAILABLE, DiskCacheBackend, InMemoryBackend
+
+HIT = 'HIT'
+DISK_HIT = 'HIT-DISK'
+MISS = 'MISS'
+
+# A cada quantas gravações os horários de entradas já descartadas são removidos
+_PRUNE_INTERVAL = 1024
+
+
+def hash_request_body(body: Union[str, bytes, None]) -> str:
+    """
+    Hash do corpo bruto de uma requisição (sem decodificar o JSON novamente)
+
+    Args:
+        body: Corpo da requisição
+
+    Returns:
+        str: Hash SHA-1 em hexadecimal
+    """
+    if body is None:
+        body = b''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return hashlib.sha1(body).hexdigest()
+
+
+class WarmCache:
+    """Cache por container com camada em memória (LRU) e camada opcional em disco"""
+
+    def __init__(self, max_memory_mb: Optional[int] = None, ttl: Optional[int] = None,
+                 persist: Optional[bool] = None, directory: Optional[str] = None,
+                 max_disk_mb: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else Config.WARM_CACHE_TTL
+        self._memory = InMemoryBackend((max_memory_mb or Config.WARM_CACHE_MAX_MB) * 1024 * 1024)
+        self._created: Dict[str, float] = {}
+        self._stores = 0
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+
+        self._disk = None
+        persist = Config.WARM_CACHE_PERSIST if persist is None else persist
+        if persist:
+            if DISKCACHE_AVAILABLE:
+                self._disk = DiskCacheBackend(directory or Config.WARM_CACHE_DIR,
+                                              (max_disk_mb or Config.WARM_CACHE_DISK_MB) * 1024 * 1024)
+            else:
+                logging.warning("diskcache não disponível, cache quente apenas em memória. "
+                                "Instale com: pip install diskcache")
+
+    @staticmethod
+    def make_key(namespace: str, payload: Any) -> str:
+        """Chave de uma entrada a partir de qualquer estrutura serializável"""
+        return f"{namespace}:{payload if isinstance(payload, str) else hash_payload(payload)}"
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl > 0 and time.time() - created_at > self.ttl
+
+    def _record(self, outcome: str) -> str:
+        with self._lock:
+            self._stats[{HIT: 'hits', DISK_HIT: 'disk_hits', MISS: 'misses'}[outcome]] += 1
+        return outcome
+
+    def lookup(self, key: str) -> Tuple[Any, str]:
+        """
+        Busca uma entrada na memória e, se necessário, no disco
+
+        Args:
+            key: Chave criada com make_key
+
+        Returns:
+            Tuple[Any, str]: (valor ou None, HIT / HIT-DISK / MISS)
+        """
+        value = self._memory.get(key)
+        if value is not None:
+            if not self._expired(self._created.get(key, 0)):
+                return value, self._record(HIT)
+            self._memory.delete(key)
+            self._created.pop(key, None)
+
+        if self._disk is not None:
+            entry = self._disk.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if not self._expired(created_at):
+                    self._memory.set(key, value)
+                    self._created[key] = created_at
+                    return value, self._record(DISK_HIT)
+                self._disk.delete(key)
+
+        return None, self._record(MISS)
+
+    def store(self, key: str, value: Any) -> None:
+        """
+        Grava uma entrada (apenas resultados bem-sucedidos devem ser gravados)
+
+        Args:
+            key: Chave criada com make_key
+            value: Valor a ser guardado
+        """
+        created_at = time.time()
+        self._memory.set(key, value)
+        self._created[key] = created_at
+        self._stores += 1
+        if self._stores % _PRUNE_INTERVAL == 0:
+            self._created = {k: t for k, t in self._created.items() if k in self._memory}
+        if self._disk is not None:
+            try:
+                self._disk.set(key, (created_at, value))
+            except Exception as e:
+                logging.warning(f"Erro ao gravar cache quente em disco: {e}")
+
+    def headers(self, outcome: str) -> Dict[str, str]:
+        """
+        Cabeçalhos com o resultado da busca e as estatísticas do container
+
+        Args:
+            outcome: HIT, HIT-DISK ou MISS
+
+        Returns:
+            Dict[str, str]: Cabeçalhos a acrescentar na resposta
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            'X-Cache': outcome,
+            'X-Cache-Hits': str(stats['hits'] + stats['disk_hits']),
+            'X-Cache-Misses': str(stats['misses']),
+            'X-Cache-Bytes': str(self._memory.total_bytes),
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de acertos (memória e disco) e erros"""
+        with self._lock:
+            return dict(self._stats)
+
+    def clear(self) -> None:
+        """Descarta todas as entradas e zera as estatísticas"""
+        self._memory.clear()
+        self._created.clear()
+        if self._disk is not None:
+            self._disk.clear()
+        with self._lock:
+            self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+
+
+# Instância global do cache quente (sobrevive entre invocações no mesmo container)
+warm_cache = WarmCache()
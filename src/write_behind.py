@@ -0,0 +1,279 @@
+"""
+Gravação em segundo plano (write-behind) no Supabase
+
+Fontes de dados, dados importados, análises e logs de uso da API não precisam
+estar gravados antes da resposta ao usuário. Em vez de um ``insert`` síncrono
+por linha no caminho da requisição, as linhas entram em uma fila em memória e
+uma thread as grava em lotes por tabela (``insert`` de várias linhas), quando
+uma tabela acumula ``Config.SUPABASE_BATCH_ROWS`` linhas ou a linha mais
+antiga espera ``Config.SUPABASE_FLUSH_INTERVAL`` segundos. Falhas são
+repetidas com espera exponencial; a fila é esvaziada ao encerrar o processo.
+
+As tabelas são gravadas na ordem das chaves estrangeiras (fontes de dados
+antes dos dados importados e das análises); linhas que referenciam uma linha
+cujo lote falhou após todas as tentativas são descartadas, em vez de gravadas
+com erro de chave estrangeira.
+
+No Vercel o container é congelado após a resposta, sem executar o ``atexit``.
+Ao final de cada invocação o handler serverless chama ``flush_if_due``, que só
+espera a gravação quando alguma linha está perto do prazo ou a fila passou de
+um lote; logs de uso da API nunca forçam a espera e seguem para a próxima
+invocação. Linhas ainda na fila quando o container é congelado são gravadas
+quando ele volta a receber requisições, e perdidas se ele for descartado antes.
+"""
+import time
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config import Config
+
+# Tabelas referenciadas por chaves estrangeiras são gravadas antes das que as referenciam
+TABLE_ORDER = ('user_sessions', 'data_sources', 'chart_configurations',
+               'imported_data_chunks', 'imported_data', 'data_analyses', 'api_usage_logs')
+
+# Tabela -> (coluna, tabela referenciada) das chaves estrangeiras entre linhas da fila
+FOREIGN_KEYS = {
+    'imported_data': ('data_source_id', 'data_sources'),
+    'data_analyses': ('data_source_id', 'data_sources'),
+    'api_usage_logs': ('session_id', 'user_sessions'),
+}
+
+# Tabelas de auditoria: suas linhas não forçam a gravação ao final de uma invocação
+DEFERRED_TABLES = ('api_usage_logs',)
+
+
+class WriteBehindQueue:
+    """Fila de inserts agrupados por tabela, gravados por uma thread em segundo plano"""
+
+    def __init__(self, insert_batch: Callable[[str, List[Dict[str, Any]]], Any],
+                 batch_rows: Optional[int] = None, flush_interval: Optional[float] = None,
+                 max_rows: Optional[int] = None, max_retries: Optional[int] = None,
+                 retry_backoff: Optional[float] = None):
+        """
+        Args:
+            insert_batch: Função (tabela, linhas) que grava um lote; exceções contam como falha
+            batch_rows: Linhas por lote (padrão: Config.SUPABASE_BATCH_ROWS)
+            flush_interval: Espera máxima de uma linha na fila em segundos
+            max_rows: Limite de linhas pendentes; acima dele enqueue retorna False
+            max_retries: Novas tentativas de um lote com erro
+            retry_backoff: Espera antes da primeira nova tentativa (dobra a cada tentativa)
+        """
+        self.insert_batch = insert_batch
+        self.batch_rows = batch_rows or Config.SUPABASE_BATCH_ROWS
+        self.flush_interval = flush_interval if flush_interval is not None else Config.SUPABASE_FLUSH_INTERVAL
+        self.max_rows = max_rows or Config.SUPABASE_QUEUE_MAX_ROWS
+        self.max_retries = max_retries if max_retries is not None else Config.SUPABASE_MAX_RETRIES
+        self.retry_backoff = retry_backoff if retry_backoff is not None else Config.SUPABASE_RETRY_BACKOFF
+
+        self._buffers: Dict[str, List[Dict[str, Any]]] = {}
+        self._pending = 0
+        self._in_flight = 0
+        self._oldest: Optional[float] = None
+        # Tabela -> momento em que sua linha pendente mais antiga entrou na fila
+        self._table_oldest: Dict[str, float] = {}
+        self._flush_requested = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._cond = threading.Condition()
+        # (tabela, id) de linhas não gravadas, para descartar as linhas que as referenciam
+        self._failed_ids: 'OrderedDict[Tuple[str, Any], None]' = OrderedDict()
+        self._stats = {'enqueued': 0, 'written': 0, 'batches': 0, 'retries': 0,
+                       'failed': 0, 'dropped': 0, 'rejected': 0}
+
+    def enqueue(self, table: str, row: Dict[str, Any]) -> bool:
+        """
+        Agenda a gravação de uma linha
+
+        Args:
+            table: Nome da tabela
+            row: Linha a inserir
+
+        Returns:
+            bool: False se a fila está cheia ou encerrada (o chamador deve gravar diretamente)
+        """
+        with self._cond:
+            if self._closed or self._pending + self._in_flight >= self.max_rows:
+                self._stats['rejected'] += 1
+                return False
+            rows = self._buffers.setdefault(table, [])
+            rows.append(row)
+            self._pending += 1
+            self._stats['enqueued'] += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._table_oldest.setdefault(table, time.monotonic())
+            self._ensure_worker()
+            if len(rows) >= self.batch_rows or self._pending == 1:
+                self._cond.notify_all()
+        return True
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='lucrax-write-behind', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _seconds_until_due(self) -> Optional[float]:
+        """0 se há lote a gravar, o tempo até a linha mais antiga vencer, ou None se vazia"""
+        if not self._pending:
+            return None
+        if self._flush_requested or self._closed:
+            return 0.0
+        if any(len(rows) >= self.batch_rows for rows in self._buffers.values()):
+            return 0.0
+        return max(0.0, self.flush_interval - (time.monotonic() - self._oldest))
+
+    def _take_batches(self) -> List[Tuple[str, List[Dict[str, Any]]]]:
+        tables = sorted(self._buffers, key=lambda t: TABLE_ORDER.index(t) if t in TABLE_ORDER else len(TABLE_ORDER))
+        batches = [(table, self._buffers[table]) for table in tables]
+        self._buffers = {}
+        self._table_oldest = {}
+        self._in_flight, self._pending, self._oldest = self._pending, 0, None
+        return batches
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                wait = self._seconds_until_due()
+                while wait != 0.0:
+                    if self._closed and wait is None:
+                        return
+                    self._cond.wait(wait)
+                    wait = self._seconds_until_due()
+                batches = self._take_batches()
+
+            for table, rows in batches:
+                rows = self._drop_orphans(table, rows)
+                for start in range(0, len(rows), self.batch_rows):
+                    batch = rows[start:start + self.batch_rows]
+                    if not self._write_batch(table, batch):
+                        self._remember_failed(table, batch)
+
+            with self._cond:
+                self._in_flight = 0
+                self._cond.notify_all()
+
+    def _remember_failed(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        """Registra os identificadores das linhas não gravadas (limitado a max_rows)"""
+        for row in rows:
+            if row.get('id') is not None:
+                self._failed_ids[(table, row['id'])] = None
+        while len(self._failed_ids) > self.max_rows:
+            self._failed_ids.popitem(last=False)
+
+    def _drop_orphans(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Remove as linhas que referenciam uma linha não gravada"""
+        if table not in FOREIGN_KEYS or not self._failed_ids:
+            return rows
+        column, parent = FOREIGN_KEYS[table]
+        kept = [row for row in rows if (parent, row.get(column)) not in self._failed_ids]
+        if len(kept) < len(rows):
+            with self._cond:
+                self._stats['dropped'] += len(rows) - len(kept)
+            logging.error(f"{len(rows) - len(kept)} linhas de '{table}' descartadas: "
+                          f"a linha referenciada em '{parent}' não foi gravada")
+        return kept
+
+    def _write_batch(self, table: str, rows: List[Dict[str, Any]]) -> bool:
+        """Grava um lote, repetindo com espera exponencial em caso de erro (False se não gravou)"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.insert_batch(table, rows)
+                with self._cond:
+                    self._stats['written'] += len(rows)
+                    self._stats['batches'] += 1
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    with self._cond:
+                        self._stats['failed'] += len(rows)
+                    logging.error(f"Erro ao gravar {len(rows)} linhas em '{table}' "
+                                  f"após {attempt + 1} tentativas: {e}")
+                    return False
+                with self._cond:
+                    self._stats['retries'] += 1
+                logging.warning(f"Erro ao gravar lote em '{table}', nova tentativa: {e}")
+                time.sleep(self.retry_backoff * (2 ** attempt))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Grava imediatamente as linhas pendentes e aguarda o término
+
+        Args:
+            timeout: Espera máxima em segundos (padrão: Config.SUPABASE_FLUSH_TIMEOUT)
+
+        Returns:
+            bool: True se a fila foi esvaziada dentro do tempo
+        """
+        deadline = time.monotonic() + (timeout if timeout is not None else Config.SUPABASE_FLUSH_TIMEOUT)
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            try:
+                while self._pending or self._in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._thread is None:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._flush_requested = False
+
+    def flush_if_due(self, timeout: Optional[float] = None, margin: Optional[float] = None) -> bool:
+        """
+        Grava as linhas pendentes apenas se alguma está perto do prazo ou a fila está funda
+
+        Usado ao final de cada invocação serverless: linhas recentes e logs de uso
+        da API (DEFERRED_TABLES) ficam para a thread na próxima invocação, sem
+        somar a latência do banco a cada requisição.
+
+        Args:
+            timeout: Espera máxima em segundos (padrão: Config.SUPABASE_FLUSH_TIMEOUT)
+            margin: Antecedência em segundos em relação ao prazo (padrão: Config.SUPABASE_FLUSH_MARGIN)
+
+        Returns:
+            bool: False se a gravação era necessária e não terminou dentro do tempo
+        """
+        margin = margin if margin is not None else Config.SUPABASE_FLUSH_MARGIN
+        with self._cond:
+            now = time.monotonic()
+            due = self._pending + self._in_flight >= self.batch_rows or any(
+                now - started + margin >= self.flush_interval
+                for table, started in self._table_oldest.items() if table not in DEFERRED_TABLES
+            )
+        return self.flush(timeout) if due else True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Esvazia a fila e encerra a thread; novas linhas passam a ser recusadas
+
+        Args:
+            timeout: Espera máxima em segundos (padrão: Config.SUPABASE_FLUSH_TIMEOUT)
+
+        Returns:
+            bool: True se todas as linhas pendentes foram gravadas
+        """
+        drained = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if not drained:
+            logging.warning(f"Fila de gravação encerrada com {self.depth()} linhas pendentes")
+        return drained
+
+    def depth(self) -> int:
+        """Linhas aguardando gravação (na fila ou no lote em andamento)"""
+        with self._cond:
+            return self._pending + self._in_flight
+
+    def stats(self) -> Dict[str, Any]:
+        """Profundidade da fila (total e por tabela), idade da linha mais antiga e contadores"""
+        with self._cond:
+            return {
+                **self._stats,
+                'depth': self._pending + self._in_flight,
+                'depth_by_table': {table: len(rows) for table, rows in self._buffers.items()},
+                'oldest_age_seconds': round(time.monotonic() - self._oldest, 3) if self._oldest else 0.0,
+            }
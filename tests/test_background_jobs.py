@@ -0,0 +1,107 @@
+"""
+Testes para a execução de tarefas em segundo plano dos apps Dash
+"""
+import unittest
+import tempfile
+from unittest import mock
+import dash
+from dash import Input, Output, html
+import sys
+import os
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import background_jobs
+from src.background_jobs import BACKGROUND_JOBS_AVAILABLE, background_callback
+
+
+class TestInlineFallback(unittest.TestCase):
+    """Testes para o callback executado na requisição (sem gerenciador)"""
+
+    def setUp(self):
+        self._managers = background_jobs.background_managers
+        background_jobs.background_managers = (None, None)
+
+    def tearDown(self):
+        background_jobs.background_managers = self._managers
+
+    def test_progress_is_ignored(self):
+        """Testa que a função recebe um set_progress sem efeito e os argumentos do callback"""
+        app = dash.Dash(__name__)
+        app.layout = html.Div([html.Button(id='run'), html.Button(id='cancel'), html.Div(id='out'),
+                               html.Div(id='progress')])
+
+        @background_callback(
+            app, Output('out', 'children'), Input('run', 'n_clicks'),
+            progress=Output('progress', 'children'),
+            running=[(Output('run', 'disabled'), True, False),
+                     (Output('cancel', 'style'), {'display': 'block'}, {'display': 'none'})],
+            cancel=[Input('cancel', 'n_clicks')]
+        )
+        def run(set_progress, n_clicks):
+            set_progress('executando')
+            return f'cliques: {n_clicks}'
+
+        self.assertEqual(run(3), 'cliques: 3')
+        spec = [c for c in app._callback_list if c['output'] == 'out.children'][0]
+        self.assertFalse(spec.get('background'))
+        self.assertNotIn('cancel', str(spec.get('running')))
+
+
+@unittest.skipUnless(BACKGROUND_JOBS_AVAILABLE, "Dependências de tarefas em segundo plano não instaladas")
+class TestJobQueue(unittest.TestCase):
+    """Testes para a fila de tarefas e o limite de processos"""
+
+    def setUp(self):
+        import diskcache
+        self.cache = diskcache.Cache(tempfile.mkdtemp())
+        self.manager = background_jobs.BoundedDiskcacheManager(self.cache, max_jobs=1)
+        self.calls = []
+        self.job_fn = lambda key, progress_key, args, context: self.calls.append((key, args))
+        self.manager.func_registry['callback'] = self.job_fn
+
+    def tearDown(self):
+        self.cache.close()
+
+    def test_dead_process_slot_is_reclaimed(self):
+        """Testa que a vaga de um processo encerrado (ex.: cancelado) é recuperada"""
+        self.cache.set(background_jobs._SLOTS_KEY, [2 ** 22 + 12345, os.getpid()])
+        with self.cache.transact():
+            self.assertEqual(self.manager._live_slots(), [os.getpid()])
+
+    def test_jobs_wait_in_queue_without_extra_processes(self):
+        """Testa que tarefas além do limite esperam na fila sem criar processos"""
+        with mock.patch.object(self.manager, '_start_worker', return_value=os.getpid()) as start:
+            first = self.manager.call_job_fn('first', self.job_fn, [1], {})
+            second = self.manager.call_job_fn('second', self.job_fn, [2], {})
+            self.assertTrue(self.manager.job_running(second))
+        start.assert_called_once()
+
+        # O processo da vaga executa toda a fila e libera a vaga ao terminar
+        self.manager._drain()
+        self.assertEqual(self.calls, [('first', [1]), ('second', [2])])
+        self.assertFalse(self.manager.job_running(first))
+        self.assertEqual(self.cache.get(background_jobs._SLOTS_KEY), [])
+
+    def test_cancelled_job_is_skipped(self):
+        """Testa que a tarefa cancelada enquanto aguarda não é executada"""
+        with mock.patch.object(self.manager, '_start_worker', return_value=os.getpid()):
+            self.manager.call_job_fn('first', self.job_fn, [1], {})
+            second = self.manager.call_job_fn('second', self.job_fn, [2], {})
+        self.manager.terminate_job(second)
+        self.assertFalse(self.manager.job_running(second))
+
+        self.manager._drain()
+        self.assertEqual(self.calls, [('first', [1])])
+
+    def test_memory_backend_fails_loudly(self):
+        """Testa que sessões em memória com tarefas habilitadas impedem a inicialização"""
+        with mock.patch.object(background_jobs.Config, 'BACKGROUND_JOBS_ENABLED', True), \
+                mock.patch.object(background_jobs.Config, 'SESSION_STORE_BACKEND', 'memory'):
+            with self.assertRaises(RuntimeError):
+                background_jobs.create_background_managers()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.chart_scheduler import ChartBuildScheduler, SharedAggregates
+
+
+class TestSharedAggregates(unittest.TestCase):
+    def test_computes_once_across_threads(self):
+        """Testa que chamadas concorrentes reaproveitam o mesmo cálculo"""
+        aggregates = SharedAggregates()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return 42
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(aggregates.get('soma', compute)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [42] * 4)
+        self.assertEqual(len(calls), 1)
+
+
+class TestChartBuildScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = ChartBuildScheduler(max_workers=2, timeout=0.2)
+
+    def test_builds_each_state_once(self):
+        """Testa que todos os gráficos de um estado são construídos uma única vez"""
+        factory_calls = []
+
+        def factory():
+            factory_calls.append(1)
+            return {'a': lambda: 'fig-a', 'b': lambda: 'fig-b'}
+
+        self.assertEqual(self.scheduler.get_chart('estado', 'a', factory), (True, 'fig-a', None))
+        self.assertEqual(self.scheduler.get_chart('estado', 'b', factory), (True, 'fig-b', None))
+        self.assertEqual(len(factory_calls), 1)
+
+    def test_timeout_does_not_block_other_charts(self):
+        """Testa que um gráfico lento gera erro sem atrasar os demais"""
+        def factory():
+            return {'lento': lambda: time.sleep(1) or 'fig', 'rapido': lambda: 'fig-rapido'}
+
+        success, fig, error = self.scheduler.get_chart('estado', 'lento', factory)
+        self.assertFalse(success)
+        self.assertIn('Tempo esgotado', error)
+        self.assertEqual(self.scheduler.get_chart('estado', 'rapido', factory), (True, 'fig-rapido', None))
+
+    def test_failed_build_is_retried(self):
+        """Testa que uma construção com erro é refeita na próxima chamada"""
+        attempts = []
+
+        def builder():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ValueError('falha')
+            return 'fig'
+
+        success, _, error = self.scheduler.get_chart('estado', 'a', lambda: {'a': builder})
+        self.assertFalse(success)
+        self.assertIn('falha', error)
+        self.assertEqual(self.scheduler.get_chart('estado', 'a', lambda: {'a': builder}), (True, 'fig', None))
+
+    def test_unknown_chart(self):
+        """Testa gráfico inexistente"""
+        success, _, error = self.scheduler.get_chart('estado', 'x', lambda: {})
+        self.assertFalse(success)
+        self.assertIsNotNone(error)
+
+
+    def test_run_batch_with_per_chart_errors(self):
+        """Testa lote executado sem estado, com erro e tempo esgotado por gráfico"""
+        def falha():
+            raise ValueError('falha')
+
+        results = self.scheduler.run({'ok': lambda: 'fig', 'erro': falha,
+                                      'lento': lambda: time.sleep(1) or 'fig'})
+        self.assertEqual(results['ok'], (True, 'fig', None))
+        self.assertIn('falha', results['erro'][2])
+        self.assertIn('Tempo esgotado', results['lento'][2])
+
+    def test_hung_batch_does_not_exhaust_pool(self):
+        """Testa que construtores presos após o tempo limite não esgotam o pool de outros lotes"""
+        gate = threading.Event()
+        self.addCleanup(gate.set)
+        scheduler = ChartBuildScheduler(max_workers=2, timeout=0.1, max_abandoned=2)
+        hung = lambda: gate.wait(5) and 'fig'
+
+        started = []
+        results = scheduler.run({'a': hung, 'b': hung, 'c': lambda: started.append(1)})
+        self.assertTrue(all('Tempo esgotado' in results[name][2] for name in 'abc'))
+        # O terceiro construtor aguardava vaga e não chega a ser executado
+        time.sleep(0.05)
+        self.assertEqual(started, [])
+        self.assertEqual(scheduler.abandoned(), 2)
+
+        # Os gráficos dos dashboards usam outro pool
+        self.assertEqual(scheduler.get_chart('estado', 'a', lambda: {'a': lambda: 'fig'}), (True, 'fig', None))
+        # Acima do limite de abandonados novos lotes são recusados sem criar threads
+        self.assertIn('ocupado', scheduler.run({'ok': lambda: 'fig'})['ok'][2])
+
+        gate.set()
+        deadline = time.monotonic() + 2
+        while scheduler.abandoned() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(scheduler.run({'ok': lambda: 'fig'}), {'ok': (True, 'fig', None)})
+
+
+class TestBatchAggregates(unittest.TestCase):
+    def test_group_stats_shared_between_charts(self):
+        """Testa estatísticas por grupo calculadas uma vez para dois boxplots do mesmo lote"""
+        import pandas as pd
+        from unittest import mock
+        from src import chart_generator as module
+        from src.distribution_stats import compute_group_stats
+
+        data = pd.DataFrame({'g': ['a', 'b'] * 10, 'v': range(20)})
+        aggregates = SharedAggregates()
+        with mock.patch.object(module, 'compute_group_stats', wraps=compute_group_stats) as stats:
+            for title in ('um', 'dois'):
+                success, _, _ = module.chart_generator.generate_chart(
+                    data, 'g', 'v', 'Boxplot', {'engine': 'plotly', 'title': title}, aggregates)
+                self.assertTrue(success)
+        self.assertEqual(stats.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+from src.chunked_storage import (PYARROW_AVAILABLE, ChunkedDatasetStore, decode_chunk, encode_chunk,
+                                 prepare_dataset, split_dataset)
+
+
+class FakeSupabase:
+    """Tabelas imported_data e imported_data_chunks em memória"""
+
+    def __init__(self):
+        self.chunks = {}
+        self.imports = {}
+        self.chunk_writes = 0
+
+    def get_existing_chunk_hashes(self, hashes):
+        return True, {h for h in hashes if h in self.chunks}, None
+
+    def save_dataset_chunks(self, chunks):
+        for chunk in chunks:
+            self.chunks.setdefault(chunk['content_hash'], chunk)
+        self.chunk_writes += len(chunks)
+        return True, len(chunks), None
+
+    def save_imported_data(self, data_source_id, data, columns, row_count, file_size_bytes=None,
+                           content_hash=None, chunk_hashes=None):
+        imported_data_id = f"imp-{len(self.imports) + 1}"
+        self.imports[imported_data_id] = {'id': imported_data_id, 'data_source_id': data_source_id,
+                                          'data': data, 'columns': columns, 'file_size_bytes': file_size_bytes,
+                                          'content_hash': content_hash, 'chunk_hashes': chunk_hashes}
+        return True, imported_data_id, None
+
+    def find_imported_data(self, content_hash, data_source_id):
+        rows = [row for row in self.imports.values()
+                if row['content_hash'] == content_hash and row['data_source_id'] == data_source_id]
+        return True, rows[-1] if rows else None, None
+
+    def get_imported_data(self, imported_data_id):
+        row = self.imports.get(imported_data_id)
+        return (True, row, None) if row else (False, None, 'não encontrado')
+
+    def get_dataset_chunks(self, hashes):
+        return True, [self.chunks[h] for h in hashes if h in self.chunks], None
+
+
+class TestChunkedStorage(unittest.TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'id': range(10),
+            'nome': [f'item {i}' for i in range(10)],
+            'valor': [1.5, None] * 5,
+            'data': pd.date_range('2024-01-01', periods=10),
+        })
+        self.client = FakeSupabase()
+        self.store = ChunkedDatasetStore(self.client, chunk_rows=4)
+
+    def test_split_is_content_addressed(self):
+        """Testa hashes estáveis e blocos iniciais compartilhados após novas linhas"""
+        content_hash, chunks = split_dataset(self.data, 4)
+        self.assertEqual(split_dataset(self.data.copy(), 4)[0], content_hash)
+        self.assertEqual([chunk['row_count'] for chunk in chunks], [4, 4, 2])
+
+        appended = pd.concat([self.data, self.data.tail(2)], ignore_index=True)
+        appended_hash, appended_chunks = split_dataset(appended, 4)
+        self.assertNotEqual(appended_hash, content_hash)
+        self.assertEqual([c['content_hash'] for c in appended_chunks[:2]],
+                         [c['content_hash'] for c in chunks[:2]])
+
+    def test_unchanged_load_writes_nothing(self):
+        """Testa que blocos repetidos e conteúdo já importado não são gravados de novo"""
+        prepared = split_dataset(self.data, 4)
+        self.assertIsNone(self.store.find(prepared[0], 'fonte'))
+        success, imported_data_id, _ = self.store.save('fonte', self.data, prepared)
+        self.assertTrue(success)
+        self.assertEqual(self.client.chunk_writes, 3)
+        self.assertEqual(self.store.find(prepared[0], 'fonte'), imported_data_id)
+        # Tamanho somado dos blocos codificados, sem serializar o dataset de novo
+        self.assertEqual(self.client.imports[imported_data_id]['file_size_bytes'],
+                         sum(chunk['byte_size'] for chunk in prepared[1]))
+        # O mesmo conteúdo em outra fonte é uma nova importação (blocos reaproveitados)
+        self.assertIsNone(self.store.find(prepared[0], 'outra'))
+
+        # Nova linha no fim: só o último bloco muda
+        appended = pd.concat([self.data, self.data.tail(1)], ignore_index=True)
+        self.store.save('fonte', appended)
+        self.assertEqual(self.client.chunk_writes, 4)
+
+    def test_unconfirmed_import_is_not_remembered(self):
+        """Testa que uma importação ainda não gravada (ex.: na fila) não é dada como existente"""
+        prepared = split_dataset(self.data, 4)
+        self.store.save('fonte', self.data, prepared)
+        # A gravação em segundo plano falhou: a linha não chegou ao banco
+        self.client.imports.clear()
+        self.assertIsNone(self.store.find(prepared[0], 'fonte'))
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow não instalado")
+    def test_prepare_reports_unencodable_columns(self):
+        """Testa que colunas com tipos misturados retornam erro em vez de exceção"""
+        success, prepared, error = prepare_dataset(pd.DataFrame({'misto': [1, 'a', 2.5]}))
+        self.assertFalse(success)
+        self.assertIsNone(prepared)
+        self.assertIn('blocos', error)
+
+        success, prepared, _ = prepare_dataset(self.data, 4)
+        self.assertTrue(success)
+        self.assertEqual(prepared, split_dataset(self.data, 4))
+
+    def test_reader_roundtrip(self):
+        """Testa leitura bloco a bloco de volta para o DataFrame original"""
+        _, imported_data_id, _ = self.store.save('fonte', self.data)
+        self.assertEqual([len(chunk) for chunk in self.store.iter_chunks(imported_data_id)], [4, 4, 2])
+
+        success, data, _ = self.store.load(imported_data_id)
+        self.assertTrue(success)
+        pd.testing.assert_frame_equal(data, self.data)
+
+    def test_legacy_rows_and_missing_chunks(self):
+        """Testa importações antigas em JSONB e erro com bloco ausente"""
+        self.client.imports['antigo'] = {'id': 'antigo', 'data': [{'a': 1}, {'a': 2}], 'columns': ['a'],
+                                         'chunk_hashes': None}
+        success, data, _ = self.store.load('antigo')
+        self.assertTrue(success)
+        self.assertEqual(data['a'].tolist(), [1, 2])
+
+        _, imported_data_id, _ = self.store.save('fonte', self.data)
+        self.client.chunks.clear()
+        success, _, error = self.store.load(imported_data_id)
+        self.assertFalse(success)
+        self.assertIn('não encontrado', error)
+
+    def test_json_encoding(self):
+        """Testa a codificação sem pyarrow (JSON com gzip)"""
+        chunk = self.data[['id', 'nome']]
+        decoded = decode_chunk('json.gz', encode_chunk(chunk, 'json.gz'))
+        self.assertEqual(decoded.to_dict('records'), chunk.to_dict('records'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Testes para o motor de correlação incremental
+"""
+import unittest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.correlation_engine import CoMomentAccumulator, CorrelationEngine
+
+
+class TestCoMomentAccumulator(unittest.TestCase):
+    """Testes para o acumulador de co-momentos"""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        a = rng.normal(1000, 5, 2000)
+        self.data = pd.DataFrame({
+            'a': a,
+            'b': a * 2 + rng.normal(0, 3, 2000),
+            'c': rng.normal(0, 1, 2000),
+            'label': ['x', 'y'] * 1000
+        })
+        self.data.loc[::7, 'b'] = np.nan
+        self.data.loc[::11, 'c'] = np.nan
+
+    def test_matches_pandas_with_missing_values(self):
+        """Testa correlação par a par igual à do pandas"""
+        result = CoMomentAccumulator.from_frame(self.data).correlation()
+        expected = self.data.select_dtypes(include=['number']).corr()
+        np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), atol=1e-10)
+
+    def test_incremental_update_equals_full(self):
+        """Testa atualização em blocos igual ao cálculo completo"""
+        accumulator = CoMomentAccumulator(['a', 'b', 'c'])
+        for start in range(0, len(self.data), 300):
+            accumulator.update(self.data.iloc[start:start + 300])
+
+        full = CoMomentAccumulator.from_frame(self.data).correlation()
+        np.testing.assert_allclose(accumulator.correlation().to_numpy(), full.to_numpy(), atol=1e-10)
+        self.assertEqual(accumulator.rows, len(self.data))
+
+    def test_merge_mismatched_columns(self):
+        """Testa erro ao combinar acumuladores de colunas diferentes"""
+        with self.assertRaises(ValueError):
+            CoMomentAccumulator(['a']).merge(CoMomentAccumulator(['b']))
+
+
+class TestCorrelationEngine(unittest.TestCase):
+    """Testes para o cache de correlações"""
+
+    def setUp(self):
+        self.engine = CorrelationEngine()
+        self.data = pd.DataFrame({
+            'region': ['N', 'S', 'L'] * 40,
+            'x': np.arange(120, dtype=float),
+            'y': np.sin(np.arange(120)),
+        })
+
+    def test_cached_matrix_and_append(self):
+        """Testa reutilização do cache e atualização com linhas anexadas"""
+        first = self.engine.get_correlation(self.data.iloc[:60], dataset_key='sheet')
+        self.assertIs(self.engine.get_correlation(self.data.iloc[:60], dataset_key='sheet'), first)
+
+        appended = self.engine.get_correlation(self.data, dataset_key='sheet')
+        expected = self.data[['x', 'y']].corr()
+        np.testing.assert_allclose(appended.to_numpy(), expected.to_numpy(), atol=1e-10)
+
+    def test_edited_cell_invalidates_cache(self):
+        """Testa que uma célula editada com o mesmo número de linhas recalcula a matriz"""
+        self.engine.get_correlation(self.data, dataset_key='sheet')
+        edited = self.data.copy()
+        edited.loc[5, 'y'] = 100.0
+        result = self.engine.get_correlation(edited, dataset_key='sheet')
+        np.testing.assert_allclose(result.to_numpy(), edited[['x', 'y']].corr().to_numpy(), atol=1e-10)
+
+    def test_changed_prefix_is_not_merged(self):
+        """Testa que um dataset maior com linhas anteriores alteradas não reaproveita o acumulador"""
+        self.engine.get_correlation(self.data.iloc[:60], dataset_key='sheet')
+        grown = self.data.copy()
+        grown.loc[0, 'x'] = -500.0
+        result = self.engine.get_correlation(grown, dataset_key='sheet')
+        np.testing.assert_allclose(result.to_numpy(), grown[['x', 'y']].corr().to_numpy(), atol=1e-10)
+
+    def test_partition_merge_matches_filter(self):
+        """Testa combinação de partições igual ao filtro aplicado"""
+        result = self.engine.get_partitioned_correlation(self.data, 'region', ['N', 'L'], dataset_key='sheet')
+        filtered = self.data[self.data['region'].isin(['N', 'L'])][['x', 'y']].corr()
+        np.testing.assert_allclose(result.to_numpy(), filtered.to_numpy(), atol=1e-10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import re
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.validators import DataValidator
+from src.supabase_client import SupabaseClient
+from src.write_behind import WriteBehindQueue
+
+SHEET_ID = '1AbCdEfGhIjKlMnOpQ_rs-tu'
+
+MIGRATION = os.path.join(os.path.dirname(__file__), '..', 'migrations', 'data_sources_url_dedup.sql')
+
+SAMPLE_URLS = [
+    f'https://docs.google.com/spreadsheets/d/{SHEET_ID}/edit#gid=0',
+    f' HTTPS://Docs.Google.com/spreadsheets/d/{SHEET_ID}/view?usp=sharing ',
+    f'docs.google.com/spreadsheets/d/{SHEET_ID}',
+    f'https://docs.google.com.evil.com/spreadsheets/d/{SHEET_ID}',
+    f'https://example.com/?next=docs.google.com/spreadsheets/d/{SHEET_ID}',
+    'https://Example.com/dados/?b=2&a=1#topo',
+    'http://example.com/a%20b/?q=1+2//',
+    '\thttps://example.com/dados\n',
+    '',
+]
+
+
+def sql_normalize_source_url(url):
+    """Avalia public.normalize_source_url (migração) com os padrões lidos do próprio SQL"""
+    with open(MIGRATION, encoding='utf-8') as f:
+        sql = f.read()
+    control = re.search(r"regexp_replace\(coalesce\(url, ''\), '([^']+)', '', 'g'\)", sql).group(1)
+    sheets = re.search(r"regexp_match\(cleaned, '([^']+)', 'i'\)", sql).group(1)
+    prefix = re.search(r"WHEN sheet_id IS NOT NULL THEN '([^']+)' \|\| sheet_id", sql).group(1)
+    trailing = re.search(r"regexp_replace\(split_part\(cleaned, '#', 1\), '([^']+)', ''\)", sql).group(1)
+
+    cleaned = re.sub(control, '', url).strip(' ')
+    match = re.search(sheets, cleaned, re.IGNORECASE)
+    if match:
+        return prefix + match.group(1)
+    return re.sub(trailing, '', cleaned.split('#', 1)[0], count=1)
+
+
+class TestNormalizeSourceUrl(unittest.TestCase):
+    def test_google_sheets_variants(self):
+        """Testa que modos, abas e parâmetros da mesma planilha viram uma única URL"""
+        expected = f'https://docs.google.com/spreadsheets/d/{SHEET_ID}'
+        for url in (f'https://docs.google.com/spreadsheets/d/{SHEET_ID}/edit#gid=0',
+                    f' http://DOCS.google.com/spreadsheets/d/{SHEET_ID}/view?usp=sharing ',
+                    f'docs.google.com/spreadsheets/d/{SHEET_ID}'):
+            self.assertEqual(DataValidator.normalize_source_url(url), expected)
+
+    def test_other_urls(self):
+        """Testa que as demais URLs só perdem espaços, fragmento e barra final"""
+        self.assertEqual(DataValidator.normalize_source_url(' https://Example.com/dados/?b=2&a=1#topo'),
+                         'https://Example.com/dados/?b=2&a=1')
+        self.assertEqual(DataValidator.normalize_source_url('https://example.com/dados//'),
+                         'https://example.com/dados')
+
+    def test_matches_migration_backfill(self):
+        """Testa que a função SQL da migração produz o mesmo valor que a normalização em Python"""
+        self.assertEqual([sql_normalize_source_url(url) for url in SAMPLE_URLS],
+                         [DataValidator.normalize_source_url(url) for url in SAMPLE_URLS])
+
+
+class TestDataSourceUpsert(unittest.TestCase):
+    def setUp(self):
+        self.client = SupabaseClient()
+        self.client.is_available = True
+        self.client._client = mock.MagicMock()
+        self.table = self.client._client.table.return_value
+        self.table.upsert.return_value.execute.return_value = SimpleNamespace(data=[{'id': 'src-1'}])
+        self.queued = []
+        self.client.write_queue = WriteBehindQueue(lambda table, rows: self.queued.extend(rows),
+                                                   batch_rows=10, flush_interval=10)
+        self.addCleanup(self.client.write_queue.close, 1)
+
+    def test_same_sheet_reuses_source(self):
+        """Testa upsert pela URL normalizada e reaproveitamento do id em cache"""
+        url = f'https://docs.google.com/spreadsheets/d/{SHEET_ID}/edit'
+        self.assertEqual(self.client.save_data_source('Planilha', url, 'google_sheets'), (True, 'src-1', None))
+        _, kwargs = self.table.upsert.call_args
+        self.assertEqual(kwargs['on_conflict'], 'normalized_url')
+
+        # Segunda carga: mesmo id, atualização apenas pela fila de gravação
+        self.assertEqual(self.client.save_data_source('Planilha', url + '#gid=0', 'google_sheets'),
+                         (True, 'src-1', None))
+        self.assertEqual(self.table.upsert.call_count, 1)
+        self.assertTrue(self.client.write_queue.flush(2))
+        self.assertEqual(self.queued[0]['normalized_url'], f'https://docs.google.com/spreadsheets/d/{SHEET_ID}')
+
+    def test_latest_source_is_cached(self):
+        """Testa consulta de uma única linha e cache da fonte mais recente"""
+        query = self.table.select.return_value.eq.return_value.order.return_value.order.return_value
+        query.limit.return_value.execute.return_value = SimpleNamespace(data=[{'id': 'src-9'}])
+
+        self.assertEqual(self.client.get_latest_data_source(), (True, {'id': 'src-9'}, None))
+        self.assertEqual(self.client.get_latest_data_source()[1]['id'], 'src-9')
+        query.limit.assert_called_once_with(1)
+
+        # Uma carga nova passa a ser a fonte mais recente sem nova consulta
+        self.client.save_data_source('Outra', 'https://example.com/a.csv', 'csv')
+        self.assertEqual(self.client.get_latest_data_source()[1]['id'], 'src-1')
+        query.limit.assert_called_once_with(1)
+
+
+if __name__ == '__main__':
+    unittest.main()
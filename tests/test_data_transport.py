@@ -0,0 +1,125 @@
+import unittest
+import sys
+import os
+import io
+import gzip
+import json
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+from src.data_transport import (PYARROW_AVAILABLE, encode_dataframe, negotiate_format,
+                                parse_chunk_rows, records_size, stream_dataframe)
+from config import Config
+
+
+class TestNegotiateFormat(unittest.TestCase):
+    def test_default_and_body_format(self):
+        """Testa formato padrão e prioridade do campo 'format'"""
+        self.assertEqual(negotiate_format(None), (True, ('records', None), None))
+        self.assertEqual(negotiate_format('split', 'application/vnd.apache.arrow.stream', 'gzip'),
+                         (True, ('split', 'gzip'), None))
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow não instalado")
+    def test_accept_header(self):
+        """Testa escolha do formato pelo cabeçalho Accept"""
+        success, negotiated, _ = negotiate_format(None, 'application/vnd.apache.parquet;q=0.9, */*')
+        self.assertTrue(success)
+        self.assertEqual(negotiated, ('parquet', None))
+
+    def test_invalid_format_or_compression(self):
+        """Testa formatos e compressões não suportados"""
+        self.assertFalse(negotiate_format('xml')[0])
+        self.assertFalse(negotiate_format('records', compression='zstd')[0])
+
+
+class TestEncodeDataFrame(unittest.TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame({'a': [1, 2], 'b': ['x', None],
+                                  'd': pd.to_datetime(['2024-01-01', '2024-01-02'])})
+
+    def test_split_json(self):
+        """Testa JSON colunar sem repetir nomes de colunas"""
+        success, payload, _ = encode_dataframe(self.data, 'split')
+        self.assertTrue(success)
+        decoded = json.loads(payload.text)
+        self.assertEqual(decoded['columns'], ['a', 'b', 'd'])
+        self.assertEqual(decoded['data'][1][:2], [2, None])
+        self.assertTrue(decoded['data'][0][2].startswith('2024-01-01'))
+
+    def test_records_gzip(self):
+        """Testa JSON records comprimido"""
+        success, payload, _ = encode_dataframe(self.data, 'records', 'gzip')
+        self.assertTrue(success)
+        self.assertEqual(json.loads(gzip.decompress(payload))[0]['a'], 1)
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow não instalado")
+    def test_arrow_and_parquet_roundtrip(self):
+        """Testa leitura dos formatos binários"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        success, payload, _ = encode_dataframe(self.data, 'arrow', 'zstd')
+        self.assertTrue(success)
+        table = pa.ipc.open_stream(payload).read_all()
+        self.assertEqual(table.column('a').to_pylist(), [1, 2])
+
+        success, payload, _ = encode_dataframe(self.data, 'parquet', 'snappy')
+        self.assertTrue(success)
+        self.assertEqual(pq.read_table(io.BytesIO(payload)).num_rows, 2)
+
+
+
+class TestStreamDataFrame(unittest.TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame({'a': range(25), 'b': [f'v{i}' for i in range(25)]})
+
+    def test_ndjson_chunks(self):
+        """Testa NDJSON em blocos igual ao corpo inteiro"""
+        success, stream, _ = stream_dataframe(self.data, 'ndjson', chunk_rows=10)
+        self.assertTrue(success)
+        chunks = list(stream)
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(b''.join(chunks), encode_dataframe(self.data, 'ndjson')[1])
+        self.assertEqual(stream.bytes_written, sum(len(chunk) for chunk in chunks))
+        self.assertEqual(json.loads(chunks[2].splitlines()[-1]), {'a': 24, 'b': 'v24'})
+
+    def test_ndjson_gzip_counts_compressed_bytes(self):
+        """Testa contagem dos bytes comprimidos enviados"""
+        success, stream, _ = stream_dataframe(self.data, 'ndjson', 'gzip', chunk_rows=10)
+        body = b''.join(stream)
+        self.assertEqual(stream.bytes_written, len(body))
+        self.assertEqual(len(gzip.decompress(body).splitlines()), 25)
+        self.assertEqual(stream.raw_bytes, records_size(self.data))
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow não instalado")
+    def test_arrow_record_batches(self):
+        """Testa stream Arrow com um record batch por bloco"""
+        import pyarrow as pa
+
+        success, stream, _ = stream_dataframe(self.data, 'arrow', 'lz4', chunk_rows=10)
+        reader = pa.ipc.open_stream(b''.join(stream))
+        batches = list(reader)
+        self.assertEqual([batch.num_rows for batch in batches], [10, 10, 5])
+        self.assertEqual(reader.schema.names, ['a', 'b'])
+
+    def test_chunk_rows_validation(self):
+        """Testa conversão, limites e padrão do tamanho de bloco pedido pelo cliente"""
+        self.assertEqual(parse_chunk_rows(None), (True, Config.STREAM_CHUNK_ROWS, None))
+        self.assertEqual(parse_chunk_rows('2'), (True, 2, None))
+        for value in (-2, 0, 'dois', [2], True, Config.STREAM_MAX_CHUNK_ROWS + 1):
+            success, _, error = parse_chunk_rows(value)
+            self.assertFalse(success, value)
+            self.assertIn('chunk_rows', error)
+
+    def test_unsupported_stream_format(self):
+        """Testa formato sem suporte a streaming"""
+        self.assertFalse(stream_dataframe(self.data, 'parquet')[0])
+
+    def test_records_size(self):
+        """Testa tamanho medido sem montar o JSON inteiro"""
+        self.assertEqual(records_size(self.data), len(self.data.to_json(orient='records')) - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+from src.dataset_handles import DatasetHandles, make_dataset_id, select_data
+from src.warm_cache import WarmCache
+
+URL = 'https://docs.google.com/spreadsheets/d/exemplo'
+
+
+class TestSelectData(unittest.TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame({'cat': ['a', 'b', 'a'], 'x': [1, 2, 3], 'y': [4, 5, 6]})
+
+    def test_filters_and_projection(self):
+        """Testa filtros por coluna e projeção aplicados no servidor"""
+        success, data, error = select_data(self.data, {'cat': ['a']}, ['x'])
+        self.assertTrue(success)
+        self.assertIsNone(error)
+        self.assertEqual(list(data.columns), ['x'])
+        self.assertEqual(data['x'].tolist(), [1, 3])
+
+    def test_unknown_column(self):
+        """Testa erro para coluna inexistente"""
+        success, data, error = select_data(self.data, columns=['z'])
+        self.assertFalse(success)
+        self.assertIn('z', error)
+
+
+class TestDatasetHandles(unittest.TestCase):
+    def setUp(self):
+        self.handles = DatasetHandles(cache=WarmCache(max_memory_mb=16, ttl=60, persist=False))
+        self.data = pd.DataFrame({'a': [1, 2, 3]})
+        self.loads = []
+
+    def loader(self, url):
+        self.loads.append(url)
+        return True, self.data, None
+
+    def test_register_and_resolve(self):
+        """Testa registro com schema compacto e resolução sem recarregar"""
+        handle = self.handles.register(URL, self.data)
+        self.assertEqual(handle['dataset_id'], make_dataset_id(URL))
+        self.assertEqual(handle['schema'], [{'name': 'a', 'dtype': 'int64'}])
+        self.assertEqual(handle['shape'], [3, 1])
+
+        success, data, _ = self.handles.resolve(handle['dataset_id'], self.loader)
+        self.assertTrue(success)
+        self.assertIs(data, self.data)
+        self.assertEqual(self.loads, [])
+
+    def test_version_changes_only_on_new_content(self):
+        """Testa que a versão acompanha o conteúdo, não o número de recargas"""
+        dataset_id = self.handles.register(URL, self.data)['dataset_id']
+        version = self.handles.dataset_key(dataset_id)
+        self.handles.register(URL, self.data.copy())
+        self.assertEqual(self.handles.dataset_key(dataset_id), version)
+        self.handles.register(URL, pd.DataFrame({'a': [1, 2, 4]}))
+        self.assertNotEqual(self.handles.dataset_key(dataset_id), version)
+
+    def test_version_survives_eviction_and_new_process(self):
+        """Testa que outra planilha após descarte ou em outro processo não reaproveita a versão"""
+        handles = DatasetHandles(cache=WarmCache(max_memory_mb=16, ttl=60, persist=False), max_handles=1)
+        dataset_id = handles.register(URL, self.data)['dataset_id']
+        version = handles.dataset_key(dataset_id)
+
+        # Entrada descartada do LRU e planilha alterada
+        handles.register(URL + '/outra', self.data)
+        self.assertIsNone(handles.dataset_key(dataset_id))
+        handles.register(URL, pd.DataFrame({'a': [9, 9, 9]}))
+        self.assertNotEqual(handles.dataset_key(dataset_id), version)
+
+        # Processo novo com o mesmo conteúdo chega à mesma chave
+        self.handles.register(URL, self.data.copy())
+        self.assertEqual(self.handles.dataset_key(dataset_id), version)
+
+    def test_unknown_handle_resolved_with_url(self):
+        """Testa recarga em um container que não conhece o identificador"""
+        dataset_id = make_dataset_id(URL)
+        success, _, error = self.handles.resolve(dataset_id, self.loader)
+        self.assertFalse(success)
+        self.assertIsNotNone(error)
+
+        success, data, _ = self.handles.resolve(dataset_id, self.loader, url=URL)
+        self.assertTrue(success)
+        self.assertEqual(self.loads, [URL])
+
+        # URL que não corresponde ao identificador é recusada
+        success, _, _ = self.handles.resolve(dataset_id, self.loader, url=URL + 'x')
+        self.assertTrue(success)  # já registrado pela chamada anterior
+        self.assertFalse(self.handles.resolve('ds_outro', self.loader, url=URL)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
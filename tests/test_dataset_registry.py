@@ -0,0 +1,129 @@
+"""
+Testes para o registro de datasets em memória compartilhada
+"""
+import time
+import json
+import unittest
+import tempfile
+from unittest import mock
+import multiprocessing
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.dataset_registry import SharedDatasetRegistry, SharedMemoryBackend
+from src.session_store import SessionStore, create_backend
+
+
+def _attach_in_worker(directory, queue):
+    """Anexa o dataset em outro processo e devolve a soma da coluna"""
+    registry = SharedDatasetRegistry(directory)
+    data = registry.attach('sheet')
+    queue.put(float(data['value'].sum()))
+
+
+class TestSharedDatasetRegistry(unittest.TestCase):
+    """Testes para publicação, anexação e descarte"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.directory = os.path.join(self._tmp.name, 'datasets')
+        self.registry = SharedDatasetRegistry(self.directory, max_bytes=10 * 1024 * 1024)
+        self.data = pd.DataFrame({'value': np.arange(1000, dtype=float), 'label': ['a', 'b'] * 500})
+
+    def test_attach_is_read_only_view(self):
+        """Testa visão somente leitura e reutilização no mesmo processo"""
+        self.assertTrue(self.registry.publish('sheet', self.data))
+        attached = self.registry.attach('sheet')
+
+        pd.testing.assert_frame_equal(attached, self.data)
+        self.assertFalse(attached['value'].to_numpy().flags.writeable)
+        self.assertIs(self.registry.attach('sheet'), attached)
+
+    def test_attach_from_other_process(self):
+        """Testa anexação do mesmo snapshot em outro processo"""
+        self.registry.publish('sheet', self.data)
+        context = multiprocessing.get_context('spawn')
+        queue = context.Queue()
+        worker = context.Process(target=_attach_in_worker, args=(self.directory, queue))
+        worker.start()
+        worker.join(60)
+        self.assertEqual(queue.get(timeout=5), float(self.data['value'].sum()))
+
+    def test_eviction_prefers_unreferenced(self):
+        """Testa descarte coordenado respeitando referências ativas"""
+        self.registry.publish('first', self.data)
+        self.registry.attach('first')
+        self.registry.publish('second', self.data)
+        self.registry.max_bytes = self.registry.total_bytes() + 1
+        self.registry.publish('third', self.data)
+
+        self.assertIsNotNone(self.registry.attach('first'))
+        self.assertIsNone(self.registry.attach('second'))
+
+    def test_repeated_attach_does_not_rewrite_index(self):
+        """Testa que consultas seguidas não regravam o índice (acesso atualizado de forma preguiçosa)"""
+        self.registry.publish('sheet', self.data)
+        self.registry.attach('sheet')
+        with mock.patch.object(self.registry, '_locked_index') as locked:
+            for _ in range(10):
+                self.registry.attach('sheet')
+        locked.assert_not_called()
+
+    def test_attached_views_are_bounded_and_released(self):
+        """Testa liberação das referências além de max_attached e no encerramento"""
+        self.registry.max_attached = 1
+        self.registry.publish('first', self.data)
+        self.registry.publish('second', self.data)
+        self.registry.attach('first')
+        self.registry.attach('second')
+
+        with open(os.path.join(self.directory, 'index.json'), encoding='utf-8') as f:
+            index = json.load(f)
+        self.assertEqual(index['first']['refs'], {})
+        self.assertIn(str(os.getpid()), index['second']['refs'])
+
+        self.registry.close()
+        with open(os.path.join(self.directory, 'index.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['second']['refs'], {})
+
+    def test_expired_session_state_is_removed(self):
+        """Testa remoção do estado de sessões sem uso além da validade"""
+        backend = SharedMemoryBackend(self.registry, state_ttl=60)
+        backend.set('session:old', {'filters': {}})
+        backend.set('session:new', {'filters': {}})
+        old_path = backend._state_path('session:old')
+        os.utime(old_path, (time.time() - 120, time.time() - 120))
+
+        self.assertEqual(backend.cleanup_state(force=True), 1)
+        self.assertIsNone(backend.get('session:old'))
+        self.assertIsNotNone(backend.get('session:new'))
+
+    def test_shared_backend_uses_registry_budget(self):
+        """Testa que o backend 'shared' usa o orçamento do registro por padrão"""
+        with mock.patch('src.dataset_registry.Config.DATASET_REGISTRY_PATH', self.directory), \
+                mock.patch('src.dataset_registry.Config.DATASET_REGISTRY_MAX_MB', 7):
+            backend = create_backend('shared')
+        self.assertEqual(backend.registry.max_bytes, 7 * 1024 * 1024)
+
+    def test_session_store_backend(self):
+        """Testa o backend compartilhado no armazenamento de sessões"""
+        store = SessionStore(SharedMemoryBackend(self.registry))
+        store.put_dataset('sheet', self.data)
+        store.save_session('abc', dataset_key='sheet', filters={'label': ['a']})
+
+        other = SessionStore(SharedMemoryBackend(SharedDatasetRegistry(self.directory)))
+        self.assertEqual(other.get_session('abc')['filters'], {'label': ['a']})
+        self.assertEqual(len(other.get_dataset('sheet')), 1000)
+
+        other.update_filters('abc', {'label': ['b']})
+        self.assertEqual(store.get_session('abc')['revision'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
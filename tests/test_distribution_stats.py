@@ -0,0 +1,92 @@
+"""
+Testes para as estatísticas de distribuição de Boxplot e Violino
+"""
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import distribution_stats
+from src.distribution_stats import compute_group_stats
+from src.chart_generator import ChartGenerator
+
+
+class TestComputeGroupStats(unittest.TestCase):
+    """Testes para o cálculo de estatísticas por grupo"""
+
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.data = pd.DataFrame({
+            'group': rng.choice(['A', 'B', 'C'], 5000),
+            'value': rng.normal(100, 15, 5000)
+        })
+
+    def test_exact_quartiles_match_pandas(self):
+        """Testa quartis exatos para bases pequenas"""
+        stats = compute_group_stats(self.data, 'group', 'value')
+        expected = self.data.groupby('group')['value'].quantile([0.25, 0.5, 0.75]).unstack()
+
+        self.assertEqual([s['label'] for s in stats], ['A', 'B', 'C'])
+        for s in stats:
+            self.assertAlmostEqual(s['q1'], expected.loc[s['label'], 0.25])
+            self.assertAlmostEqual(s['med'], expected.loc[s['label'], 0.5])
+            self.assertAlmostEqual(s['q3'], expected.loc[s['label'], 0.75])
+
+    def test_sketch_quartiles_are_close(self):
+        """Testa quartis estimados pelo sketch de histograma"""
+        with mock.patch.object(distribution_stats, 'EXACT_QUANTILE_MAX_ROWS', 0):
+            stats = compute_group_stats(self.data, 'group', 'value')
+        expected = self.data.groupby('group')['value'].quantile(0.5)
+        value_range = self.data['value'].max() - self.data['value'].min()
+
+        for s in stats:
+            self.assertLess(abs(s['med'] - expected[s['label']]), value_range / 500)
+
+    def test_whiskers_and_fliers(self):
+        """Testa bigodes dentro das cercas e amostragem de outliers"""
+        data = pd.DataFrame({'group': ['A'] * 205, 'value': list(range(100)) * 2 + [1000] * 5})
+        stats = compute_group_stats(data, 'group', 'value', max_outliers=3)[0]
+
+        iqr = stats['q3'] - stats['q1']
+        self.assertLessEqual(stats['whishi'], stats['q3'] + 1.5 * iqr)
+        self.assertEqual(len(stats['fliers']), 3)
+        self.assertTrue(all(value == 1000 for value in stats['fliers']))
+
+    def test_kde_is_normalized(self):
+        """Testa que a KDE binada integra aproximadamente 1"""
+        data = pd.DataFrame({'group': ['A'] * 5000, 'value': np.random.default_rng(0).normal(0, 1, 5000)})
+        stats = compute_group_stats(data, 'group', 'value', kde_points=400)[0]
+        area = np.trapezoid(stats['kde_vals'], stats['kde_coords']) if hasattr(np, 'trapezoid') \
+            else np.trapz(stats['kde_vals'], stats['kde_coords'])
+        self.assertGreater(area, 0.9)
+        self.assertLess(area, 1.05)
+
+    def test_non_numeric_values(self):
+        """Testa coluna Y sem valores numéricos"""
+        data = pd.DataFrame({'group': ['A', 'B'], 'value': ['x', 'y']})
+        self.assertEqual(compute_group_stats(data, 'group', 'value'), [])
+
+
+class TestPlotlyBoxplot(unittest.TestCase):
+    """Testes para o boxplot Plotly pré-calculado"""
+
+    def test_generate_plotly_boxplot(self):
+        """Testa boxplot Plotly com quartis pré-calculados"""
+        data = pd.DataFrame({'group': ['A', 'B'] * 50, 'value': list(range(100))})
+        success, fig, error = ChartGenerator().generate_chart(
+            data, 'group', 'value', 'Boxplot', {'engine': 'plotly'}
+        )
+        self.assertTrue(success, error)
+        box = fig.data[0]
+        self.assertEqual(list(box.x), ['A', 'B'])
+        self.assertIsNotNone(box.q1)
+        self.assertIsNone(box.y)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Testes para o serviço de exportação de gráficos em lote
+"""
+import unittest
+from unittest import mock
+import io
+import zipfile
+import pandas as pd
+import sys
+import os
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.export_service import ExportService
+from src.render_service import RenderService
+from src import chart_generator as chart_generator_module
+
+
+class TestExportService(unittest.TestCase):
+    """Testes para exportação e cache de imagens"""
+
+    def setUp(self):
+        self.render_service = RenderService(max_workers=2, backend='thread')
+        patcher = mock.patch.object(chart_generator_module, 'render_service', self.render_service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.render_service.shutdown)
+
+        self.service = ExportService(max_workers=2)
+        self.data = pd.DataFrame({'group': ['A', 'B'] * 20, 'value': range(40)})
+
+    def test_export_formats(self):
+        """Testa exportação em PNG, SVG e PDF"""
+        signatures = {'png': b'\x89PNG', 'svg': b'<svg', 'pdf': b'%PDF'}
+        for image_format, signature in signatures.items():
+            success, image_bytes, error = self.service.export_chart(
+                self.data, 'group', 'value', 'Boxplot', {}, image_format=image_format
+            )
+            self.assertTrue(success, error)
+            self.assertIn(signature, image_bytes[:400])
+
+    def test_cache_hit(self):
+        """Testa que a mesma figura não é renderizada duas vezes"""
+        self.service.export_chart(self.data, 'group', 'value', 'Violino', {})
+        with mock.patch.object(self.render_service, 'render') as render:
+            success, image_bytes, error = self.service.export_chart(
+                self.data, 'group', 'value', 'Violino', {'dataset_key': 'outra'}
+            )
+        self.assertTrue(success)
+        render.assert_not_called()
+
+    def test_batch_and_zip(self):
+        """Testa exportação em lote e empacotamento em ZIP"""
+        charts = [
+            {'name': 'box', 'data': self.data, 'x_col': 'group', 'y_col': 'value', 'chart_type': 'Boxplot'},
+            {'name': 'hist', 'data': self.data, 'x_col': 'group', 'y_col': 'value', 'chart_type': 'Histograma'},
+        ]
+        success, results, error = self.service.export_batch(charts, image_format='svg')
+        self.assertTrue(success, error)
+
+        archive = zipfile.ZipFile(io.BytesIO(ExportService.build_zip(results, 'svg')))
+        self.assertEqual(sorted(archive.namelist()), ['box.svg', 'hist.svg'])
+
+    def test_invalid_format(self):
+        """Testa formato não suportado"""
+        success, image_bytes, error = self.service.export_chart(self.data, 'group', 'value', 'Boxplot', image_format='gif')
+        self.assertFalse(success)
+        self.assertIsNotNone(error)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Testes para o motor de filtros incremental e os filtros dos apps Dash
+"""
+import unittest
+import pandas as pd
+import sys
+import os
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.filter_engine import FilterEngine
+from src.dash_filters import is_superseded, update_session_filters
+from src.session_store import SessionStore, session_store
+
+
+class TestFilterEngine(unittest.TestCase):
+    """Testes para máscaras em cache e normalização dos filtros"""
+
+    def setUp(self):
+        self.engine = FilterEngine(max_cache_mb=1)
+        self.data = pd.DataFrame({
+            'region': ['N', 'S', 'N', 'L'] * 25,
+            'segment': ['A', 'B'] * 50,
+            'sales': range(100)
+        })
+
+    def test_matches_isin(self):
+        """Testa resultado igual à filtragem direta com isin"""
+        filters = {'region': ['N', 'L'], 'segment': ['A']}
+        result = self.engine.apply(self.data, filters, dataset_key='sheet')
+        expected = self.data[self.data['region'].isin(['N', 'L']) & self.data['segment'].isin(['A'])]
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_only_changed_column_is_recomputed(self):
+        """Testa que alterar um filtro reaproveita as máscaras das demais colunas"""
+        self.engine.apply(self.data, {'region': ['N'], 'segment': ['A']}, dataset_key='sheet')
+        self.engine.apply(self.data, {'region': ['S'], 'segment': ['A']}, dataset_key='sheet')
+        columns = sorted(key[1] for key in self.engine._masks)
+        self.assertEqual(columns, ['region', 'region', 'segment'])
+
+    def test_full_selection_is_dropped(self):
+        """Testa que selecionar todos os valores equivale a não filtrar"""
+        filters = {'region': ['N', 'S', 'L'], 'segment': []}
+        self.assertEqual(self.engine.normalize(self.data, filters, dataset_key='sheet'), {})
+        self.assertIs(self.engine.apply(self.data, filters, dataset_key='sheet'), self.data)
+
+    def test_copies_of_same_content_hit_cache(self):
+        """Testa que uma nova cópia do mesmo conteúdo (backends em disco) reaproveita as máscaras"""
+        self.engine.apply(self.data, {'region': ['N']}, dataset_key='sheet@v1')
+        self.engine.apply(self.data.copy(), {'region': ['S']}, dataset_key='sheet@v1')
+        self.engine.apply(self.data.copy(), {'region': ['N']}, dataset_key='sheet@v1')
+        self.assertEqual(len(self.engine._masks), 2)
+
+    def test_session_cache_key_follows_content(self):
+        """Testa que a chave de cache da sessão muda com o conteúdo, não com o objeto"""
+        store = SessionStore()
+        store.put_dataset('sheet', self.data)
+        first = store.cache_key('sheet')
+        store.put_dataset('sheet', self.data.copy())
+        self.assertEqual(store.cache_key('sheet'), first)
+
+        reloaded = self.data.iloc[:4].copy()
+        store.put_dataset('sheet', reloaded)
+        self.assertNotEqual(store.cache_key('sheet'), first)
+        result = self.engine.apply(reloaded, {'region': ['N']}, dataset_key=store.cache_key('sheet'))
+        self.assertEqual(len(result), 2)
+
+
+class TestDashFilters(unittest.TestCase):
+    """Testes para a seleção de filtros aplicada à sessão"""
+
+    def setUp(self):
+        self.data = pd.DataFrame({'region': ['N', 'S', 'L'], 'sales': [1, 2, 3]})
+        self.session_id = SessionStore.new_session_id()
+        session_store.put_dataset('test-sheet', self.data)
+        session_store.save_session(self.session_id, dataset_key='test-sheet')
+
+    def tearDown(self):
+        session_store.delete_session(self.session_id)
+
+    def test_equivalent_selection_is_ignored(self):
+        """Testa que a seleção inicial (todos os valores) não dispara recálculo"""
+        selection = {'region': ['N', 'S', 'L'], 'sales': [1, 2, 3]}
+        self.assertIsNone(update_session_filters(self.session_id, selection, self.data))
+        self.assertEqual(session_store.get_revision(self.session_id), 0)
+
+    def test_superseded_selection(self):
+        """Testa que apenas a seleção mais recente segue válida"""
+        first = update_session_filters(self.session_id, {'region': ['N']}, self.data)
+        second = update_session_filters(self.session_id, {'region': ['S']}, self.data)
+
+        self.assertEqual(session_store.get_session(self.session_id)['filters'], {'region': ['S']})
+        self.assertTrue(is_superseded(self.session_id, first))
+        self.assertFalse(is_superseded(self.session_id, second))
+
+
+if __name__ == '__main__':
+    unittest.main()
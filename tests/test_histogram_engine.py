@@ -0,0 +1,84 @@
+"""
+Testes para o motor de histogramas
+"""
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.histogram_engine import HistogramEngine, StreamingHistogram, compute_histogram
+from src.chart_generator import ChartGenerator
+from src.cache_keys import dataset_version
+
+
+class TestHistogramEngine(unittest.TestCase):
+    """Testes para cálculo e cache de histogramas"""
+
+    def setUp(self):
+        self.engine = HistogramEngine(max_entries=2)
+        self.values = pd.Series([1.0, 2.0, 2.0, 3.0, None, np.inf])
+
+    def test_compute_histogram_ignores_invalid_values(self):
+        """Testa que nulos e infinitos são descartados"""
+        counts, edges = compute_histogram(self.values, bins=3)
+        self.assertEqual(counts.tolist(), [1, 2, 1])
+        self.assertEqual(len(edges), 4)
+
+    def test_cache_hit_by_filter_state(self):
+        """Testa reaproveitamento por coluna, bins e filtros"""
+        with mock.patch('src.histogram_engine.compute_histogram', wraps=compute_histogram) as spy:
+            self.engine.get_histogram(self.values, 3, 'v', 'ds', {'c': ['b', 'a']})
+            self.engine.get_histogram(self.values, 3, 'v', 'ds', {'c': ['a', 'b']})
+            self.assertEqual(spy.call_count, 1)
+
+            self.engine.get_histogram(self.values, 3, 'v', 'ds', {'c': ['a']})
+            self.assertEqual(spy.call_count, 2)
+
+    def test_dataset_version_tracks_content(self):
+        """Testa que a versão do dataset muda com uma célula editada e não com uma cópia"""
+        data = pd.DataFrame({'x': [1, 2, 3], 'y': ['a', 'b', 'c']})
+        edited = data.copy()
+        edited.loc[1, 'y'] = 'z'
+        self.assertEqual(dataset_version(data), dataset_version(data.copy()))
+        self.assertNotEqual(dataset_version(data), dataset_version(edited))
+
+    def test_cache_is_bounded(self):
+        """Testa o limite de entradas do cache"""
+        for column in ['a', 'b', 'c']:
+            self.engine.get_histogram(self.values, 3, column, 'ds')
+        self.assertEqual(len(self.engine._cache), 2)
+
+    def test_streaming_histogram_matches_total(self):
+        """Testa histograma incremental com blocos fora do intervalo inicial"""
+        rng = np.random.default_rng(0)
+        chunks = [rng.normal(0, 1, 1000), rng.normal(50, 1, 1000), rng.normal(-50, 1, 1000)]
+        histogram = StreamingHistogram(bins=30)
+        for chunk in chunks:
+            histogram.update(chunk)
+        counts, edges = histogram.result()
+
+        self.assertEqual(counts.sum(), 3000)
+        self.assertLessEqual(edges[0], min(chunk.min() for chunk in chunks))
+        self.assertGreater(edges[-1], max(chunk.max() for chunk in chunks))
+
+
+class TestHistogramCharts(unittest.TestCase):
+    """Testes para os renderizadores de histograma"""
+
+    def test_plotly_histogram_uses_counts(self):
+        """Testa histograma Plotly alimentado pelas contagens"""
+        data = pd.DataFrame({'x': range(10), 'y': [1, 1, 2, 2, 2, 3, 3, 3, 3, 4]})
+        success, fig, error = ChartGenerator().generate_chart(
+            data, 'x', 'y', 'Histograma', {'engine': 'plotly', 'bins': 3, 'show_totals': True}
+        )
+        self.assertTrue(success, error)
+        self.assertEqual(sum(fig.data[0].y), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Testes para a exportação HTML de gráficos
+"""
+import unittest
+import tempfile
+import plotly.graph_objects as go
+import sys
+import os
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.html_export import figures_to_html_bytes, write_plotlyjs_asset
+from src.chart_generator import ChartGenerator
+
+
+class TestHtmlExport(unittest.TestCase):
+    """Testes para as estratégias de inclusão do plotly.js"""
+
+    def setUp(self):
+        self.figures = [go.Figure(go.Bar(x=['a', 'b'], y=[1, 2])),
+                        go.Figure(go.Scatter(x=[1, 2], y=[3, 4], name='</script>'))]
+
+    def test_cdn_mode_is_small(self):
+        """Testa que o modo CDN não embute a biblioteca"""
+        html_bytes = figures_to_html_bytes(self.figures[:1], asset_mode='cdn')
+        self.assertTrue(html_bytes.startswith(b'<html>'))
+        self.assertIn(b'https://cdn.plot.ly/plotly-', html_bytes)
+        self.assertLess(len(html_bytes), 20000)
+
+    def test_inline_report_includes_library_once(self):
+        """Testa relatório com várias figuras e plotly.js embutido uma vez"""
+        html_bytes = figures_to_html_bytes(self.figures, titles=['Vendas', 'Lucro'], asset_mode='inline')
+        self.assertEqual(html_bytes.count(b'Plotly.newPlot('), 2)
+        self.assertEqual(html_bytes.count(b'* plotly.js v'), 1)
+        self.assertIn(b'<h2>Lucro</h2>', html_bytes)
+        self.assertNotIn(b'"</script>"', html_bytes)
+
+    def test_local_mode_and_asset(self):
+        """Testa referência ao arquivo compartilhado"""
+        html_bytes = figures_to_html_bytes(self.figures, asset_mode='local', asset_url='assets/plotly.min.js')
+        self.assertIn(b'src="assets/plotly.min.js"', html_bytes)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_plotlyjs_asset(directory)
+            self.assertTrue(os.path.getsize(path) > 0)
+
+    def test_invalid_asset_mode(self):
+        """Testa estratégia de assets inválida"""
+        success, html_bytes, error = ChartGenerator().save_chart_as_html(self.figures[0], asset_mode='zip')
+        self.assertFalse(success)
+        self.assertIsNotNone(error)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import json
+import subprocess
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.lazy_imports import LazyModule, is_available, streamlit_cache_data
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Orçamento de importação a frio do api/index.py (ajustável para máquinas lentas)
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", "3.0"))
+
+HEAVY_MODULES = ['streamlit', 'openai', 'supabase', 'matplotlib', 'seaborn', 'plotly.express',
+                 # Armazenamento de sessões dos apps Dash (cria um cache em disco na importação)
+                 'diskcache', 'src.session_store']
+
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+sys.path.insert(0, {api!r})
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def probe_imports(modules):
+    """Importa os módulos em um interpretador novo e retorna tempo e bibliotecas pesadas carregadas"""
+    code = _PROBE.format(root=ROOT, api=os.path.join(ROOT, 'api'), modules=modules, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True,
+                            text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+class TestLazyModule(unittest.TestCase):
+    def test_loads_on_first_attribute(self):
+        """Testa que o módulo só é importado no primeiro acesso"""
+        module = LazyModule('json')
+        self.assertIsNone(module._module)
+        self.assertEqual(module.dumps([1]), '[1]')
+        self.assertIsNotNone(module._module)
+
+    def test_is_available(self):
+        """Testa verificação de módulos instalados sem importá-los"""
+        self.assertTrue(is_available('json'))
+        self.assertFalse(is_available('modulo_que_nao_existe'))
+
+    def test_streamlit_cache_data_keeps_result(self):
+        """Testa que a função decorada mantém o resultado com ou sem Streamlit"""
+        @streamlit_cache_data
+        def double(value):
+            return value * 2
+
+        self.assertEqual(double(2), 4)
+        self.assertEqual(double.__name__, 'double')
+
+
+class TestImportBudget(unittest.TestCase):
+    def test_core_modules_are_framework_agnostic(self):
+        """Testa que os módulos de src não importam bibliotecas pesadas na importação"""
+        result = probe_imports(['src.validators', 'src.data_loader', 'src.chart_generator',
+                                'src.api_client', 'src.openai_client', 'src.supabase_client'])
+        self.assertEqual(result['loaded'], [])
+
+    def test_api_cold_start_budget(self):
+        """Testa o tempo de importação a frio do endpoint serverless"""
+        result = probe_imports(['index'])
+        self.assertEqual(result['loaded'], [])
+        self.assertLess(result['elapsed'], IMPORT_TIME_BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Testes para o tema Plotly compartilhado
+"""
+import unittest
+import plotly.io as pio
+import plotly.graph_objects as go
+import sys
+import os
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.plotly_theme import THEME_NAME, apply_theme, figure_data_patch, register_theme, theme_asset_source
+
+ASSET_PATH = os.path.join(os.path.dirname(__file__), '..', 'assets', 'lucrax_theme.js')
+
+
+class TestPlotlyTheme(unittest.TestCase):
+    """Testes para registro e aplicação do tema"""
+
+    def test_registered_once(self):
+        """Testa que o tema fica registrado em plotly.io.templates"""
+        template = pio.templates[THEME_NAME]
+        self.assertEqual(register_theme(), THEME_NAME)
+        self.assertIs(pio.templates[THEME_NAME], template)
+
+    def test_server_side_theme(self):
+        """Testa aplicação do tema pelo nome com ajustes do gráfico"""
+        fig = apply_theme(go.Figure(go.Bar(x=[1], y=[2])), height=500, margin=dict(l=100))
+        self.assertEqual(fig.layout.template.layout.paper_bgcolor, 'rgba(0,0,0,0)')
+        self.assertEqual(fig.layout.height, 500)
+        self.assertEqual(fig.layout.margin.l, 100)
+
+    def test_client_side_payload_is_small(self):
+        """Testa que o template não é embutido na figura enviada ao Dash"""
+        themed = apply_theme(go.Figure(go.Bar(x=[1], y=[2])), client_side=True)
+        default = go.Figure(go.Bar(x=[1], y=[2]))
+        self.assertNotIn('#374151', themed.to_json())
+        self.assertLess(len(themed.to_json()), len(default.to_json()) / 10)
+
+    def test_data_patch_sends_only_traces(self):
+        """Testa que a atualização parcial substitui apenas os traces"""
+        fig = apply_theme(go.Figure(go.Bar(x=['a'], y=[2])), client_side=True, title='Vendas')
+        operations = figure_data_patch(fig).to_plotly_json()['operations']
+        self.assertEqual(len(operations), 1)
+        self.assertEqual(operations[0]['location'], ['data'])
+        self.assertEqual(operations[0]['params']['value'][0]['type'], 'bar')
+        self.assertNotIn('Vendas', str(operations))
+
+    def test_asset_in_sync(self):
+        """Testa que o asset JavaScript corresponde ao tema em Python"""
+        with open(ASSET_PATH, encoding='utf-8') as f:
+            self.assertEqual(f.read(), theme_asset_source())
+
+
+if __name__ == '__main__':
+    unittest.main()
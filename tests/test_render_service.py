@@ -0,0 +1,78 @@
+"""
+Testes para o serviço de renderização Matplotlib
+"""
+import unittest
+import pandas as pd
+import sys
+import os
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.render_service import RenderService
+from src.chart_generator import ChartGenerator, _draw_histogram
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+class TestRenderService(unittest.TestCase):
+    """Testes para o pool de renderização"""
+
+    def setUp(self):
+        self.service = RenderService(max_workers=1, backend='thread')
+
+    def tearDown(self):
+        self.service.shutdown()
+
+    def test_render_png(self):
+        """Testa renderização para PNG"""
+        success, image_bytes, error = self.service.render(
+            _draw_histogram, counts=[1, 2, 1], edges=[1, 2, 3, 4], color='#1f77b4',
+            show_totals=False, title='Teste', x_label='x', y_label='y'
+        )
+        self.assertTrue(success)
+        self.assertIsNone(error)
+        self.assertTrue(image_bytes.startswith(PNG_SIGNATURE))
+
+    def test_render_svg(self):
+        """Testa renderização para SVG"""
+        success, image_bytes, error = self.service.render(
+            _draw_histogram, image_format='svg', counts=[1, 1], edges=[1, 2, 3],
+            color='#1f77b4', show_totals=True, title='Teste', x_label='x', y_label='y'
+        )
+        self.assertTrue(success)
+        self.assertIn(b'<svg', image_bytes)
+
+    def test_render_invalid_format(self):
+        """Testa formato de imagem não suportado"""
+        success, image_bytes, error = self.service.render(_draw_histogram, image_format='bmp')
+        self.assertFalse(success)
+        self.assertIsNone(image_bytes)
+        self.assertIsNotNone(error)
+
+    def test_render_draw_error(self):
+        """Testa erro dentro da função de desenho"""
+        success, image_bytes, error = self.service.render(_draw_histogram, counts=[1, 2])
+        self.assertFalse(success)
+        self.assertIsNotNone(error)
+
+
+class TestMatplotlibChartBytes(unittest.TestCase):
+    """Testes para gráficos Matplotlib renderizados fora do processo"""
+
+    def test_generate_boxplot_returns_png(self):
+        """Testa que o boxplot é retornado como bytes PNG"""
+        generator = ChartGenerator()
+        data = pd.DataFrame({
+            'category': ['A', 'B', 'A', 'B', 'A'],
+            'y': [2, 4, 6, 8, 10]
+        })
+        success, image_bytes, error = generator.generate_chart(
+            data, 'category', 'y', 'Boxplot', {'title': 'Boxplot'}
+        )
+        self.assertTrue(success, error)
+        self.assertTrue(image_bytes.startswith(PNG_SIGNATURE))
+
+
+if __name__ == '__main__':
+    unittest.main()
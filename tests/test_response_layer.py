@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+import gzip
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, Response
+from src.response_layer import ResponseLayer
+
+PAYLOAD = '{"data": [' + ', '.join(['{"x": 1, "y": 2}'] * 500) + ']}'
+
+
+class TestResponseLayer(unittest.TestCase):
+    def setUp(self):
+        server = Flask(__name__)
+
+        @server.route('/_dash-layout')
+        def layout():
+            return Response(PAYLOAD, mimetype='application/json')
+
+        @server.route('/_dash-update-component', methods=['POST'])
+        def update():
+            return Response(PAYLOAD, mimetype='application/json')
+
+        @server.route('/small')
+        def small():
+            return Response('{}', mimetype='application/json')
+
+        @server.route('/_dash-component-suites/dash/bundle.v1_0_0m123.min.js')
+        def bundle():
+            return Response('var a = 1;' * 500, mimetype='application/javascript')
+
+        self.layer = ResponseLayer(min_bytes=1024)
+        self.layer.init_app(server)
+        self.client = server.test_client()
+
+    def test_compresses_large_json(self):
+        """Testa compressão gzip das respostas de callbacks"""
+        response = self.client.post('/_dash-update-component', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers.get('Content-Encoding'), 'gzip')
+        self.assertIn('Accept-Encoding', response.headers.get('Vary'))
+        self.assertEqual(gzip.decompress(response.data).decode(), PAYLOAD)
+        self.assertLess(len(response.data), len(PAYLOAD))
+
+    def test_skips_small_or_unaccepted(self):
+        """Testa que respostas pequenas ou sem Accept-Encoding não são comprimidas"""
+        self.assertIsNone(self.client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers.get('Content-Encoding'))
+        response = self.client.post('/_dash-update-component')
+        self.assertIsNone(response.headers.get('Content-Encoding'))
+        self.assertEqual(response.data.decode(), PAYLOAD)
+
+    def test_layout_not_modified(self):
+        """Testa resposta 304 para o layout já recebido"""
+        first = self.client.get('/_dash-layout', headers={'Accept-Encoding': 'gzip'})
+        etag = first.headers['ETag']
+        self.assertEqual(first.headers['Cache-Control'], 'no-cache')
+
+        second = self.client.get('/_dash-layout', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b'')
+
+        # ETag de outra codificação não vale para a resposta sem compressão
+        third = self.client.get('/_dash-layout', headers={'If-None-Match': etag})
+        self.assertEqual(third.status_code, 200)
+
+    def test_fingerprinted_assets_are_immutable(self):
+        """Testa cache imutável e ETag forte para recursos com fingerprint"""
+        url = '/_dash-component-suites/dash/bundle.v1_0_0m123.min.js'
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertFalse(response.headers['ETag'].startswith('W/'))
+
+        again = self.client.get(url, headers={'Accept-Encoding': 'gzip',
+                                              'If-None-Match': response.headers['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
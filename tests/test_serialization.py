@@ -0,0 +1,46 @@
+"""
+Testes para a camada de serialização JSON
+"""
+import unittest
+import json
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import sys
+import os
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.serialization import RawJSON, dumps, dumps_with_raw, figure_to_json, figure_to_raw_json
+
+
+class TestSerialization(unittest.TestCase):
+    """Testes para o encoder e a inserção de JSON bruto"""
+
+    def test_dumps_numpy_and_timestamps(self):
+        """Testa serialização de arrays NumPy e datas"""
+        payload = {
+            'values': np.arange(3),
+            'scalar': np.float64(1.5),
+            'date': pd.Timestamp('2025-01-02')
+        }
+        result = json.loads(dumps(payload))
+        self.assertEqual(result['values'], [0, 1, 2])
+        self.assertEqual(result['scalar'], 1.5)
+        self.assertTrue(result['date'].startswith('2025-01-02'))
+
+    def test_raw_json_is_embedded(self):
+        """Testa que o JSON bruto é inserido sem ser reprocessado"""
+        text = dumps_with_raw({'ok': True, 'chart': RawJSON('{"a":[1,2]}'), 'items': [RawJSON('null')]})
+        self.assertEqual(json.loads(text), {'ok': True, 'chart': {'a': [1, 2]}, 'items': [None]})
+
+    def test_figure_round_trip(self):
+        """Testa que a figura serializada preserva os dados"""
+        fig = go.Figure(go.Scatter(x=np.arange(4), y=np.array([1.0, 2.0, 3.0, 4.0])))
+        body = json.loads(dumps_with_raw({'chart_data': figure_to_raw_json(fig)}))
+        self.assertEqual(body['chart_data'], json.loads(figure_to_json(fig)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+"""
+Testes para o armazenamento de sessões dos dashboards
+"""
+import unittest
+import threading
+import pandas as pd
+import sys
+import os
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.session_store import InMemoryBackend, SessionStore, create_backend, estimate_size
+
+
+class TestInMemoryBackend(unittest.TestCase):
+    """Testes para o orçamento de memória e descarte LRU"""
+
+    def test_lru_eviction(self):
+        """Testa descarte do item menos usado recentemente"""
+        frame = pd.DataFrame({'a': range(1000)})
+        backend = InMemoryBackend(max_bytes=int(estimate_size(frame) * 2.5))
+        backend.set('a', frame)
+        backend.set('b', frame.copy())
+        backend.get('a')
+        backend.set('c', frame.copy())
+
+        self.assertIsNotNone(backend.get('a'))
+        self.assertIsNone(backend.get('b'))
+        self.assertIsNotNone(backend.get('c'))
+        self.assertLessEqual(backend.total_bytes, backend.max_bytes)
+
+    def test_unknown_backend_falls_back(self):
+        """Testa backend desconhecido caindo para memória"""
+        self.assertIsInstance(create_backend('redis', max_bytes=1024), InMemoryBackend)
+
+
+class TestSessionStore(unittest.TestCase):
+    """Testes para o estado por sessão"""
+
+    def setUp(self):
+        self.store = SessionStore(InMemoryBackend(max_bytes=10 * 1024 * 1024))
+        self.data = pd.DataFrame({'region': ['N', 'S'], 'sales': [1, 2]})
+
+    def test_sessions_are_isolated(self):
+        """Testa que sessões diferentes não compartilham filtros"""
+        first, second = SessionStore.new_session_id(), SessionStore.new_session_id()
+        self.store.put_dataset('sheet', self.data)
+        self.store.save_session(first, dataset_key='sheet')
+        self.store.save_session(second, dataset_key='sheet')
+        self.store.update_filters(first, {'region': ['N']})
+
+        self.assertEqual(self.store.get_session(first)['filters'], {'region': ['N']})
+        self.assertEqual(self.store.get_session(second)['filters'], {})
+        self.assertIs(self.store.get_dataset('sheet'), self.store.get_dataset('sheet'))
+
+    def test_aggregates_follow_filter_state(self):
+        """Testa agregados em cache por estado de filtros"""
+        session_id = SessionStore.new_session_id()
+        self.store.save_session(session_id, dataset_key='sheet')
+        self.store.set_aggregate(session_id, 'metrics', {'total': 3})
+        self.assertEqual(self.store.get_aggregate(session_id, 'metrics'), {'total': 3})
+
+        self.store.update_filters(session_id, {'region': ['S']})
+        self.assertIsNone(self.store.get_aggregate(session_id, 'metrics'))
+
+    def test_filter_revision(self):
+        """Testa revisão incrementada por alteração de filtros e preservada pelos agregados"""
+        session_id = SessionStore.new_session_id()
+        self.store.save_session(session_id, dataset_key='sheet')
+        self.store.update_filters(session_id, {'region': ['N']})
+        self.store.set_aggregate(session_id, 'metrics', {'total': 1})
+        self.assertEqual(self.store.get_revision(session_id), 1)
+
+        self.store.update_filters(session_id, {'region': ['S']})
+        self.assertEqual(self.store.get_revision(session_id), 2)
+        self.assertEqual(self.store.get_revision(None), 0)
+
+    def test_only_current_filter_aggregates_are_kept(self):
+        """Testa que agregados de outros estados de filtros são descartados"""
+        session_id = SessionStore.new_session_id()
+        self.store.save_session(session_id, dataset_key='sheet')
+        for region in ['N', 'S', 'L']:
+            self.store.update_filters(session_id, {'region': [region]})
+            self.store.set_aggregate(session_id, 'metrics', {'region': region})
+        self.assertEqual(len(self.store.get_session(session_id)['aggregates']), 1)
+
+    def test_stale_aggregate_is_not_saved(self):
+        """Testa que um agregado calculado com filtros substituídos não sobrescreve o estado"""
+        session_id = SessionStore.new_session_id()
+        self.store.save_session(session_id, dataset_key='sheet')
+        self.store.update_filters(session_id, {'region': ['S']})
+        self.store.set_aggregate(session_id, 'metrics', {'total': 1}, filters={})
+
+        state = self.store.get_session(session_id)
+        self.assertEqual(state['filters'], {'region': ['S']})
+        self.assertEqual(state['revision'], 1)
+        self.assertEqual(state['aggregates'], {})
+
+    def test_concurrent_updates_are_atomic(self):
+        """Testa que filtros e agregados gravados em paralelo não perdem revisões"""
+        session_id = SessionStore.new_session_id()
+        self.store.save_session(session_id, dataset_key='sheet')
+
+        def worker(region):
+            for _ in range(50):
+                self.store.update_filters(session_id, {'region': [region]})
+                self.store.set_aggregate(session_id, 'metrics', {'region': region})
+
+        threads = [threading.Thread(target=worker, args=(region,)) for region in 'NSLO']
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.store.get_revision(session_id), 200)
+
+    def test_datasets_do_not_evict_sessions(self):
+        """Testa que um dataset acima do orçamento não descarta o estado das sessões"""
+        store = SessionStore(InMemoryBackend(max_bytes=1024))
+        store.save_session('abc', dataset_key='sheet', filters={'region': ['N']})
+        store.put_dataset('sheet', pd.DataFrame({'a': range(10000)}))
+        store.put_dataset('other', pd.DataFrame({'a': range(10000)}))
+        self.assertEqual(store.get_session('abc')['filters'], {'region': ['N']})
+
+    def test_set_dataset_resets_filters(self):
+        """Testa nova revisão e filtros limpos ao trocar o dataset da sessão"""
+        session_id = SessionStore.new_session_id()
+        self.store.set_dataset(session_id, 'sheet')
+        self.store.update_filters(session_id, {'region': ['N']})
+        state = self.store.set_dataset(session_id, 'other')
+        self.assertEqual((state['dataset_key'], state['filters'], state['revision']), ('other', {}, 2))
+
+    def test_evicted_dataset_is_reloaded(self):
+        """Testa recarga de dataset descartado pelo loader"""
+        calls = []
+
+        def loader(key):
+            calls.append(key)
+            return True, self.data, None
+
+        self.assertIs(self.store.get_dataset('sheet', loader=loader), self.data)
+        self.store.get_dataset('sheet', loader=loader)
+        self.assertEqual(calls, ['sheet'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Testes para a paginação, ordenação e filtragem de tabelas no servidor
+"""
+import unittest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.table_backend import TableBackend, filter_query_mask, page_records, parse_filter_query
+
+
+class TestFilterQuery(unittest.TestCase):
+    """Testes para o filter_query do DataTable"""
+
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'cidade': ['Rio', 'SP', 'rio grande', None],
+            'vendas': [10.0, 200.0, 35.0, 5.0],
+            'data': pd.to_datetime(['2024-01-05', '2024-02-01', '2024-01-20', '2023-12-31'])
+        })
+
+    def test_parse(self):
+        """Testa interpretação de condições, operadores simbólicos e aspas"""
+        conditions = parse_filter_query('{cidade} contains "rio" && {vendas} >= 10 && {x} ??? 1')
+        self.assertEqual(conditions, [('cidade', 'contains', 'rio'), ('vendas', 'ge', '10')])
+
+    def test_mask(self):
+        """Testa condições de texto, número, data e vazio"""
+        self.assertEqual(filter_query_mask(self.data, '{cidade} contains rio').tolist(),
+                         [True, False, True, False])
+        self.assertEqual(filter_query_mask(self.data, '{vendas} > 20 && {data} datestartswith 2024-01').tolist(),
+                         [False, False, True, False])
+        self.assertEqual(filter_query_mask(self.data, '{cidade} is blank').tolist(),
+                         [False, False, False, True])
+        self.assertIsNone(filter_query_mask(self.data, ''))
+
+
+class TestTableBackend(unittest.TestCase):
+    """Testes para páginas servidas a partir de ordens em cache"""
+
+    def setUp(self):
+        self.backend = TableBackend(max_cache_mb=1)
+        self.data = pd.DataFrame({
+            'regiao': np.array(['N', 'S', 'L'])[np.arange(1000) % 3],
+            'vendas': np.arange(1000)[::-1].astype(float)
+        })
+
+    def test_page_matches_pandas(self):
+        """Testa página ordenada e filtrada igual ao cálculo direto em pandas"""
+        sort_by = [{'column_id': 'vendas', 'direction': 'asc'}]
+        page, page_count, total = self.backend.get_page(
+            self.data, page_current=2, page_size=25, sort_by=sort_by,
+            filter_query='{vendas} < 500', filters={'regiao': ['N', 'S']}, dataset_key='sheet'
+        )
+        expected = self.data[self.data['regiao'].isin(['N', 'S']) & (self.data['vendas'] < 500)]
+        expected = expected.sort_values('vendas', kind='stable')
+        pd.testing.assert_frame_equal(page, expected.iloc[50:75])
+        self.assertEqual(total, len(expected))
+        self.assertEqual(page_count, int(np.ceil(len(expected) / 25)))
+
+    def test_sort_order_is_cached(self):
+        """Testa que a ordem é calculada uma vez e reaproveitada entre filtros"""
+        sort_by = [{'column_id': 'vendas', 'direction': 'desc'}]
+        first = self.backend.sort_order(self.data, sort_by, dataset_key='sheet')
+        self.backend.get_page(self.data, sort_by=sort_by, filters={'regiao': ['N']}, dataset_key='sheet')
+        self.assertIs(self.backend.sort_order(self.data, sort_by, dataset_key='sheet'), first)
+
+    def test_page_is_clamped(self):
+        """Testa página além do fim servida como a última"""
+        page, page_count, _ = self.backend.get_page(self.data, page_current=99, page_size=300)
+        self.assertEqual(page_count, 4)
+        self.assertEqual(len(page), 100)
+
+    def test_records_are_serializable(self):
+        """Testa conversão de datas e nulos para o DataTable"""
+        page = pd.DataFrame({'data': pd.to_datetime(['2024-01-05', None]), 'valor': [1.5, np.nan]})
+        self.assertEqual(page_records(page), [
+            {'data': '2024-01-05 00:00:00', 'valor': 1.5},
+            {'data': None, 'valor': None}
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+from src.cache_backends import DISKCACHE_AVAILABLE
+from src.warm_cache import DISK_HIT, HIT, MISS, WarmCache, hash_request_body
+
+
+class TestWarmCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = WarmCache(max_memory_mb=16, ttl=60, persist=False)
+
+    def test_hit_and_miss(self):
+        """Testa acerto após gravação e contadores nos cabeçalhos"""
+        key = self.cache.make_key('dataset', 'https://exemplo.com/planilha')
+        self.assertEqual(self.cache.lookup(key), (None, MISS))
+
+        data = pd.DataFrame({'a': [1, 2, 3]})
+        self.cache.store(key, data)
+        value, outcome = self.cache.lookup(key)
+        self.assertIs(value, data)
+        self.assertEqual(outcome, HIT)
+
+        headers = self.cache.headers(outcome)
+        self.assertEqual(headers['X-Cache'], 'HIT')
+        self.assertEqual(headers['X-Cache-Hits'], '1')
+        self.assertEqual(headers['X-Cache-Misses'], '1')
+
+    def test_expired_entry_is_miss(self):
+        """Testa que entradas vencidas não são reaproveitadas"""
+        cache = WarmCache(max_memory_mb=16, ttl=1, persist=False)
+        key = cache.make_key('figure', 'abc')
+        cache.store(key, '{}')
+        cache._created[key] -= 10
+        self.assertEqual(cache.lookup(key), (None, MISS))
+
+    def test_keys_from_payload(self):
+        """Testa chaves estáveis a partir de estruturas e do corpo bruto"""
+        self.assertEqual(self.cache.make_key('figure', {'a': 1, 'b': 2}),
+                         self.cache.make_key('figure', {'b': 2, 'a': 1}))
+        self.assertEqual(hash_request_body('{"a": 1}'), hash_request_body(b'{"a": 1}'))
+
+    @unittest.skipUnless(DISKCACHE_AVAILABLE, "diskcache não instalado")
+    def test_persisted_entry_survives_new_process(self):
+        """Testa que uma nova instância reaproveita entradas gravadas em disco"""
+        with tempfile.TemporaryDirectory() as directory:
+            first = WarmCache(max_memory_mb=16, ttl=60, persist=True, directory=directory)
+            key = first.make_key('analysis', 'abc')
+            first.store(key, {'analysis': 'ok'})
+
+            second = WarmCache(max_memory_mb=16, ttl=60, persist=True, directory=directory)
+            self.assertEqual(second.lookup(key), ({'analysis': 'ok'}, DISK_HIT))
+            self.assertEqual(second.lookup(key)[1], HIT)
+
+
+if __name__ == '__main__':
+    unittest.main()
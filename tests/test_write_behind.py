@@ -0,0 +1,188 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.write_behind import WriteBehindQueue
+
+
+class RecordingInsert:
+    """Grava os lotes recebidos; falha nas primeiras chamadas se pedido"""
+
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+        self.lock = threading.Lock()
+
+    def __call__(self, table, rows):
+        with self.lock:
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError('indisponível')
+            self.batches.append((table, list(rows)))
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+    def make_queue(self, insert, **kwargs):
+        options = dict(batch_rows=3, flush_interval=10, max_rows=100, max_retries=2, retry_backoff=0.01)
+        options.update(kwargs)
+        queue = WriteBehindQueue(insert, **options)
+        self.addCleanup(queue.close, 1)
+        return queue
+
+    def test_batches_by_size(self):
+        """Testa lote gravado ao atingir o número de linhas, sem esperar o intervalo"""
+        insert = RecordingInsert()
+        queue = self.make_queue(insert)
+        for i in range(3):
+            self.assertTrue(queue.enqueue('api_usage_logs', {'n': i}))
+
+        deadline = time.monotonic() + 2
+        while not insert.batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(insert.batches, [('api_usage_logs', [{'n': 0}, {'n': 1}, {'n': 2}])])
+
+    def test_flush_by_time_in_foreign_key_order(self):
+        """Testa gravação por tempo, com fontes de dados antes dos dados importados"""
+        insert = RecordingInsert()
+        queue = self.make_queue(insert, flush_interval=0.05)
+        queue.enqueue('imported_data', {'data_source_id': 'a'})
+        queue.enqueue('data_sources', {'id': 'a'})
+
+        deadline = time.monotonic() + 2
+        while queue.depth() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual([table for table, _ in insert.batches], ['data_sources', 'imported_data'])
+
+    def test_retry_with_backoff(self):
+        """Testa nova tentativa após falhas temporárias"""
+        insert = RecordingInsert(failures=2)
+        queue = self.make_queue(insert)
+        queue.enqueue('data_analyses', {'n': 1})
+
+        self.assertTrue(queue.flush(2))
+        stats = queue.stats()
+        self.assertEqual((stats['written'], stats['retries'], stats['failed']), (1, 2, 0))
+
+    def test_gives_up_after_retries(self):
+        """Testa descarte do lote após esgotar as tentativas"""
+        queue = self.make_queue(RecordingInsert(failures=10))
+        queue.enqueue('data_analyses', {'n': 1})
+
+        self.assertTrue(queue.flush(2))
+        self.assertEqual(queue.stats()['failed'], 1)
+
+    def test_drops_rows_of_failed_parent(self):
+        """Testa descarte das linhas que referenciam uma fonte de dados não gravada"""
+        insert = RecordingInsert()
+
+        def insert_without_sources(table, rows):
+            if table == 'data_sources':
+                raise ConnectionError('indisponível')
+            insert(table, rows)
+
+        queue = self.make_queue(insert_without_sources)
+        queue.enqueue('data_sources', {'id': 'a'})
+        queue.enqueue('imported_data', {'data_source_id': 'a'})
+        queue.enqueue('data_analyses', {'data_source_id': 'b'})
+        self.assertTrue(queue.flush(2))
+
+        # Também nas gravações seguintes
+        queue.enqueue('data_analyses', {'data_source_id': 'a'})
+        self.assertTrue(queue.flush(2))
+        self.assertEqual(insert.batches, [('data_analyses', [{'data_source_id': 'b'}])])
+        stats = queue.stats()
+        self.assertEqual((stats['failed'], stats['dropped']), (1, 2))
+
+    def test_rejects_when_full_or_closed(self):
+        """Testa recusa de linhas com a fila cheia ou encerrada"""
+        gate = threading.Event()
+        queue = self.make_queue(lambda table, rows: gate.wait(2), max_rows=2)
+        self.assertTrue(queue.enqueue('api_usage_logs', {'n': 1}))
+        self.assertTrue(queue.enqueue('api_usage_logs', {'n': 2}))
+        self.assertFalse(queue.enqueue('api_usage_logs', {'n': 3}))
+        self.assertEqual(queue.stats()['depth'], 2)
+
+        gate.set()
+        self.assertTrue(queue.close(2))
+        self.assertFalse(queue.enqueue('api_usage_logs', {'n': 4}))
+        self.assertEqual(queue.stats()['rejected'], 2)
+
+    def test_close_flushes_pending_rows(self):
+        """Testa que o encerramento grava as linhas pendentes"""
+        insert = RecordingInsert()
+        queue = self.make_queue(insert)
+        queue.enqueue('data_sources', {'id': 'a'})
+        self.assertEqual(queue.stats()['depth_by_table'], {'data_sources': 1})
+
+        self.assertTrue(queue.close(2))
+        self.assertEqual(insert.batches, [('data_sources', [{'id': 'a'}])])
+        self.assertEqual(queue.depth(), 0)
+
+    def test_flush_if_due_skips_recent_and_audit_rows(self):
+        """Testa que linhas recentes e logs de uso não forçam a gravação ao final da invocação"""
+        insert = RecordingInsert()
+        queue = self.make_queue(insert)
+        queue.enqueue('data_sources', {'id': 'a'})
+        self.assertTrue(queue.flush_if_due(1, margin=0))
+        self.assertEqual(queue.depth(), 1)
+
+        # Logs de uso perto do prazo continuam para a próxima invocação
+        audit = self.make_queue(insert)
+        audit.enqueue('api_usage_logs', {'n': 1})
+        self.assertTrue(audit.flush_if_due(1, margin=10))
+        self.assertEqual(audit.depth(), 1)
+        self.assertEqual(insert.batches, [])
+
+    def test_flush_if_due_writes_rows_near_deadline(self):
+        """Testa gravação das linhas perto do prazo, junto com os logs de uso pendentes"""
+        insert = RecordingInsert()
+        queue = self.make_queue(insert)
+        queue.enqueue('api_usage_logs', {'n': 1})
+        queue.enqueue('data_sources', {'id': 'a'})
+        self.assertTrue(queue.flush_if_due(2, margin=10))
+        self.assertEqual(insert.batches, [('data_sources', [{'id': 'a'}]), ('api_usage_logs', [{'n': 1}])])
+        self.assertEqual(queue.depth(), 0)
+
+    def test_flush_if_due_writes_deep_queue(self):
+        """Testa gravação quando a fila acumula um lote, mesmo com linhas recentes"""
+        insert = RecordingInsert()
+        queue = self.make_queue(insert)
+        queue.enqueue('api_usage_logs', {'n': 1})
+        queue.enqueue('api_usage_logs', {'n': 2})
+        queue.enqueue('user_sessions', {'id': 's'})
+        self.assertTrue(queue.flush_if_due(2, margin=0))
+        self.assertEqual(queue.depth(), 0)
+        self.assertEqual(len(insert.batches), 2)
+
+
+
+class TestSupabaseClientWriteBehind(unittest.TestCase):
+    def test_save_returns_id_before_insert(self):
+        """Testa que as gravações retornam o id gerado e seguem em lote pela fila"""
+        from unittest import mock
+        from src.supabase_client import SupabaseClient
+
+        client = SupabaseClient()
+        client.is_available = True
+        client._client = mock.MagicMock()
+        insert = RecordingInsert()
+        client.write_queue = WriteBehindQueue(insert, batch_rows=10, flush_interval=10)
+        self.addCleanup(client.write_queue.close, 1)
+
+        success, data_id, _ = client.save_imported_data('fonte', [{'a': 1}], ['a'], 1)
+        self.assertTrue(success)
+        success, analysis_id, _ = client.save_analysis('fonte', 'ai_analysis', 'prompt', {})
+        self.assertTrue(success)
+        client._client.table.assert_not_called()
+
+        self.assertTrue(client.write_queue.flush(2))
+        self.assertEqual([(table, rows[0]['id']) for table, rows in insert.batches],
+                         [('imported_data', data_id), ('data_analyses', analysis_id)])
+
+
+if __name__ == '__main__':
+    unittest.main()